@@ -0,0 +1,64 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Blob, ChunkedUpload, IdempotencyRecord, OutboxEvent, Task
+
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    """
+    Admin class for the ChunkedUpload model.
+    """
+
+    list_display = ["filename", "user", "size", "offset", "status", "date_updated"]
+    list_filter = ["status"]
+    list_select_related = ["user"]
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    """
+    Admin class for the Blob model.
+    """
+
+    list_display = ["name", "ref_count", "date_created", "date_updated"]
+    search_fields = ["=name"]
+
+
+@admin.register(IdempotencyRecord)
+class IdempotencyRecordAdmin(admin.ModelAdmin):
+    """
+    Admin class for the IdempotencyRecord model.
+    """
+
+    list_display = ["key", "owner", "status_code", "date_created"]
+    search_fields = ["=key", "=owner"]
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """
+    Admin class for the Task model.
+    """
+
+    list_display = ["name", "queue", "priority", "status", "attempts", "run_at"]
+    list_filter = ["status", "queue"]
+    search_fields = ["name"]
+    actions = ["retry"]
+
+    @admin.action(description="Retry selected tasks now")
+    def retry(self, request, queryset):
+        queryset.exclude(status="running").update(
+            status="queued", attempts=0, run_at=timezone.now()
+        )
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    """
+    Admin class for the OutboxEvent model.
+    """
+
+    list_display = ["event_type", "object_id", "date_created", "published_at"]
+    list_filter = ["event_type", ("published_at", admin.EmptyFieldListFilter)]
+    search_fields = ["=object_id"]
@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+def record_queries(sender, connection, **kwargs):
+    from .query_audit import install_recorder
+
+    install_recorder(settings.QUERY_CAPTURE_LOG, connection)
+
+
+class CoreConfig(AppConfig):
+    """
+    Shared infrastructure used by the other apps.
+    """
+
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+
+    def ready(self):
+        if settings.QUERY_CAPTURE_LOG:
+            connection_created.connect(record_queries, dispatch_uid="query_capture")
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+# Model label -> [(scope model label, owner field)] of the scopes its rows
+# belong to.
+SCOPES = {}
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache evicting the least recently used entries.
+
+    Fast and free of network hops, but private to each process: other
+    processes only see invalidations once their entries expire.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DjangoCache:
+    """
+    Adapter storing entries in one of the ``CACHES``, to share them between
+    processes (Redis, Memcached, database cache...).
+    """
+
+    def __init__(self, alias="default"):
+        self.cache = caches[alias]
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, timeout)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+@lru_cache(maxsize=None)
+def get_cache():
+    """
+    Returns the backend configured by the ``RESPONSE_CACHE`` setting.
+    """
+    config = settings.RESPONSE_CACHE
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+def version_key(scope, owner):
+    return f"version:{scope}:{'*' if owner is None else owner}"
+
+
+def scope_version(scope, owner=None):
+    """
+    Returns the current version of the rows of ``scope`` owned by ``owner``,
+    or of all its rows when ``owner`` is None.
+
+    Versions are random tokens rather than counters, so a version that was
+    evicted comes back as a new value and never revives stale entries. They
+    expire with the cached responses, after ``RESPONSE_CACHE["TIMEOUT"]``,
+    so a process that missed an invalidation (``LRUCache``) moves on to a
+    new version within that bound too.
+    """
+    cache = get_cache()
+    key = version_key(scope, owner)
+    version = cache.get(key)
+    if version is None:
+        version = os.urandom(6).hex()
+        cache.set(key, version, settings.RESPONSE_CACHE["TIMEOUT"])
+    return version
+
+
+def invalidate(scope, owner=None):
+    """
+    Expire the entries cached for ``owner``'s rows of ``scope``, and the
+    entries covering all rows of ``scope``.
+    """
+    cache = get_cache()
+    cache.delete(version_key(scope, None))
+    if owner is not None:
+        cache.delete(version_key(scope, owner))
+
+
+def invalidate_instance(instance, using=None):
+    """
+    Invalidate every scope ``instance`` belongs to.
+
+    Runs again once the transaction commits, so responses cached from a
+    concurrent read of the not yet committed data are dropped as well.
+    """
+    invalidate_objects([instance], using)
+
+
+def invalidate_objects(objects, using=None):
+    """
+    Invalidate every scope ``objects`` belong to, once per scope and owner,
+    now and once the transaction commits.
+    """
+    targets = {
+        (scope, getattr(instance, owner_field))
+        for instance in objects
+        for scope, owner_field in SCOPES.get(instance._meta.label, ())
+    }
+
+    def run():
+        for scope, owner in targets:
+            invalidate(scope, owner)
+
+    run()
+    transaction.on_commit(run, using=using)
+
+
+def invalidate_rows(queryset):
+    """
+    Invalidate the scopes of the rows of ``queryset``.
+
+    For changes made with ``QuerySet.update()``, which sends no signals.
+    """
+    invalidate_objects(queryset, queryset.db)
+
+
+def _on_change(sender, instance, using, **kwargs):
+    invalidate_instance(instance, using)
+
+
+def register_scope(model, owner_field, scope=None):
+    """
+    Invalidate cached responses of ``scope`` when ``model`` rows change.
+
+    Args:
+        model (type[Model]): The model whose saves and deletes invalidate.
+        owner_field (str): The attribute of ``model`` holding the owner's
+            user id, whose own cached responses are invalidated.
+        scope (type[Model], optional): The model of the cached responses, for
+            responses that embed ``model`` rows. Defaults to ``model``.
+    """
+    scope = (scope or model)._meta.label
+    SCOPES.setdefault(model._meta.label, []).append((scope, owner_field))
+    uid = f"response_cache_{model._meta.label}"
+    post_save.connect(_on_change, sender=model, dispatch_uid=uid)
+    post_delete.connect(_on_change, sender=model, dispatch_uid=uid)
+
+
+def make_key(*parts):
+    """
+    Returns a fixed-length cache key for ``parts``.
+    """
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
@@ -0,0 +1,141 @@
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class GzipEncoder:
+    """
+    Incremental gzip compressor.
+    """
+
+    encoding = "gzip"
+
+    def __init__(self, level):
+        # wbits=31 writes the gzip header and trailer instead of zlib's.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        """
+        Returns the pending output, decodable on its own by the client.
+        """
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    """
+    Incremental brotli compressor.
+    """
+
+    encoding = "br"
+
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def accepted_encodings(header):
+    """
+    Returns the codings of an ``Accept-Encoding`` header with a non-zero
+    quality, mapped to that quality.
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return {coding: quality for coding, quality in accepted.items() if quality > 0}
+
+
+def get_encoder(accept_encoding):
+    """
+    Returns an encoder for the best coding the client accepts, brotli first
+    on equal quality, or None when it accepts neither.
+    """
+    config = settings.RESPONSE_COMPRESSION
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0)
+    candidates = []
+    if brotli is not None and config["BROTLI_QUALITY"] is not None:
+        candidates.append(
+            (
+                accepted.get("br", wildcard),
+                lambda: BrotliEncoder(config["BROTLI_QUALITY"]),
+            )
+        )
+    candidates.append(
+        (accepted.get("gzip", wildcard), lambda: GzipEncoder(config["GZIP_LEVEL"]))
+    )
+    quality, factory = max(candidates, key=lambda candidate: candidate[0])
+    return factory() if quality > 0 else None
+
+
+def is_compressible(content_type):
+    """
+    Returns whether responses of ``content_type`` are worth compressing.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    # Event streams are long-lived and mostly idle: a compressor per open
+    # connection would cost more memory than the small events save.
+    if media_type == "text/event-stream":
+        return False
+    return any(
+        media_type == allowed
+        or (allowed.endswith("/") and media_type.startswith(allowed))
+        for allowed in settings.RESPONSE_COMPRESSION["CONTENT_TYPES"]
+    )
+
+
+def compress(encoder, content):
+    return encoder.compress(content) + encoder.finish()
+
+
+def compress_stream(encoder, chunks):
+    """
+    Compresses an iterator of chunks, flushing after each one so that
+    clients receive data as soon as it is produced.
+    """
+    for chunk in chunks:
+        data = encoder.compress(chunk) + encoder.flush()
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+async def acompress_stream(encoder, chunks):
+    """
+    Async version of ``compress_stream``.
+    """
+    async for chunk in chunks:
+        data = encoder.compress(chunk) + encoder.flush()
+        if data:
+            yield data
+    yield encoder.finish()
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection
+from django.db.models import Max, Q
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+EVENT_FIELDS = ("pk", "event_type", "model", "object_id", "owner_id", "payload")
+# Ids missing from a poll are looked for again this many seconds, in case
+# their transaction had not committed yet.
+GAP_TIMEOUT = 10
+MAX_GAPS = 1000
+
+# The broker outlives the request that started it, so it queries from its
+# own thread (and database connection) rather than a request's.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sse-broker")
+
+
+class Subscription:
+    """
+    The events waiting to be sent on one stream.
+
+    ``all_models`` are the models whose events the user receives whoever
+    they belong to (admins and staff); otherwise only events owned by the
+    user are received. When the client falls ``SSE["QUEUE_SIZE"]`` events
+    behind, the stream is closed so that it reconnects and catches up from
+    the database.
+
+    An idle subscription holds an empty list and, while its stream waits, a
+    future, rather than an ``asyncio.Queue`` and its three deques, so that
+    thousands of open streams stay cheap.
+    """
+
+    __slots__ = ("owner_id", "all_models", "pending", "waiter", "overflowed")
+
+    def __init__(self, owner_id, all_models=frozenset()):
+        self.owner_id = owner_id
+        self.all_models = all_models
+        self.pending = []
+        self.waiter = None
+        self.overflowed = False
+
+    def accepts(self, event):
+        return event["owner_id"] == self.owner_id or event["model"] in self.all_models
+
+    def put(self, event):
+        if len(self.pending) < settings.SSE["QUEUE_SIZE"]:
+            self.pending.append(event)
+        else:
+            self.overflowed = True
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def get(self, timeout):
+        """
+        Returns the pending events, waiting up to ``timeout`` seconds for
+        some; an empty list on timeout.
+        """
+        if not self.pending and not self.overflowed:
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self.waiter, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.waiter = None
+        events, self.pending = self.pending, []
+        return events
+
+
+class Broker:
+    """
+    Fans the outbox events out to the open streams of the process.
+
+    A single task polls the outbox every ``SSE["POLL_INTERVAL"]`` seconds
+    while streams are open, so the database sees one query per process per
+    interval however many clients are connected, and each event is handed
+    to the subscriptions of its owner with a dictionary lookup.
+    """
+
+    def __init__(self):
+        self.by_owner = defaultdict(set)
+        self.broad = set()
+        self.last_id = None
+        self.gaps = {}
+        self.task = None
+
+    def subscribe(self, owner_id, all_models=frozenset()):
+        subscription = Subscription(owner_id, all_models)
+        self.by_owner[owner_id].add(subscription)
+        if all_models:
+            self.broad.add(subscription)
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.task = loop.create_task(self.run())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self.by_owner.get(subscription.owner_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.by_owner[subscription.owner_id]
+        self.broad.discard(subscription)
+
+    async def run(self):
+        interval = settings.SSE["POLL_INTERVAL"]
+        while self.by_owner:
+            try:
+                events = await sync_to_async(
+                    self.fetch, thread_sensitive=False, executor=_executor
+                )()
+            except Exception:
+                logger.exception("Reading the outbox failed.")
+                events = []
+            for event in events:
+                self.dispatch(event)
+            # A full batch means more events are waiting.
+            if len(events) < settings.SSE["BATCH_SIZE"]:
+                await asyncio.sleep(interval)
+        # Streams opened later start from the events after theirs.
+        self.last_id = None
+        await sync_to_async(
+            connection.close, thread_sensitive=False, executor=_executor
+        )()
+
+    def fetch(self):
+        """
+        Returns the events saved since the last call, in id order.
+
+        Ids are handed out before transactions commit, so an id skipped by
+        one poll may still show up; it is looked for again for
+        ``GAP_TIMEOUT`` seconds.
+        """
+        close_old_connections()
+        if self.last_id is None:
+            self.last_id = OutboxEvent.objects.aggregate(last=Max("pk"))["last"] or 0
+            self.gaps.clear()
+            return []
+        now = time.monotonic()
+        self.gaps = {pk: until for pk, until in self.gaps.items() if until > now}
+        condition = Q(pk__gt=self.last_id)
+        if self.gaps:
+            condition |= Q(pk__in=list(self.gaps))
+        events = list(
+            OutboxEvent.objects.filter(condition)
+            .order_by("pk")
+            .values(*EVENT_FIELDS)[: settings.SSE["BATCH_SIZE"]]
+        )
+        expected = self.last_id + 1
+        for event in events:
+            pk = event["pk"]
+            self.gaps.pop(pk, None)
+            if pk < expected:
+                continue
+            if len(self.gaps) + pk - expected <= MAX_GAPS:
+                self.gaps.update(dict.fromkeys(range(expected, pk), now + GAP_TIMEOUT))
+            expected = pk + 1
+        self.last_id = max(self.last_id, expected - 1)
+        return events
+
+    def dispatch(self, event):
+        if event["model"] not in settings.SSE["MODELS"]:
+            return
+        for subscription in self.by_owner.get(event["owner_id"], ()):
+            subscription.put(event)
+        for subscription in self.broad:
+            if subscription.owner_id != event["owner_id"] and subscription.accepts(
+                event
+            ):
+                subscription.put(event)
+
+
+broker = Broker()
+
+
+def backlog(subscription, last_event_id):
+    """
+    Returns the events a reconnecting client missed after ``last_event_id``,
+    at most ``SSE["QUEUE_SIZE"]``.
+    """
+    condition = Q(owner_id=subscription.owner_id)
+    if subscription.all_models:
+        condition |= Q(model__in=subscription.all_models)
+    return list(
+        OutboxEvent.objects.filter(
+            condition, pk__gt=last_event_id, model__in=settings.SSE["MODELS"]
+        )
+        .order_by("pk")
+        .values(*EVENT_FIELDS)[: settings.SSE["QUEUE_SIZE"]]
+    )
+
+
+def format_event(event):
+    """
+    Returns ``event`` as a Server-Sent Events message.
+    """
+    data = json.dumps(
+        {
+            "model": event["model"],
+            "object_id": event["object_id"],
+            "payload": event["payload"],
+        },
+        cls=DjangoJSONEncoder,
+    )
+    return f"id: {event['pk']}\nevent: {event['event_type']}\ndata: {data}\n\n"
+
+
+async def stream(subscription, last_event_id=None):
+    """
+    Yields the messages of a subscription until the client goes away, with
+    a comment every ``SSE["HEARTBEAT"]`` seconds to keep proxies from
+    closing idle connections.
+    """
+    heartbeat = settings.SSE["HEARTBEAT"]
+    try:
+        yield f"retry: {settings.SSE['RETRY'] * 1000:.0f}\n\n"
+        replayed = set()
+        if last_event_id is not None:
+            for event in await sync_to_async(backlog)(subscription, last_event_id):
+                replayed.add(event["pk"])
+                yield format_event(event)
+        while True:
+            batch = await subscription.get(heartbeat)
+            for event in batch:
+                if event["pk"] not in replayed:
+                    yield format_event(event)
+            if subscription.overflowed:
+                # The client reconnects with the id of the last event sent.
+                break
+            if not batch:
+                yield ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,181 @@
+import hashlib
+import hmac
+import json
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Response headers kept with the record and sent again on replays.
+REPLAYED_HEADERS = ("Location",)
+# Request fields left out of fingerprints.
+SECRET_FIELDS = re.compile("password|secret|token", re.IGNORECASE)
+
+
+class KeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = f"This {HEADER} was already used for a different request."
+    default_code = "idempotency_key_reused"
+
+
+class RequestInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = f"A request with this {HEADER} is still being processed."
+    default_code = "idempotency_key_in_progress"
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+def _public(data):
+    """
+    Returns ``data`` without the values of ``SECRET_FIELDS``, recursively.
+    """
+    if isinstance(data, dict):
+        return {
+            key: _public(value)
+            for key, value in data.items()
+            if not SECRET_FIELDS.search(str(key))
+        }
+    if isinstance(data, (list, tuple)):
+        return [_public(value) for value in data]
+    return data
+
+
+def fingerprint(request):
+    """
+    Returns a hash of what the request asks for, to tell a retry from a
+    different request reusing the key.
+
+    The data is hashed as canonical JSON, so the order of its keys does not
+    matter, with an HMAC keyed by ``SECRET_KEY``, and without the fields
+    named like secrets (passwords, tokens), which are never kept. Uploaded
+    files are hashed by name and size only.
+    """
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    files = sorted((name, f.name, f.size) for name, f in request.FILES.items())
+    message = json.dumps(
+        [request.method, request.path, _public(data), files],
+        cls=JSONEncoder,
+        sort_keys=True,
+    )
+    return hmac.new(
+        settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def claim(owner, key, digest):
+    """
+    Takes the key for a new request, or finds the record of an earlier one.
+
+    Expired records, and those left in progress for more than
+    ``IDEMPOTENCY["LOCK_TIMEOUT"]`` by a request that died, are dropped so
+    the key can be taken again.
+
+    Returns:
+        tuple[IdempotencyRecord, bool]: The record and whether it was
+            created, in which case the caller must handle the request.
+    """
+    config = settings.IDEMPOTENCY
+    while True:
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    owner=owner, key=key, fingerprint=digest
+                )
+            return record, True
+        except IntegrityError:
+            pass
+        record = IdempotencyRecord.objects.filter(owner=owner, key=key).first()
+        if record is None:
+            continue
+        age = timezone.now() - record.date_created
+        lock_timeout = timedelta(seconds=config["LOCK_TIMEOUT"])
+        if age > config["TTL"] or (record.in_progress and age > lock_timeout):
+            # Filtered on the creation date, so only one request drops it.
+            IdempotencyRecord.objects.filter(
+                pk=record.pk, date_created=record.date_created
+            ).delete()
+            continue
+        return record, False
+
+
+def wait(record):
+    """
+    Waits for the request holding ``record`` to finish, polling with an
+    increasing delay for up to ``IDEMPOTENCY["WAIT_TIMEOUT"]`` seconds.
+
+    Returns:
+        IdempotencyRecord | None: The completed record, or None if the
+            request failed and its record was dropped.
+
+    Raises:
+        RequestInProgress: When the request is still running.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY["WAIT_TIMEOUT"]
+    delay = 0.05
+    while record.in_progress:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RequestInProgress()
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.5)
+        try:
+            record.refresh_from_db()
+        except IdempotencyRecord.DoesNotExist:
+            return None
+    return record
+
+
+def save(record, response, private_fields=()):
+    """
+    Stores ``response`` in ``record`` for replays.
+
+    The ``private_fields`` of the response data, such as credentials, are
+    stored as null and must be filled in again when replaying.
+    """
+    data = response.data
+    if isinstance(data, dict):
+        data = {
+            key: None if key in private_fields else value for key, value in data.items()
+        }
+    record.status_code = response.status_code
+    record.response = json.dumps(data, cls=JSONEncoder)
+    record.headers = {
+        name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)
+    }
+    record.save(update_fields=["status_code", "response", "headers"])
+
+
+def replay(record):
+    """
+    Returns the response stored in ``record``.
+    """
+    headers = {**record.headers, REPLAYED_HEADER: "true"}
+    return Response(
+        json.loads(record.response), status=record.status_code, headers=headers
+    )
+
+
+def purge():
+    """
+    Deletes the expired records.
+
+    Returns:
+        int: The number of records deleted.
+    """
+    cutoff = timezone.now() - settings.IDEMPOTENCY["TTL"]
+    deleted, _ = IdempotencyRecord.objects.filter(date_created__lt=cutoff).delete()
+    return deleted
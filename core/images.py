@@ -0,0 +1,259 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models.signals import post_init, post_save
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import invalidate_rows
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+# (model label, field name) pairs whose uploads get variants.
+TRACKED_FIELDS = set()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variants_field_name(field_name):
+    """
+    Returns the name of the JSONField holding the variants of ``field_name``.
+    """
+    return f"{field_name}_variants"
+
+
+def variant_name(source_name, label, image_format):
+    """
+    Returns the storage name of the ``label`` variant of ``source_name``.
+
+    Variants mirror the path of their source under ``variants/``, so
+    re-processing the same source overwrites the previous variants instead of
+    piling up, and sources shared through content addressing share variants.
+    """
+    directory, base = os.path.split(source_name)
+    stem = os.path.splitext(base)[0]
+    extension = "jpg" if image_format.upper() == "JPEG" else image_format.lower()
+    return os.path.join("variants", directory, f"{stem}_{label}.{extension}")
+
+
+def _init_worker():
+    """
+    Set up Django in a freshly spawned pool worker.
+    """
+    import django
+
+    django.setup()
+
+
+def render_variants(model_label, field_name, source_name):
+    """
+    Generate every configured variant of an image.
+
+    Runs in a pool worker. It only touches storage, never the database, so
+    workers hold no connections.
+
+    Args:
+        model_label (str): The label of the model owning the image field.
+        field_name (str): The name of the image field.
+        source_name (str): The storage name of the original image.
+
+    Returns:
+        dict: The variant storage names by label, plus the ``source`` they
+        were generated from.
+    """
+    storage = apps.get_model(model_label)._meta.get_field(field_name).storage
+    image_format = settings.IMAGE_VARIANT_FORMAT
+    variants = {"source": source_name}
+    with storage.open(source_name, "rb") as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        if image_format.upper() == "JPEG" or original.mode not in ("RGB", "RGBA"):
+            original = original.convert(
+                "RGB" if image_format.upper() == "JPEG" else "RGBA"
+            )
+        for label, size in settings.IMAGE_VARIANTS.items():
+            image = original.copy()
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            image.save(
+                buffer,
+                format=image_format,
+                quality=settings.IMAGE_VARIANT_QUALITY,
+                optimize=True,
+            )
+            name = variant_name(source_name, label, image_format)
+            default_storage.delete(name)
+            variants[label] = default_storage.save(name, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def store_variants(model_label, pk, field_name, variants):
+    """
+    Save generated variants on the row, unless its image changed meanwhile.
+
+    Uses ``QuerySet.update()`` so no ``post_save`` fires and no further
+    processing is scheduled. ``auto_now`` fields are bumped by hand, so the
+    change shows in the validators of conditional requests.
+    """
+    model = apps.get_model(model_label)
+    changes = {variants_field_name(field_name): variants}
+    for field in model._meta.concrete_fields:
+        if getattr(field, "auto_now", False):
+            changes[field.name] = timezone.now()
+    rows = model._default_manager.filter(pk=pk, **{field_name: variants["source"]})
+    if rows.update(**changes):
+        invalidate_rows(rows)
+
+
+def get_executor():
+    """
+    Returns the process pool that renders variants, starting it on first use.
+
+    Workers are spawned rather than forked so they never inherit open
+    database connections or locks from the web process.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PIPELINE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+@task(queue="images")
+def process_image(model_label, pk, field_name, source_name):
+    """
+    Render and store the variants of an image synchronously.
+    """
+    variants = render_variants(model_label, field_name, source_name)
+    store_variants(model_label, pk, field_name, variants)
+    return variants
+
+
+def schedule_variants(model_label, pk, field_name, source_name):
+    """
+    Queue an image for processing outside the request path.
+
+    With ``IMAGE_PIPELINE_WORKERS = 0`` the image is processed inline, which
+    is what tests and the backfill command want. With
+    ``IMAGE_PIPELINE_TASK_QUEUE`` it is queued for ``run_task_worker``.
+    """
+    if not settings.IMAGE_PIPELINE_WORKERS:
+        process_image(model_label, pk, field_name, source_name)
+        return
+    if settings.IMAGE_PIPELINE_TASK_QUEUE:
+        process_image.enqueue(model_label, pk, field_name, source_name)
+        return
+
+    def done(future):
+        try:
+            store_variants(model_label, pk, field_name, future.result())
+        except Exception:
+            logger.exception(f"Image processing failed for {model_label} {pk}")
+        finally:
+            # Callbacks run on the pool's management thread; don't leave its
+            # connection open between images.
+            connection.close()
+
+    get_executor().submit(
+        render_variants, model_label, field_name, source_name
+    ).add_done_callback(done)
+
+
+def needs_processing(instance, field_name):
+    """
+    Returns whether the variants of ``field_name`` are missing or stale.
+    """
+    source_name = getattr(instance, field_name).name or ""
+    variants = getattr(instance, variants_field_name(field_name)) or {}
+    return variants.get("source", "") != source_name
+
+
+def delete_variants(source_name):
+    """
+    Delete the variants of an image that was replaced or cleared.
+
+    Sources shared through content addressing share their variants, so these
+    are kept while any row still shows the source; ``collect_media_garbage``
+    deletes them along with the blob.
+    """
+    for model_label, field_name in TRACKED_FIELDS:
+        model = apps.get_model(model_label)
+        if model._default_manager.filter(**{field_name: source_name}).exists():
+            return
+    for label in settings.IMAGE_VARIANTS:
+        default_storage.delete(
+            variant_name(source_name, label, settings.IMAGE_VARIANT_FORMAT)
+        )
+
+
+def _loaded_name(instance, field_name):
+    """
+    Returns the image name held by the instance, or None for deferred fields.
+    """
+    if field_name not in instance.__dict__:
+        return None
+    value = instance.__dict__[field_name]
+    return getattr(value, "name", value) or ""
+
+
+def _snapshot(sender, instance, **kwargs):
+    instance._image_names = {
+        field_name: _loaded_name(instance, field_name)
+        for model_label, field_name in TRACKED_FIELDS
+        if model_label == sender._meta.label
+    }
+
+
+def _on_save(sender, instance, created, using, **kwargs):
+    # The variants stored on the instance may predate processing, so the old
+    # ones are found from the image it was loaded or last saved with.
+    for field_name, old_name in instance._image_names.items():
+        new_name = _loaded_name(instance, field_name)
+        if created or not old_name or new_name in (None, old_name):
+            continue
+        transaction.on_commit(lambda name=old_name: delete_variants(name), using=using)
+    _snapshot(sender, instance)
+    for model_label, field_name in TRACKED_FIELDS:
+        if model_label != sender._meta.label or not needs_processing(
+            instance, field_name
+        ):
+            continue
+        source_name = getattr(instance, field_name).name
+        if not source_name:
+            sender._default_manager.filter(pk=instance.pk).update(
+                **{variants_field_name(field_name): {}}
+            )
+            continue
+        transaction.on_commit(
+            lambda pk=instance.pk, field_name=field_name, name=source_name: (
+                schedule_variants(sender._meta.label, pk, field_name, name)
+            ),
+            using=using,
+        )
+
+
+def track_image_field(model, field_name):
+    """
+    Generate variants for ``model.field_name`` whenever a new image is saved,
+    and delete those of the image it replaces.
+
+    The model needs a ``<field_name>_variants`` JSONField to hold the result.
+    """
+    TRACKED_FIELDS.add((model._meta.label, field_name))
+    uid = f"image_variants_{model._meta.label}"
+    post_init.connect(_snapshot, sender=model, dispatch_uid=uid)
+    post_save.connect(_on_save, sender=model, dispatch_uid=uid)
@@ -0,0 +1,110 @@
+import os
+import tempfile
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import get_runner
+
+from core.query_audit import (
+    audit,
+    install_recorder,
+    load_log,
+    propose_index,
+)
+
+
+class Command(BaseCommand):
+    """
+    Explain the queries the API runs and propose indexes for table scans.
+
+    Queries come from replay logs written with ``QUERY_CAPTURE_LOG`` (from a
+    staging or profiling run), or are captured live while running the test
+    suite with ``--test``. Each distinct statement is explained once on the
+    database it ran against, and every table it reads with a sequential scan
+    is reported together with a composite or partial index that would serve
+    it. Proposals are meant to be reviewed and shipped as migrations using
+    ``core.operations.AddIndexConcurrently``.
+    """
+
+    help = "Find sequential scans in captured queries and propose indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "logs",
+            nargs="*",
+            help="Replay logs written through the QUERY_CAPTURE_LOG setting.",
+        )
+        parser.add_argument(
+            "--test",
+            nargs="*",
+            metavar="LABEL",
+            help="Run the test suite (or the given labels) and audit its queries.",
+        )
+        parser.add_argument(
+            "--min-calls",
+            type=int,
+            default=1,
+            help="Only report statements that ran at least this many times.",
+        )
+
+    def handle(self, *args, **options):
+        if options["test"] is not None:
+            return self.audit_tests(options)
+        if not options["logs"]:
+            raise CommandError("Pass replay logs to audit, or --test.")
+        statements = []
+        for path in options["logs"]:
+            statements.extend(load_log(path))
+        self.report(audit(statements, connections), options["min_calls"])
+
+    def audit_tests(self, options):
+        """
+        Run the tests with query capture on, auditing before the test
+        databases are destroyed.
+        """
+        command = self
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+
+        class AuditRunner(get_runner(settings)):
+            def setup_databases(self, **kwargs):
+                old_config = super().setup_databases(**kwargs)
+                for connection in connections.all():
+                    install_recorder(path, connection)
+                return old_config
+
+            def teardown_databases(self, old_config, **kwargs):
+                command.report(audit(load_log(path), connections), options["min_calls"])
+                super().teardown_databases(old_config, **kwargs)
+
+        try:
+            failures = AuditRunner(verbosity=0, interactive=False).run_tests(
+                options["test"]
+            )
+        finally:
+            os.remove(path)
+        if failures:
+            raise CommandError(f"{failures} test(s) failed, the audit may be partial.")
+
+    def report(self, findings, min_calls):
+        proposals = Counter()
+        for finding in findings:
+            if finding.calls < min_calls:
+                continue
+            self.stdout.write(
+                self.style.WARNING(f"{finding.table}: {finding.detail}")
+                + f" [{finding.calls} call(s)]"
+            )
+            self.stdout.write(f"    {finding.sql[:300]}")
+            proposal = propose_index(finding.table, finding.columns)
+            if proposal:
+                self.stdout.write(f"    -> {proposal}")
+                proposals[proposal] += finding.calls
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS("No index to propose."))
+            return
+        self.stdout.write("\nProposed indexes, by number of calls served:")
+        for proposal, calls in proposals.most_common():
+            self.stdout.write(f"  {calls:>6}  {proposal}")
@@ -0,0 +1,418 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, get_runner, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.cache import get_cache
+from referrals.models import Product, SupportTicket, UserRanking
+from useraccounts.models import CompanyProfile, CustomUser, IndividualProfile
+
+PASSWORD = "benchmark-password"
+
+WORDS = (
+    "referral cluster product traffic share bonus recruit company individual "
+    "support ticket account verify growth network payout launch market"
+).split()
+
+VERIFY_RESPONSE = {
+    "account_name": "ADA LOVELACE",
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "other_name": "",
+    "account_number": "0123456789",
+    "bank_code": "058",
+    "Bank_name": "Benchmark Bank",
+}
+
+
+class VerifyStubHandler(BaseHTTPRequestHandler):
+    """
+    Answers every GET like the account verification API.
+    """
+
+    def do_GET(self):
+        body = json.dumps(VERIFY_RESPONSE).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def verify_stub():
+    """
+    Serves ``VerifyStubHandler`` on a free local port and points
+    ``ACCOUNT_VERIFICATION_URL`` at it.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), VerifyStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/api/verify"
+        with override_settings(ACCOUNT_VERIFICATION_URL=url):
+            yield
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def seed(rng, users, products, tickets, rankings):
+    """
+    Creates the benchmark dataset and returns the companies and individuals.
+
+    Two thirds of the users are individuals and one third companies.
+    Products are spread over the companies with a skew, a few companies
+    owning most of them, like in production.
+    """
+    password = make_password(PASSWORD)
+    accounts = CustomUser.objects.bulk_create(
+        CustomUser(
+            email=f"bench-{i}@example.com",
+            password=password,
+            name=f"Benchmark User {i}",
+            user_type="company" if i % 3 == 0 else "individual",
+            phone_number=f"080{i:08d}",
+            address=f"{i} Benchmark Street",
+            country="Nigeria",
+            state="Lagos",
+            city="Ikeja",
+            status="active",
+        )
+        for i in range(users)
+    )
+    companies = [user for user in accounts if user.user_type == "company"]
+    individuals = [user for user in accounts if user.user_type == "individual"]
+    CompanyProfile.objects.bulk_create(
+        CompanyProfile(user=user, company_registration_number=f"RC{user.pk}")
+        for user in companies
+    )
+    IndividualProfile.objects.bulk_create(
+        IndividualProfile(user=user, gender=rng.choice(("male", "female")))
+        for user in individuals
+    )
+    weights = [1 / (rank + 1) for rank in range(len(companies))]
+    Product.objects.bulk_create(
+        (
+            Product(
+                product_name=f"Product {i}",
+                company=company,
+                description=" ".join(rng.choices(WORDS, k=rng.randint(20, 120))),
+                product_link=f"https://example.com/products/{i}",
+                status=rng.choice(("pending", "active", "active", "declined")),
+                shares=rng.randint(0, 500),
+                traffic=rng.randint(0, 20000),
+            )
+            for i, company in enumerate(
+                rng.choices(companies, weights=weights, k=products)
+            )
+        ),
+        batch_size=500,
+    )
+    SupportTicket.objects.bulk_create(
+        (
+            SupportTicket(
+                submitted_by=rng.choice(accounts),
+                title=f"Ticket {i}",
+                description=" ".join(rng.choices(WORDS, k=rng.randint(10, 60))),
+                priority=rng.choice(("low", "medium", "high")),
+            )
+            for i in range(tickets)
+        ),
+        batch_size=500,
+    )
+    UserRanking.objects.bulk_create(
+        UserRanking(
+            user=f"bench-{i}",
+            rank_level=i % 5,
+            total_recruits=rng.randint(0, 100),
+            bonus=rng.randint(0, 10000),
+        )
+        for i in range(rankings)
+    )
+    return companies, individuals
+
+
+def bearer(user):
+    return f"Bearer {RefreshToken.for_user(user).access_token}"
+
+
+def scenarios(rng, companies, individuals):
+    """
+    Returns ``(name, expected status, request function)`` for each
+    benchmarked endpoint. Request functions take the client and the
+    iteration number.
+    """
+    company_products = {}
+    for uuid, company_id in Product.objects.values_list("uuid", "company_id"):
+        company_products.setdefault(company_id, []).append(uuid)
+    owners = [user for user in companies if user.pk in company_products]
+    tokens = {user.pk: bearer(user) for user in owners + individuals}
+
+    def signup(client, i):
+        return client.post(
+            "/api/v1/accounts/signup/",
+            {
+                "email": f"bench-signup-{i}@example.com",
+                "password": PASSWORD,
+                "name": f"Signup {i}",
+                "user_type": "individual",
+                "gender": "female",
+            },
+            content_type="application/json",
+        )
+
+    def token(client, i):
+        user = rng.choice(individuals)
+        return client.post(
+            "/api/v1/accounts/token/",
+            {"email": user.email, "password": PASSWORD},
+            content_type="application/json",
+        )
+
+    def product_list(client, i):
+        user = rng.choice(owners)
+        return client.get(
+            "/api/v1/referrals/products/", HTTP_AUTHORIZATION=tokens[user.pk]
+        )
+
+    def product_update(client, i):
+        user = rng.choice(owners)
+        uuid = rng.choice(company_products[user.pk])
+        return client.patch(
+            f"/api/v1/referrals/products/{uuid}/",
+            {"traffic": rng.randint(0, 20000)},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=tokens[user.pk],
+        )
+
+    def ticket_create(client, i):
+        user = rng.choice(individuals)
+        return client.post(
+            "/api/v1/referrals/supporttickets/",
+            {"title": f"Benchmark ticket {i}", "description": "Payout is late."},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=tokens[user.pk],
+        )
+
+    def verify(client, i):
+        user = rng.choice(individuals)
+        return client.get(
+            "/api/v1/referrals/verify/",
+            {"account_number": "0123456789", "bank_code": "058"},
+            HTTP_AUTHORIZATION=tokens[user.pk],
+        )
+
+    return [
+        ("signup", 201, signup),
+        ("token", 200, token),
+        ("product-list", 200, product_list),
+        ("product-update", 200, product_update),
+        ("ticket-create", 201, ticket_create),
+        ("verify", 200, verify),
+    ]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the main API endpoints through the full middleware stack.
+
+    A test database is created and seeded with a realistic dataset, then
+    each endpoint is called through ``django.test.Client`` and the real
+    URLconf: signup, token, product list and update, ticket creation, and
+    account verification against a local stub of the verification API.
+    Throughput, latency percentiles and queries per request are reported
+    per endpoint, and can be saved as JSON with ``--output`` and compared
+    with an earlier run with ``--compare``.
+
+    Requests are sent one at a time, so throughput is that of a single
+    worker. Run on the database engine used in production (PostgreSQL) for
+    meaningful numbers; SQLite works for a quick comparison.
+    """
+
+    help = "Benchmark API endpoints on a seeded test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Per endpoint.")
+        parser.add_argument("--warmup", type=int, default=10, help="Per endpoint.")
+        parser.add_argument("--users", type=int, default=300)
+        parser.add_argument("--products", type=int, default=3000)
+        parser.add_argument("--tickets", type=int, default=2000)
+        parser.add_argument("--rankings", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--endpoints", nargs="+", help="Only benchmark these endpoints."
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", help="Compare with a JSON results file.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10.0,
+            help="Percentage of p95 slowdown or throughput loss reported as a "
+            "regression when comparing.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error when the comparison finds a regression.",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2.")
+        runner = get_runner(settings)(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        # Rate limits would throttle the benchmark client itself.
+        no_limits = {**settings.RATE_LIMITS, "RULES": []}
+        try:
+            with verify_stub(), override_settings(RATE_LIMITS=no_limits):
+                results = self.run(options)
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        report = {
+            "revision": git_revision(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connections[DEFAULT_DB_ALIAS].vendor,
+            "options": {
+                key: options[key]
+                for key in ("requests", "users", "products", "tickets", "seed")
+            },
+            "endpoints": results,
+        }
+        self.print_results(results)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+            regressions = self.compare(baseline, report, options["threshold"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"Regressions in: {', '.join(regressions)}.")
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        companies, individuals = seed(
+            rng,
+            options["users"],
+            options["products"],
+            options["tickets"],
+            options["rankings"],
+        )
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+        get_cache().clear()
+        client = Client()
+        results = {}
+        for name, expected, request in scenarios(rng, companies, individuals):
+            if options["endpoints"] and name not in options["endpoints"]:
+                continue
+            # Same request sequence whichever endpoints are selected.
+            rng.seed(f"{options['seed']}:{name}")
+            for i in range(options["warmup"]):
+                request(client, f"warmup-{i}")
+            latencies, queries, errors = [], [], 0
+            for i in range(options["requests"]):
+                with ExitStack() as stack:
+                    captures = [
+                        stack.enter_context(CaptureQueriesContext(connection))
+                        for connection in connections.all()
+                    ]
+                    request_started = time.perf_counter()
+                    response = request(client, i)
+                    latencies.append(time.perf_counter() - request_started)
+                queries.append(sum(len(capture) for capture in captures))
+                if response.status_code != expected:
+                    errors += 1
+            quantiles = statistics.quantiles(latencies, n=100)
+            results[name] = {
+                "requests": len(latencies),
+                "errors": errors,
+                "throughput": len(latencies) / sum(latencies),
+                "mean_ms": statistics.fmean(latencies) * 1000,
+                "p50_ms": quantiles[49] * 1000,
+                "p95_ms": quantiles[94] * 1000,
+                "p99_ms": quantiles[98] * 1000,
+                "queries": statistics.fmean(queries),
+            }
+        return results
+
+    def print_results(self, results):
+        self.stdout.write(
+            f"{'endpoint':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'p99 ms':>9}{'queries':>9}{'errors':>8}"
+        )
+        for name, result in results.items():
+            line = (
+                f"{name:<16}{result['throughput']:>9.1f}{result['p50_ms']:>9.2f}"
+                f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                f"{result['queries']:>9.1f}{result['errors']:>8}"
+            )
+            self.stdout.write(self.style.ERROR(line) if result["errors"] else line)
+
+    def compare(self, baseline, report, threshold):
+        """
+        Prints the change of each endpoint since ``baseline`` and returns the
+        names of those that regressed.
+        """
+        label = baseline.get("revision") or baseline.get("date", "baseline")
+        self.stdout.write(f"\nCompared with {label}:")
+        regressions = []
+        for name, result in report["endpoints"].items():
+            before = baseline["endpoints"].get(name)
+            if before is None:
+                continue
+            p95 = change(before["p95_ms"], result["p95_ms"])
+            throughput = change(before["throughput"], result["throughput"])
+            queries = round(result["queries"] - before["queries"], 1)
+            regressed = p95 > threshold or -throughput > threshold or queries > 0
+            line = (
+                f"{name:<16}p95 {p95:+6.1f}%  req/s {throughput:+6.1f}%  "
+                f"queries {queries:+.1f}"
+            )
+            if regressed:
+                regressions.append(name)
+                line = self.style.ERROR(line + "  REGRESSION")
+            self.stdout.write(line)
+        return regressions
+
+
+def change(before, after):
+    return (after - before) / before * 100 if before else 0.0
@@ -0,0 +1,139 @@
+import copy
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+MODES = ("per-request", "persistent", "pooled")
+
+
+def mode_settings(mode, pool_size):
+    """
+    Returns the settings of the ``default`` database adapted to ``mode``.
+    """
+    config = copy.deepcopy(connections[DEFAULT_DB_ALIAS].settings_dict)
+    options = {k: v for k, v in config.get("OPTIONS", {}).items() if k != "pool"}
+    config["CONN_HEALTH_CHECKS"] = False
+    config["CONN_MAX_AGE"] = 0
+    if mode == "persistent":
+        config["CONN_MAX_AGE"] = 600
+        config["CONN_HEALTH_CHECKS"] = True
+    elif mode == "pooled":
+        pool = settings.DATABASES[DEFAULT_DB_ALIAS].get("OPTIONS", {}).get("pool")
+        options["pool"] = {
+            **(pool if isinstance(pool, dict) else {}),
+            "min_size": min(2, pool_size),
+            "max_size": pool_size,
+        }
+    config["OPTIONS"] = options
+    return config
+
+
+class Command(BaseCommand):
+    """
+    Compare connection strategies under a threaded request load.
+
+    Each worker thread plays the part of a gunicorn/uvicorn thread: it runs a
+    few queries per simulated request, then releases its connection the way
+    Django does when a request finishes. Three strategies are measured:
+
+    - ``per-request``: a new connection for every request (``CONN_MAX_AGE=0``).
+    - ``persistent``: one connection per thread kept open (the former
+      ``conn_max_age=500`` production setup).
+    - ``pooled``: a psycopg pool shared by all threads (``DB_POOL_ENABLED``).
+
+    For each strategy the request latency percentiles and the peak number of
+    server connections (from ``pg_stat_activity``) are reported.
+    """
+
+    help = "Benchmark per-request, persistent and pooled database connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument("--requests", type=int, default=100, help="Per thread.")
+        parser.add_argument("--queries", type=int, default=3, help="Per request.")
+        parser.add_argument("--pool-size", type=int, default=8)
+        parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != "postgresql":
+            raise CommandError("Connection pooling is only available on PostgreSQL.")
+        self.stdout.write(
+            f"{options['threads']} threads x {options['requests']} requests, "
+            f"{options['queries']} queries each"
+        )
+        for mode in options["modes"]:
+            alias = f"benchmark_{mode.replace('-', '_')}"
+            connections.settings[alias] = mode_settings(mode, options["pool_size"])
+            try:
+                latencies, peak, elapsed = self.run(alias, options)
+            finally:
+                self.cleanup(alias, mode)
+            quantiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{mode:>11}: p50 {quantiles[49] * 1000:.2f}ms "
+                f"p95 {quantiles[94] * 1000:.2f}ms "
+                f"p99 {quantiles[98] * 1000:.2f}ms, "
+                f"{len(latencies) / elapsed:.0f} req/s, "
+                f"peak {peak} server connections"
+            )
+
+    def run(self, alias, options):
+        latencies = []
+        lock = threading.Lock()
+        done = threading.Event()
+        peak = 0
+
+        def worker():
+            connection = connections[alias]
+            timings = []
+            for _ in range(options["requests"]):
+                started = time.perf_counter()
+                with connection.cursor() as cursor:
+                    for _ in range(options["queries"]):
+                        cursor.execute("SELECT 1")
+                        cursor.fetchone()
+                # What the request_finished signal does after each request.
+                connection.close_if_unusable_or_obsolete()
+                timings.append(time.perf_counter() - started)
+            connection.close()
+            with lock:
+                latencies.extend(timings)
+
+        def monitor():
+            nonlocal peak
+            with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                while not done.is_set():
+                    cursor.execute(
+                        "SELECT count(*) - 1 FROM pg_stat_activity "
+                        "WHERE datname = current_database() "
+                        "AND backend_type = 'client backend'"
+                    )
+                    peak = max(peak, cursor.fetchone()[0])
+                    done.wait(0.05)
+            connections[DEFAULT_DB_ALIAS].close()
+
+        watcher = threading.Thread(target=monitor)
+        watcher.start()
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+                for future in [
+                    executor.submit(worker) for _ in range(options["threads"])
+                ]:
+                    future.result()
+        finally:
+            elapsed = time.perf_counter() - started
+            done.set()
+            watcher.join()
+        return latencies, peak, elapsed
+
+    def cleanup(self, alias, mode):
+        if mode == "pooled":
+            connections[alias].close_pool()
+        connections[alias].close()
+        del connections.settings[alias]
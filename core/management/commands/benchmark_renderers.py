@@ -0,0 +1,107 @@
+import io
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from core.uuids import uuid7
+from referrals.models import Product, UserRanking
+from referrals.serializers import ProductSerializer, UserRankingSerializer
+
+FORMATS = {
+    "json": (JSONRenderer, JSONParser),
+    "orjson": (ORJSONRenderer, ORJSONParser),
+    "msgpack": (MessagePackRenderer, MessagePackParser),
+}
+
+
+def product_payload(count, context):
+    now = timezone.now()
+    products = [
+        Product(
+            uuid=uuid7(),
+            product_name=f"Product {i}",
+            company_id=i % 50 + 1,
+            date_created=now - timedelta(days=i),
+            date_updated=now,
+            description="Lorem ipsum dolor sit amet, consectetur adipiscing. " * 8,
+            product_image=f"blobs/ab/cd/{i:064x}.png",
+            product_image_variants={
+                "source": f"blobs/ab/cd/{i:064x}.png",
+                "thumbnail": f"variants/blobs/ab/cd/{i:064x}_thumbnail.webp",
+                "small": f"variants/blobs/ab/cd/{i:064x}_small.webp",
+            },
+            product_link=f"https://example.com/products/{i}",
+            status="active",
+            shares=i * 7,
+            traffic=i * 131,
+        )
+        for i in range(count)
+    ]
+    return ProductSerializer(products, many=True, context=context).data
+
+
+def ranking_payload(count, context):
+    now = timezone.now()
+    rankings = [
+        UserRanking(
+            id=i,
+            user=f"user-{i}",
+            rank_level=i % 5,
+            name="gold",
+            total_recruits=i * 3,
+            bonus=i * 10,
+            date=now - timedelta(hours=i),
+        )
+        for i in range(count)
+    ]
+    return UserRankingSerializer(rankings, many=True, context=context).data
+
+
+class Command(BaseCommand):
+    """
+    Compare DRF's JSON renderer and parser with the orjson and MessagePack
+    ones, on serialized product and ranking lists.
+
+    No database access is needed: payloads are built from unsaved instances.
+    """
+
+    help = "Benchmark JSON, orjson and MessagePack rendering and parsing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        # Without a request, image URLs stay relative.
+        context = {}
+        payloads = {
+            "products": product_payload(options["rows"], context),
+            "rankings": ranking_payload(options["rows"], context),
+        }
+        for name, data in payloads.items():
+            self.stdout.write(f"{name} ({options['rows']} rows):")
+            for label, (renderer_class, parser_class) in FORMATS.items():
+                renderer, parser = renderer_class(), parser_class()
+                render = self.best_of(options["repeat"], renderer.render, data)
+                body = renderer.render(data)
+                parse = self.best_of(
+                    options["repeat"], lambda: parser.parse(io.BytesIO(body))
+                )
+                self.stdout.write(
+                    f"  {label:>8}: render {render * 1000:7.2f}ms, "
+                    f"parse {parse * 1000:7.2f}ms, {len(body) / 1024:8.1f} KiB"
+                )
+
+    def best_of(self, repeat, function, *args):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function(*args)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
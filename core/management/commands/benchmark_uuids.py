@@ -0,0 +1,108 @@
+import random
+import time
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.db import connections, models, transaction
+
+from core.uuids import uuid7
+
+GENERATORS = {"uuid4": uuid4, "uuid7": uuid7}
+
+
+class Command(BaseCommand):
+    """
+    Compare random (v4) and time-ordered (v7) UUID primary keys.
+
+    For each generator a scratch table keyed like ``Product`` is filled in
+    batches, then probed with random primary key lookups. On PostgreSQL the
+    size of the resulting primary key index is reported too, which shows the
+    page splits caused by random inserts. The scratch tables are dropped
+    afterwards.
+    """
+
+    help = "Benchmark inserts and lookups with uuid4 and uuid7 primary keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--lookups", type=int, default=10_000)
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to run the benchmark on.",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        self.stdout.write(
+            f"{connection.vendor}: {options['rows']} rows, "
+            f"batches of {options['batch_size']}, {options['lookups']} lookups"
+        )
+        for label, generator in GENERATORS.items():
+            table = f"benchmark_{label}"
+            self.create_table(connection, table)
+            try:
+                result = self.run(connection, table, generator, options)
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE {connection.ops.quote_name(table)}")
+            line = (
+                f"{label}: insert {result['insert']:.2f}s "
+                f"({options['rows'] / result['insert']:.0f} rows/s), "
+                f"lookup {result['lookup'] * 1e6:.1f}us/row"
+            )
+            if result["index_size"] is not None:
+                line += f", pk index {result['index_size'] / 1024 / 1024:.1f} MB"
+            self.stdout.write(line)
+
+    def create_table(self, connection, table):
+        qn = connection.ops.quote_name
+        uuid_type = models.UUIDField().db_type(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {qn(table)}")
+            cursor.execute(
+                f"CREATE TABLE {qn(table)} ("
+                f"uuid {uuid_type} NOT NULL PRIMARY KEY, "
+                f"payload varchar(255) NOT NULL)"
+            )
+
+    def run(self, connection, table, generator, options):
+        qn = connection.ops.quote_name
+        field = models.UUIDField()
+        keys = []
+        started = time.perf_counter()
+        for start in range(0, options["rows"], options["batch_size"]):
+            size = min(options["batch_size"], options["rows"] - start)
+            batch = [
+                field.get_db_prep_value(generator(), connection) for _ in range(size)
+            ]
+            keys.extend(batch)
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.executemany(
+                        f"INSERT INTO {qn(table)} (uuid, payload) VALUES (%s, %s)",
+                        [(key, "x" * 64) for key in batch],
+                    )
+        insert = time.perf_counter() - started
+
+        probes = random.sample(keys, min(options["lookups"], len(keys)))
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            for key in probes:
+                cursor.execute(
+                    f"SELECT payload FROM {qn(table)} WHERE uuid = %s", [key]
+                )
+                cursor.fetchone()
+        lookup = (time.perf_counter() - started) / max(len(probes), 1)
+
+        index_size = None
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_relation_size(indexrelid) FROM pg_index "
+                    "WHERE indrelid = %s::regclass AND indisprimary",
+                    [table],
+                )
+                index_size = cursor.fetchone()[0]
+        return {"insert": insert, "lookup": lookup, "index_size": index_size}
@@ -0,0 +1,100 @@
+import os
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.images import variant_name
+from core.models import Blob
+from core.storage import BLOB_PREFIX, TRACKED_FIELDS, blob_storage
+
+
+class Command(BaseCommand):
+    """
+    Delete content-addressed blobs that no model field references anymore.
+
+    Blobs are only collected once they have been unreferenced for
+    ``BLOB_GC_GRACE_PERIOD``, so uploads whose row is still being committed
+    are never lost.
+    """
+
+    help = "Delete unreferenced content-addressed media blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recount",
+            action="store_true",
+            help="Recompute every reference count from the model fields first.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted.",
+        )
+
+    def recount(self):
+        """
+        Reset the reference counts to the number of rows pointing at each blob.
+        """
+        counts = Counter()
+        for model_label, field_name in TRACKED_FIELDS:
+            model = apps.get_model(model_label)
+            counts.update(
+                model._default_manager.filter(
+                    **{f"{field_name}__startswith": BLOB_PREFIX}
+                ).values_list(field_name, flat=True)
+            )
+        Blob.objects.exclude(name__in=counts).update(ref_count=0)
+        for name, count in counts.items():
+            Blob.objects.update_or_create(name=name, defaults={"ref_count": count})
+        self.stdout.write(f"Recounted references of {len(counts)} blobs.")
+
+    def delete_blob(self, storage, name):
+        storage.delete(name)
+        for label in settings.IMAGE_VARIANTS:
+            default_storage.delete(
+                variant_name(name, label, settings.IMAGE_VARIANT_FORMAT)
+            )
+
+    def handle(self, *args, **options):
+        storage = blob_storage()
+        dry_run = options["dry_run"]
+        cutoff = timezone.now() - settings.BLOB_GC_GRACE_PERIOD
+        if options["recount"]:
+            self.recount()
+
+        collected = 0
+        unreferenced = Blob.objects.filter(ref_count__lte=0, date_updated__lt=cutoff)
+        for name in unreferenced.values_list("name", flat=True).iterator():
+            if dry_run:
+                self.stdout.write(f"Would delete {name}")
+            # Re-check in the DELETE itself, the blob may have been reused or
+            # saved again since.
+            elif unreferenced.filter(name=name).delete()[0]:
+                self.delete_blob(storage, name)
+            collected += 1
+
+        # Files with no Blob row at all: uploads whose row never got saved,
+        # and temporary files left behind by interrupted writes.
+        root = storage.path(BLOB_PREFIX)
+        known = None
+        for directory, _, files in os.walk(root):
+            for file_name in files:
+                path = os.path.join(directory, file_name)
+                if os.path.getmtime(path) >= cutoff.timestamp():
+                    continue
+                name = os.path.relpath(path, storage.location).replace(os.sep, "/")
+                if known is None:
+                    known = set(Blob.objects.values_list("name", flat=True))
+                if name in known:
+                    continue
+                if dry_run:
+                    self.stdout.write(f"Would delete orphan {name}")
+                else:
+                    self.delete_blob(storage, name)
+                collected += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Collected {collected} blobs."))
@@ -0,0 +1,40 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.images import TRACKED_FIELDS, needs_processing, process_image
+
+
+class Command(BaseCommand):
+    """
+    Generate missing or stale image variants for existing rows.
+    """
+
+    help = "Generate missing or stale image variants for existing rows."
+
+    def handle(self, *args, **options):
+        for model_label, field_name in sorted(TRACKED_FIELDS):
+            model = apps.get_model(model_label)
+            processed = failed = 0
+            queryset = model._default_manager.exclude(**{field_name: ""}).exclude(
+                **{f"{field_name}__isnull": True}
+            )
+            for instance in queryset.iterator():
+                if not needs_processing(instance, field_name):
+                    continue
+                try:
+                    process_image(
+                        model_label,
+                        instance.pk,
+                        field_name,
+                        getattr(instance, field_name).name,
+                    )
+                    processed += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model_label} {instance.pk}: {e}")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model_label}.{field_name}: {processed} processed, "
+                    f"{failed} failed."
+                )
+            )
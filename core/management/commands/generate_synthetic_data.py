@@ -0,0 +1,453 @@
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+
+from core.uuids import uuid7
+from referrals.models import Product, SupportTicket, UserRanking
+from useraccounts.models import CompanyProfile, CustomUser, IndividualProfile
+
+# (country, weight, {state: [cities]}), states listed by population.
+LOCATIONS = [
+    (
+        "Nigeria",
+        60,
+        {
+            "Lagos": ["Ikeja", "Lekki", "Yaba", "Surulere", "Ikorodu"],
+            "Kano": ["Kano", "Wudil"],
+            "Abuja FCT": ["Garki", "Wuse", "Maitama", "Gwarinpa"],
+            "Rivers": ["Port Harcourt", "Bonny"],
+            "Oyo": ["Ibadan", "Ogbomosho"],
+            "Enugu": ["Enugu", "Nsukka"],
+        },
+    ),
+    (
+        "Ghana",
+        12,
+        {
+            "Greater Accra": ["Accra", "Tema"],
+            "Ashanti": ["Kumasi", "Obuasi"],
+        },
+    ),
+    (
+        "Kenya",
+        10,
+        {"Nairobi": ["Nairobi", "Westlands"], "Mombasa": ["Mombasa"]},
+    ),
+    (
+        "South Africa",
+        8,
+        {
+            "Gauteng": ["Johannesburg", "Pretoria"],
+            "Western Cape": ["Cape Town", "Stellenbosch"],
+        },
+    ),
+    ("United Kingdom", 6, {"England": ["London", "Manchester", "Birmingham"]}),
+    ("United States", 4, {"New York": ["New York"], "Texas": ["Houston", "Dallas"]}),
+]
+
+WORDS = (
+    "referral cluster product traffic share bonus recruit company individual "
+    "support ticket account verify growth network payout launch market mobile "
+    "campaign reward link click partner brand customer order delivery"
+).split()
+
+# Order in which tables are filled; later phases reference users.
+PHASES = ("users", "products", "tickets", "rankings")
+
+
+@contextmanager
+def historical_dates():
+    """
+    Let generated rows keep their own dates instead of ``auto_now(_add)``
+    overwriting them with the current time.
+    """
+    fields = [
+        field
+        for model in (CustomUser, Product, SupportTicket, UserRanking)
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+@lru_cache(maxsize=None)
+def zipf_weights(count, exponent):
+    """
+    Returns cumulative weights giving rank ``k`` a share proportional to
+    ``1 / (k + 1) ** exponent``: a few heavy items and a long tail.
+    """
+    return list(
+        itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(count))
+    )
+
+
+@lru_cache(maxsize=None)
+def location_table():
+    """
+    Returns the ``(country, state, city)`` triples with cumulative weights.
+    """
+    triples, weights = [], []
+    for country, country_weight, states in LOCATIONS:
+        state_weights = [1 / (rank + 1) for rank in range(len(states))]
+        state_total = sum(state_weights)
+        for (state, cities), state_weight in zip(states.items(), state_weights):
+            for city in cities:
+                triples.append((country, state, city))
+                weights.append(
+                    country_weight * state_weight / state_total / len(cities)
+                )
+    return triples, list(itertools.accumulate(weights))
+
+
+def timestamp(plan, index, count, rng):
+    """
+    Returns the creation time of row ``index`` out of ``count``, rows being
+    spread in order over the last ``plan["days"]`` days.
+    """
+    span = plan["days"] * 86400
+    offset = (index + rng.random()) * span / count
+    return plan["now"] - timedelta(days=plan["days"]) + timedelta(seconds=offset)
+
+
+def pick(rng, choices, weights):
+    return rng.choices(choices, weights)[0]
+
+
+def text(rng, low, high):
+    return " ".join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+def generate_users(rng, start, stop, plan):
+    triples, cum_weights = location_table()
+    locations = rng.choices(triples, cum_weights=cum_weights, k=stop - start)
+    users, companies, individuals = [], [], []
+    for i, (country, state, city) in zip(range(start, stop), locations):
+        pk = plan["first_user_id"] + i
+        is_company = i % plan["company_every"] == 0
+        users.append(
+            CustomUser(
+                id=pk,
+                email=f"user{pk}@synthetic.example.com",
+                password=plan["password"],
+                name=f"{'Company' if is_company else 'User'} {pk}",
+                user_type="company" if is_company else "individual",
+                phone_number=f"+234{rng.randrange(10**10):010d}",
+                address=f"{rng.randint(1, 400)} {rng.choice(WORDS).title()} Road",
+                country=country,
+                state=state,
+                city=city,
+                date_joined=timestamp(plan, i, plan["users"], rng).date(),
+                status=pick(
+                    rng, ("active", "approved", "pending", "declined"), (70, 15, 12, 3)
+                ),
+            )
+        )
+        if is_company:
+            companies.append(
+                CompanyProfile(user_id=pk, company_registration_number=f"RC{pk}")
+            )
+        else:
+            individuals.append(
+                IndividualProfile(user_id=pk, gender=rng.choice(("male", "female")))
+            )
+    alias, batch_size = plan["database"], plan["batch_size"]
+    CustomUser.objects.using(alias).bulk_create(users, batch_size=batch_size)
+    CompanyProfile.objects.using(alias).bulk_create(companies, batch_size=batch_size)
+    IndividualProfile.objects.using(alias).bulk_create(
+        individuals, batch_size=batch_size
+    )
+    return len(users) + len(companies) + len(individuals)
+
+
+def company_id(plan, rank):
+    return plan["first_user_id"] + rank * plan["company_every"]
+
+
+def generate_products(rng, start, stop, plan):
+    cum_weights = zipf_weights(plan["companies"], plan["skew"])
+    ranks = rng.choices(
+        range(plan["companies"]), cum_weights=cum_weights, k=stop - start
+    )
+    products = []
+    for i, rank in zip(range(start, stop), ranks):
+        created = timestamp(plan, i, plan["products"], rng)
+        # Pareto: most products get little traffic, a few get most of it.
+        traffic = min(int(rng.paretovariate(1.2) * 10) - 10, 100_000_000)
+        products.append(
+            Product(
+                uuid=uuid7(int(created.timestamp() * 1000), rng.randbytes(10)),
+                product_name=f"{rng.choice(WORDS).title()} {i}",
+                company_id=company_id(plan, rank),
+                date_created=created,
+                date_updated=min(
+                    created + timedelta(hours=rng.randint(0, 720)), plan["now"]
+                ),
+                description=text(rng, 20, 150),
+                product_value=pick(rng, ("website", "whatsapp", "phone"), (60, 30, 10)),
+                product_link=f"https://example.com/p/{i}",
+                status=pick(rng, ("active", "pending", "declined"), (75, 20, 5)),
+                traffic=traffic,
+                shares=int(traffic * rng.uniform(0, 0.05)),
+            )
+        )
+    Product.objects.using(plan["database"]).bulk_create(
+        products, batch_size=plan["batch_size"]
+    )
+    return len(products)
+
+
+def generate_tickets(rng, start, stop, plan):
+    tickets = []
+    for i in range(start, stop):
+        created = timestamp(plan, i, plan["tickets"], rng)
+        status = pick(rng, ("resolved", "in-progress"), (80, 20))
+        tickets.append(
+            SupportTicket(
+                uuid=uuid7(int(created.timestamp() * 1000), rng.randbytes(10)),
+                submitted_by_id=plan["first_user_id"] + rng.randrange(plan["users"]),
+                date_created=created,
+                date_updated=(
+                    min(created + timedelta(hours=rng.randint(1, 96)), plan["now"])
+                    if status == "resolved"
+                    else created
+                ),
+                support=pick(rng, ("support", "suggestion"), (85, 15)),
+                title=text(rng, 3, 8),
+                description=text(rng, 10, 80),
+                status=status,
+                priority=pick(rng, ("low", "medium", "high"), (60, 30, 10)),
+            )
+        )
+    SupportTicket.objects.using(plan["database"]).bulk_create(
+        tickets, batch_size=plan["batch_size"]
+    )
+    return len(tickets)
+
+
+def generate_rankings(rng, start, stop, plan):
+    names = [choice for choice, _ in UserRanking.NAME_CHOICES]
+    rankings = []
+    for i in range(start, stop):
+        level = pick(rng, range(len(names)), (5, 15, 20, 55, 5))
+        rankings.append(
+            UserRanking(
+                user=f"user{plan['first_user_id'] + rng.randrange(plan['users'])}",
+                rank_level=level,
+                name=names[level],
+                total_recruits=int(rng.paretovariate(1.5) * 5),
+                bonus=int(rng.paretovariate(1.5) * 1000),
+                date=timestamp(plan, i, plan["rankings"], rng),
+            )
+        )
+    UserRanking.objects.using(plan["database"]).bulk_create(
+        rankings, batch_size=plan["batch_size"]
+    )
+    return len(rankings)
+
+
+GENERATORS = {
+    "users": generate_users,
+    "products": generate_products,
+    "tickets": generate_tickets,
+    "rankings": generate_rankings,
+}
+
+
+def generate_chunk(phase, start, stop, plan):
+    """
+    Generates rows ``start`` to ``stop`` of ``phase`` in one transaction.
+
+    Each chunk seeds its own random generator, so the data only depends on
+    the seed and the chunk size, not on the number of workers.
+    """
+    rng = random.Random(f"{plan['seed']}:{phase}:{start}")
+    connection = connections[plan["database"]]
+    with historical_dates(), transaction.atomic(using=plan["database"]):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                # Losing the last chunks on a crash is fine for generated
+                # data; not waiting for the WAL flush is much faster.
+                cursor.execute("SET LOCAL synchronous_commit TO OFF")
+        return phase, GENERATORS[phase](rng, start, stop, plan)
+
+
+class Command(BaseCommand):
+    """
+    Generate a large synthetic dataset for load and scaling tests.
+
+    Users (with their profiles), products, support tickets and rankings are
+    written with ``bulk_create`` in chunks, by a pool of worker processes.
+    Distributions mimic production: 60% of the users in Nigeria, mostly in
+    Lagos; a few companies owning most products (Zipf); Pareto-distributed
+    traffic and shares; creation dates spread over the last year, in
+    primary key order.
+
+    The output is deterministic for a given seed and chunk size. Rows are
+    added to the existing ones; user ids start after the largest existing
+    one. On SQLite, which allows a single writer, chunks run sequentially.
+    """
+
+    help = "Generate millions of realistic users, products and tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument("--products", type=int, default=5_000_000)
+        parser.add_argument("--tickets", type=int, default=2_000_000)
+        parser.add_argument("--rankings", type=int, default=1_000)
+        parser.add_argument(
+            "--company-every",
+            type=int,
+            default=10,
+            help="One user in this many is a company.",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of the number of products per company.",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--chunk-size", type=int, default=20_000)
+        parser.add_argument("--batch-size", type=int, default=2_000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        connection = connections[alias]
+        workers = options["workers"]
+        if connection.vendor == "sqlite" and workers > 1:
+            self.stdout.write("SQLite allows a single writer, using one worker.")
+            workers = 1
+        companies = -(-options["users"] // options["company_every"])
+        if options["products"] and not companies:
+            raise CommandError("Products need at least one company user.")
+        if (options["products"] or options["tickets"]) and not options["users"]:
+            raise CommandError("Products and tickets need users.")
+
+        last_id = CustomUser.objects.using(alias).aggregate(last=Max("id"))["last"]
+        plan = {
+            **{key: options[key] for key in ("seed", "days", "skew", "batch_size")},
+            **{phase: options[phase] for phase in PHASES},
+            "database": alias,
+            "company_every": options["company_every"],
+            "companies": companies,
+            "first_user_id": (last_id or 0) + 1,
+            # Midnight, so that the dates too are the same from run to run.
+            "now": datetime.now(timezone.utc).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ),
+            # Hashing is deliberately slow: done once, shared by every user.
+            "password": make_password("synthetic"),
+        }
+        chunks = {
+            phase: [
+                (start, min(start + options["chunk_size"], options[phase]))
+                for start in range(0, options[phase], options["chunk_size"])
+            ]
+            for phase in PHASES
+        }
+
+        started = time.perf_counter()
+        if workers > 1:
+            # Workers are forked, already set up; they must not share the
+            # parent's connections.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                # Users first, every other table references them.
+                self.run(executor, {"users": chunks["users"]}, plan)
+                self.run(executor, {p: chunks[p] for p in PHASES if p != "users"}, plan)
+        else:
+            for phase in PHASES:
+                self.run(None, {phase: chunks[phase]}, plan)
+        elapsed = time.perf_counter() - started
+
+        self.finish(connection)
+        call_command("rebuild_search_index", database=alias, stdout=self.stdout)
+        call_command("reconcile_company_summaries", database=alias, stdout=self.stdout)
+        call_command(
+            "rollup_user_analytics", full=True, database=alias, stdout=self.stdout
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done in {elapsed:.0f}s, first user id {plan['first_user_id']}."
+            )
+        )
+
+    def run(self, executor, chunks, plan):
+        """
+        Generates ``chunks`` (phase -> [(start, stop)]), reporting the rows
+        written per phase.
+        """
+        started = time.perf_counter()
+        written = dict.fromkeys(chunks, 0)
+        pending = {phase: len(ranges) for phase, ranges in chunks.items()}
+        if executor is None:
+            results = (
+                generate_chunk(phase, start, stop, plan)
+                for phase, ranges in chunks.items()
+                for start, stop in ranges
+            )
+        else:
+            results = (
+                future.result()
+                for future in as_completed(
+                    executor.submit(generate_chunk, phase, start, stop, plan)
+                    for phase, ranges in chunks.items()
+                    for start, stop in ranges
+                )
+            )
+        for phase, rows in results:
+            written[phase] += rows
+            pending[phase] -= 1
+            if not pending[phase]:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{phase}: {written[phase]} rows in {elapsed:.1f}s "
+                    f"({written[phase] / elapsed:.0f} rows/s)"
+                )
+
+    def finish(self, connection):
+        """
+        Moves the user id sequence past the explicit ids and refreshes the
+        planner statistics.
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), [CustomUser])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+            if connection.vendor == "postgresql":
+                for model in (
+                    CustomUser,
+                    CompanyProfile,
+                    IndividualProfile,
+                    Product,
+                    SupportTicket,
+                    UserRanking,
+                ):
+                    cursor.execute(
+                        f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}"
+                    )
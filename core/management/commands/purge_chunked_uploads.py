@@ -0,0 +1,30 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    """
+    Delete abandoned and already consumed chunked upload sessions.
+    """
+
+    help = "Delete expired and consumed chunked upload sessions."
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.CHUNKED_UPLOAD_EXPIRY
+        deleted = 0
+        for upload in ChunkedUpload.objects.all().iterator():
+            # A completed upload whose partial file is gone has been moved
+            # into place by the storage backend when it was attached.
+            consumed = upload.status == "consumed" or (
+                upload.status == "complete" and not os.path.exists(upload.part_path)
+            )
+            if consumed or upload.date_updated < cutoff:
+                upload.discard()
+                upload.delete()
+                deleted += 1
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} upload sessions."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core import idempotency
+
+
+class Command(BaseCommand):
+    """
+    Delete the stored responses of idempotent requests older than
+    ``IDEMPOTENCY["TTL"]``.
+    """
+
+    help = "Delete expired idempotency records."
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} idempotency records."))
@@ -0,0 +1,66 @@
+import logging
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils.module_loading import autodiscover_modules
+
+from core import outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Relay the outbox events to the ``OUTBOX["SINKS"]``.
+
+    Batches are sent back to back while events are pending, then the outbox
+    is polled every ``OUTBOX["POLL_INTERVAL"]`` seconds. After a sink
+    failure the relay waits twice as long each time, up to a minute, before
+    sending the batch again. SIGTERM stops it between batches.
+    """
+
+    help = "Send outbox events to the configured sinks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no event is pending instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        # TaskSink looks task functions up in the registry.
+        autodiscover_modules("tasks")
+        config = settings.OUTBOX
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stop.set())
+
+        relayed = failures = 0
+        last_purge = 0
+        while not stop.is_set():
+            close_old_connections()
+            if time.monotonic() - last_purge > 3600:
+                outbox.purge()
+                last_purge = time.monotonic()
+            try:
+                sent = outbox.relay(options["batch_size"])
+            except Exception as error:
+                if options["once"]:
+                    raise CommandError(f"Relaying outbox events failed: {error!r}")
+                failures += 1
+                logger.exception("Relaying outbox events failed.")
+                stop.wait(min(config["POLL_INTERVAL"] * 2**failures, 60))
+                continue
+            failures = 0
+            relayed += sent
+            if not sent:
+                if options["once"]:
+                    break
+                stop.wait(config["POLL_INTERVAL"])
+        self.stdout.write(self.style.SUCCESS(f"Relayed {relayed} events."))
@@ -0,0 +1,133 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import (
+    DatabaseError,
+    close_old_connections,
+    connection,
+    connections,
+)
+from django.utils.module_loading import autodiscover_modules
+
+from core import tasks
+
+logger = logging.getLogger(__name__)
+
+
+def work(queues, stop, burst, name):
+    """
+    Runs tasks from ``queues`` until ``stop`` is set, or, in burst mode,
+    until none is due.
+    """
+    poll_interval = settings.TASK_QUEUE["POLL_INTERVAL"]
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                task = tasks.claim(name, queues)
+                if task is not None:
+                    tasks.execute(task)
+                    continue
+            except DatabaseError:
+                # A task whose outcome could not be saved is left running
+                # and picked up again by recover_stale().
+                logger.exception(f"Worker {name} hit a database error.")
+                connection.close()
+            if burst:
+                break
+            stop.wait(poll_interval)
+    finally:
+        connection.close()
+
+
+def run_process(queues, threads, burst):
+    """
+    Runs ``threads`` workers in the current process until SIGTERM or SIGINT,
+    letting the tasks in progress finish.
+    """
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stop.set())
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    workers = [
+        threading.Thread(target=work, args=(queues, stop, burst, f"{prefix}:{i}"))
+        for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    while not burst and not stop.wait(settings.TASK_QUEUE["LOCK_TIMEOUT"] / 2):
+        tasks.recover_stale()
+        connection.close()
+    for worker in workers:
+        worker.join()
+
+
+class Command(BaseCommand):
+    """
+    Run the tasks queued with ``core.tasks``.
+
+    Each process runs ``--threads`` workers: threads suit tasks waiting on
+    I/O (HTTP calls, storage), processes the CPU-bound ones. Workers poll
+    the queue every ``TASK_QUEUE["POLL_INTERVAL"]`` seconds when it is
+    empty. SIGTERM stops the workers once their current task is done.
+    """
+
+    help = "Run queued background tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Queue to take tasks from, may be repeated (default: all).",
+        )
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=1)
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no task is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_modules("tasks")
+        queues = options["queues"] or settings.TASK_QUEUE["QUEUES"]
+        processes, threads = options["processes"], options["threads"]
+        burst = options["burst"]
+        if connection.vendor == "sqlite" and processes > 1:
+            self.stdout.write("SQLite allows a single writer, using one process.")
+            processes = 1
+        self.stdout.write(
+            f"Running {processes} process(es) of {threads} thread(s) "
+            f"on {', '.join(queues)}."
+        )
+        tasks.recover_stale()
+        if processes == 1:
+            run_process(queues, threads, burst)
+            return
+
+        # Workers are forked, already set up; they must not share the
+        # parent's connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [
+            context.Process(target=run_process, args=(queues, threads, burst))
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+        # Children get the signals sent to the process group; when only the
+        # parent is signalled, pass it on.
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(
+                signum, lambda *args: [child.terminate() for child in children]
+            )
+        while any(child.is_alive() for child in children):
+            time.sleep(0.5)
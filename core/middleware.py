@@ -0,0 +1,124 @@
+import logging
+import math
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.permissions import SAFE_METHODS
+
+from . import compression, ratelimit
+from .routers import check_pin_cache, pin_to_primary, replica_aliases
+
+logger = logging.getLogger(__name__)
+
+
+class PrimaryPinningMiddleware:
+    """
+    Pin users to the primary database for a while after they write.
+
+    Any unsafe request by an authenticated user counts as a write, whether
+    it went through the API (DRF sets the JWT user on the Django request) or
+    the admin. Does nothing when no replica is configured, and refuses to
+    start when replicas are configured without a shared cache.
+    """
+
+    def __init__(self, get_response):
+        check_pin_cache()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_aliases():
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, whichever the client prefers.
+
+    Only bodies of the ``RESPONSE_COMPRESSION`` content types, the API
+    payloads, are compressed. HTML pages such as the admin's are not, as
+    they embed CSRF tokens next to reflected input (BREACH), and neither
+    are already compressed media. Bodies are only compressed above
+    ``MIN_SIZE`` bytes, below which the headers outweigh the savings.
+    Streaming responses are compressed chunk by chunk, flushing after each
+    one. Place it near the top of ``MIDDLEWARE`` so that it sees the final
+    body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header("Content-Encoding") or not compression.is_compressible(
+            response.get("Content-Type", "")
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if (
+            not response.streaming
+            and len(response.content) < settings.RESPONSE_COMPRESSION["MIN_SIZE"]
+        ):
+            return response
+        encoder = compression.get_encoder(request.headers.get("Accept-Encoding", ""))
+        if encoder is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(
+                    encoder, response.streaming_content
+                )
+            else:
+                response.streaming_content = compression.compress_stream(
+                    encoder, response.streaming_content
+                )
+            del response["Content-Length"]
+        else:
+            content = compression.compress(encoder, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response["Content-Length"] = str(len(content))
+
+        # The compressed body is a different representation, so a strong
+        # ETag no longer matches it byte for byte.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoder.encoding
+        return response
+
+
+class RateLimitMiddleware:
+    """
+    Reject requests over the ``RATE_LIMITS`` token buckets with a 429.
+
+    Runs before authentication and views, and checks in-process buckets
+    (see ``core.ratelimit``), so rejected requests cost no query and never
+    reach the ORM or external APIs. The response carries ``Retry-After``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        limited = ratelimit.check(request)
+        if limited is None:
+            return self.get_response(request)
+        rule, wait = limited
+        logger.info(f"Rate limit {rule.name} exceeded on {request.path}")
+        seconds = math.ceil(wait)
+        response = JsonResponse(
+            {
+                "detail": "Request was throttled. "
+                f"Expected available in {seconds} second{'' if seconds == 1 else 's'}."
+            },
+            status=429,
+        )
+        response["Retry-After"] = str(seconds)
+        return response
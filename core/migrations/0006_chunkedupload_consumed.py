@@ -0,0 +1,26 @@
+# Generated by Django 5.1.2 on 2026-10-19 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_outboxevent"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="chunkedupload",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("uploading", "Uploading"),
+                    ("complete", "Complete"),
+                    ("consumed", "Consumed"),
+                ],
+                default="uploading",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,285 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from . import cache, idempotency
+from .ratelimit import client_ip
+from .serializers import SparseFieldsMixin
+from .routers import (
+    choose_replica,
+    current_read_alias,
+    route_reads,
+    stop_routing_reads,
+)
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin serving safe requests from a read replica.
+
+    Users who wrote recently are kept on the primary (see
+    ``core.middleware.PrimaryPinningMiddleware``), and so is everyone while
+    all replicas lag or are down. Writes always go to the primary.
+    """
+
+    _replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # After authentication, so pinned users are recognized.
+        if request.method in SAFE_METHODS:
+            self._replica_token = route_reads(choose_replica(request.user))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_token is not None:
+            stop_routing_reads(self._replica_token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin caching list and retrieve responses per user.
+
+    Entries are keyed by the user, the query string and the version of the
+    rows the user can see, which ``core.cache.register_scope`` bumps whenever
+    one of them is saved or deleted. Repeated polls of unchanged data are
+    answered without querying or serializing anything. The serialized data
+    is cached rather than the rendered body, so content negotiation still
+    applies. Responses read from a replica, which may predate the write
+    that bumped the version, are only kept for ``REPLICA_MAX_LAG`` seconds.
+    """
+
+    def get_cache_owner(self):
+        """
+        Returns the id of the user whose rows the response is built from, or
+        None when it covers every row of the model (admins).
+        """
+        user = self.request.user
+        return None if user.user_type == "admin" else user.pk
+
+    def get_response_cache_key(self, request, **kwargs):
+        model = self.queryset.model
+        owner = self.get_cache_owner()
+        return cache.make_key(
+            type(self).__qualname__,
+            self.action,
+            request.user.pk,
+            request.get_host(),
+            sorted(request.query_params.lists()),
+            sorted(kwargs.items()),
+            cache.scope_version(model._meta.label, owner),
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request, **kwargs)
+        backend = cache.get_cache()
+        data = backend.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            timeout = settings.RESPONSE_CACHE["TIMEOUT"]
+            if current_read_alias() is not None:
+                timeout = min(timeout, settings.REPLICA_MAX_LAG)
+            backend.set(key, response.data, timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin answering list and retrieve requests with validators.
+
+    Placed before ``CachedResponseMixin``, the ETag of a list is its
+    response cache key, built from the version of the rows the user can
+    see, so a poll answered with a 304 costs no query at all. Without it,
+    the ETag comes from one aggregate query, the latest ``date_updated`` and
+    the number of rows matched. The ETag and Last-Modified of a single
+    object come from its ``date_updated`` alone. Lists get no
+    Last-Modified: deleting a row does not advance it. When the client
+    already has that version, a 304 is returned without loading or
+    serializing any row. The model must have an ``auto_now``
+    ``date_updated`` field.
+    """
+
+    last_modified_field = "date_updated"
+
+    def get_validators(self, request, **kwargs):
+        """
+        Returns the ``(etag, last_modified)`` of the requested resource, or
+        ``(None, None)`` when it does not exist or the lookup value is
+        malformed, leaving the handler to answer 404. ``last_modified`` is
+        None for lists.
+        """
+        if self.action == "list" and hasattr(self, "get_response_cache_key"):
+            tag = cache.make_key(
+                self.get_response_cache_key(request, **kwargs),
+                request.accepted_media_type,
+            )
+            return f'W/"{tag[:32]}"', None
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                last_modified = (
+                    queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                    .values_list(self.last_modified_field, flat=True)
+                    .first()
+                )
+            except (DjangoValidationError, ValueError, TypeError):
+                return None, None
+            if last_modified is None:
+                return None, None
+            version, count = last_modified, 1
+        else:
+            aggregate = queryset.aggregate(
+                last_modified=Max(self.last_modified_field), count=Count("pk")
+            )
+            version, count = aggregate["last_modified"], aggregate["count"]
+            last_modified = None
+        tag = cache.make_key(
+            request.user.pk,
+            request.get_full_path(),
+            request.accepted_media_type,
+            version and version.isoformat(),
+            count,
+        )
+        return f'W/"{tag[:32]}"', last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, **kwargs)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        timestamp = last_modified and int(last_modified.timestamp())
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        response = not_modified or handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class FieldProjectionMixin:
+    """
+    ViewSet mixin loading only the columns a sparse fieldset needs.
+
+    Pairs with ``core.serializers.SparseFieldsMixin``: on list and retrieve
+    requests with ``?fields=`` or ``?omit=``, the queryset is restricted with
+    ``only()`` to the model fields behind the remaining serializer fields,
+    so unrequested text columns are never read. Fields that are not backed
+    by a model field (methods, properties, ``source="*"``) disable the
+    projection.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        if self.request.method not in SAFE_METHODS or not (
+            SparseFieldsMixin.fields_param in params
+            or SparseFieldsMixin.omit_param in params
+        ):
+            return queryset
+        columns = self.get_projected_columns(queryset.model)
+        if columns is None:
+            return queryset
+        return queryset.only(*columns)
+
+    def get_projected_columns(self, model):
+        """
+        Returns the model fields to load for the requested fieldset, or None
+        when the queryset cannot be projected.
+        """
+        concrete = {field.name for field in model._meta.concrete_fields}
+        columns = {model._meta.pk.name}
+        for field in self.get_serializer().fields.values():
+            if field.write_only:
+                continue
+            if field.source == "*" or field.source_attrs[0] not in concrete:
+                return None
+            columns.add(field.source_attrs[0])
+        return columns
+
+
+class IdempotentCreateMixin:
+    """
+    View mixin making create requests safe to retry.
+
+    When the client sends an ``Idempotency-Key`` header, the first response
+    for that key is stored per user (per client address for anonymous
+    requests) for ``IDEMPOTENCY["TTL"]`` and replayed on retries, marked
+    with ``Idempotent-Replayed: true``. A duplicate arriving while the
+    first request is still running waits for its response instead of
+    creating the object twice. Failed requests (exceptions and 5xx) are not
+    stored, so they can be retried with the same key.
+
+    Response fields listed in ``idempotency_private_fields`` (tokens and
+    other credentials) are not stored; ``complete_replay()`` must produce
+    them again for the retry.
+    """
+
+    idempotency_private_fields = ()
+
+    def get_idempotency_owner(self, request):
+        if request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{client_ip(request)}"
+
+    def idempotent_response(self, handler, request, *args, **kwargs):
+        key = request.headers.get(idempotency.HEADER)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        if not key or len(key) > 255:
+            raise ValidationError(
+                {idempotency.HEADER: ["Must be between 1 and 255 characters."]}
+            )
+        owner = self.get_idempotency_owner(request)
+        digest = idempotency.fingerprint(request)
+        while True:
+            record, created = idempotency.claim(owner, key, digest)
+            if created:
+                break
+            if record.fingerprint != digest:
+                raise idempotency.KeyReused()
+            record = idempotency.wait(record)
+            if record is not None:
+                return self.complete_replay(request, idempotency.replay(record))
+        try:
+            response = handler(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            record.delete()
+        else:
+            idempotency.save(record, response, self.idempotency_private_fields)
+        return response
+
+    def complete_replay(self, request, response):
+        """
+        Returns the replayed ``response`` with its private fields filled in.
+        """
+        return response
+
+    def create(self, request, *args, **kwargs):
+        return self.idempotent_response(super().create, request, *args, **kwargs)
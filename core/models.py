@@ -0,0 +1,486 @@
+import hashlib
+import os
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.utils import timezone
+
+
+class ChunkedUpload(models.Model):
+    """
+    A resumable upload session.
+
+    The client declares the file up front, then sends it in any number of
+    chunks, each appended to a partial file under ``MEDIA_ROOT``. After a
+    dropped connection the client asks for the current ``offset`` and resumes
+    from there instead of starting over.
+    """
+
+    uuid = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="chunked_uploads",
+    )
+    field_name = models.CharField(max_length=50, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True)
+    STATUS_CHOICES = [
+        ("uploading", "Uploading"),
+        ("complete", "Complete"),
+        ("consumed", "Consumed"),
+    ]
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default="uploading"
+    )
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta class for the ChunkedUpload model.
+        """
+
+        verbose_name = "Chunked Upload"
+        verbose_name_plural = "Chunked Uploads"
+
+    def __str__(self):
+        """
+        Returns a string representation of the object.
+
+        :return: The declared file name of the upload.
+        :rtype: str
+        """
+        return self.filename
+
+    @property
+    def part_name(self):
+        """
+        Returns the storage name of the partial file.
+
+        :return: The name of the partial file, relative to ``MEDIA_ROOT``.
+        :rtype: str
+        """
+        return f"chunked_uploads/{self.uuid}.part"
+
+    @property
+    def part_path(self):
+        """
+        Returns the absolute path of the partial file.
+
+        :return: The path of the partial file on the local filesystem.
+        :rtype: str
+        """
+        return default_storage.path(self.part_name)
+
+    def append(self, stream, chunk_size=64 * 2**10):
+        """
+        Append the content of ``stream`` to the partial file.
+
+        The stream is copied chunk by chunk and never read past the declared
+        size, so a single request can never grow the file beyond it.
+
+        Args:
+            stream: A file-like object holding the next part of the file.
+            chunk_size (int): The number of bytes to copy at a time.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        os.makedirs(os.path.dirname(self.part_path), exist_ok=True)
+        written = 0
+        with open(self.part_path, "ab") as part:
+            # A previous attempt may have died after writing but before the
+            # offset was saved; drop whatever the client did not get acked.
+            part.truncate(self.offset)
+            part.seek(self.offset)
+            while self.offset + written < self.size:
+                chunk = stream.read(min(chunk_size, self.size - self.offset - written))
+                if not chunk:
+                    break
+                part.write(chunk)
+                written += len(chunk)
+        self.offset += written
+        return written
+
+    def compute_checksum(self, chunk_size=64 * 2**10):
+        """
+        Hash the partial file from disk.
+
+        :return: The SHA-256 hex digest of the uploaded content.
+        :rtype: str
+        """
+        hasher = hashlib.sha256()
+        with open(self.part_path, "rb") as part:
+            for chunk in iter(lambda: part.read(chunk_size), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def discard(self):
+        """
+        Remove the partial file from disk.
+        """
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+
+    def consume(self):
+        """
+        Mark the upload as attached to a model field, so it cannot be attached
+        again, and remove what is left of the partial file.
+        """
+        ChunkedUpload.objects.filter(pk=self.pk).update(status="consumed")
+        self.status = "consumed"
+        self.discard()
+
+    def as_file(self):
+        """
+        Returns the completed upload as a file ready to assign to a FileField.
+
+        :return: A file that storage backends can move into place.
+        :rtype: ChunkedUploadFile
+        """
+        return ChunkedUploadFile(self)
+
+
+class ChunkedUploadFile(File):
+    """
+    A completed chunked upload, exposed like an uploaded temporary file.
+
+    Having ``temporary_file_path()`` lets ``FileSystemStorage`` move the
+    partial file into place instead of copying it. The partial file is only
+    opened when its content is read, so validating an upload holds no file
+    handle. Storages call ``stored()`` once the content is in place.
+    """
+
+    def __init__(self, upload):
+        super().__init__(None, name=upload.filename)
+        self.upload = upload
+        self.size = upload.size
+        self.sha256 = upload.checksum
+
+    @property
+    def file(self):
+        if self._file is None:
+            self._file = open(self.upload.part_path, "rb")
+        return self._file
+
+    @file.setter
+    def file(self, value):
+        self._file = value
+
+    @property
+    def closed(self):
+        return self._file is None or self._file.closed
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def temporary_file_path(self):
+        return self.upload.part_path
+
+    def stored(self):
+        """
+        Consume the upload once its content has been stored.
+        """
+        self.close()
+        self.upload.consume()
+
+
+class Blob(models.Model):
+    """
+    A file kept by ``ContentAddressedStorage``, with the number of model
+    fields currently pointing at it.
+    """
+
+    name = models.CharField(max_length=255, primary_key=True)
+    ref_count = models.IntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta class for the Blob model.
+        """
+
+        verbose_name = "Blob"
+        verbose_name_plural = "Blobs"
+
+    def __str__(self):
+        """
+        Returns a string representation of the object.
+
+        :return: The storage name of the blob.
+        :rtype: str
+        """
+        return self.name
+
+
+class IdempotencyRecord(models.Model):
+    """
+    The outcome of a request sent with an ``Idempotency-Key`` header.
+
+    The row is inserted before the request is handled, so the unique
+    constraint makes concurrent duplicates find it and wait, and is filled
+    with the response once it is produced, to be replayed on retries (see
+    ``core.idempotency``).
+    """
+
+    owner = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    # The response data as JSON text, since jsonb would reorder its keys.
+    response = models.TextField(blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        """
+        Meta class for the IdempotencyRecord model.
+        """
+
+        verbose_name = "Idempotency Record"
+        verbose_name_plural = "Idempotency Records"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "key"], name="unique_idempotency_key"
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the object.
+
+        :return: The owner and the key of the record.
+        :rtype: str
+        """
+        return f"{self.owner} {self.key}"
+
+    @property
+    def in_progress(self):
+        """
+        Whether the request that created the record is still being handled.
+        """
+        return self.status_code is None
+
+
+class Task(models.Model):
+    """
+    A call to a function registered with ``core.tasks.task``, waiting to be
+    run by ``run_task_worker``.
+
+    Workers claim the highest priority task whose ``run_at`` has passed.
+    Failed attempts are retried with an exponential backoff until
+    ``max_attempts`` is reached, after which the task is kept as failed.
+    Tasks that succeed are deleted.
+    """
+
+    name = models.CharField(max_length=200)
+    # UUIDs, dates and decimals are passed to the function as strings.
+    args = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    queue = models.CharField(max_length=50, default="default")
+    priority = models.SmallIntegerField(default=0)
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("failed", "Failed"),
+    ]
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta class for the Task model.
+        """
+
+        verbose_name = "Task"
+        verbose_name_plural = "Tasks"
+        indexes = [
+            # Backs the claim query of the workers, restricted to the tasks
+            # they can pick up; failed ones can pile up without slowing it.
+            models.Index(
+                "queue",
+                models.F("priority").desc(),
+                "run_at",
+                name="task_claim_idx",
+                condition=models.Q(status="queued"),
+            ),
+            # Tasks left running by a worker that died.
+            models.Index(
+                fields=["locked_at"],
+                name="task_running_idx",
+                condition=models.Q(status="running"),
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the object.
+
+        :return: The name of the task function.
+        :rtype: str
+        """
+        return self.name
+
+
+class OutboxEvent(models.Model):
+    """
+    A change to a model, written in the transaction that made it and
+    relayed to the ``OUTBOX["SINKS"]`` by ``relay_outbox``.
+    """
+
+    event_type = models.CharField(max_length=100)
+    model = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    # The user whose data changed, for consumers that route per user.
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    date_created = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        """
+        Meta class for the OutboxEvent model.
+        """
+
+        verbose_name = "Outbox Event"
+        verbose_name_plural = "Outbox Events"
+        indexes = [
+            # Backs the relay, which reads the unpublished events in order;
+            # published ones pile up until they are purged.
+            models.Index(
+                fields=["id"],
+                name="outboxevent_pending_idx",
+                condition=models.Q(published_at__isnull=True),
+            ),
+            models.Index(fields=["published_at"], name="outboxevent_published_idx"),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the object.
+
+        :return: The type of the event and the id of the changed object.
+        :rtype: str
+        """
+        return f"{self.event_type} {self.object_id}"
+
+    def as_dict(self):
+        """
+        Returns the event as sent to the sinks.
+        """
+        return {
+            "id": self.pk,
+            "type": self.event_type,
+            "model": self.model,
+            "object_id": self.object_id,
+            "owner_id": self.owner_id,
+            "payload": self.payload,
+            "date_created": self.date_created.isoformat(),
+        }
+
+
+class OutboxMixin(models.Model):
+    """
+    Model mixin writing an ``OutboxEvent`` when a row is created, deleted or
+    one of its ``outbox_fields`` changes.
+
+    ``save()`` and ``delete()`` run in a transaction with the event, so
+    events are published if and only if the change is committed. Changes
+    made with ``QuerySet.update()`` or ``QuerySet.delete()``, and cascaded
+    deletions, bypass the mixin and must call ``record_change()``
+    themselves.
+    """
+
+    # Fields whose changes are published, as "<model>.<field>_changed".
+    outbox_fields = ()
+    # Attribute holding the id of the user the row belongs to.
+    outbox_owner_field = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._outbox_loaded = {
+            name: getattr(instance, name)
+            for name in cls.outbox_fields
+            if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        loaded = getattr(self, "_outbox_loaded", {})
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            if adding:
+                self.record_change(
+                    "created",
+                    {name: getattr(self, name) for name in self.outbox_fields},
+                    using=using,
+                )
+            for name in self.outbox_fields:
+                # Fields deferred when the row was loaded have no known
+                # previous value.
+                if adding or name not in loaded:
+                    continue
+                if update_fields is not None and name not in update_fields:
+                    continue
+                old, new = loaded[name], getattr(self, name)
+                if old != new:
+                    self.record_change(
+                        f"{name}_changed",
+                        {"field": name, "old": old, "new": new},
+                        using=using,
+                    )
+        self._outbox_loaded = {
+            **loaded,
+            **{
+                name: getattr(self, name)
+                for name in self.outbox_fields
+                if name in self.__dict__
+                and (update_fields is None or name in update_fields)
+            },
+        }
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            self.record_change("deleted", {}, using=using)
+            return super().delete(*args, **kwargs)
+
+    def record_change(self, action, payload, using=None):
+        """
+        Writes the event ``<model>.<action>`` for this row.
+        """
+        owner_id = self.outbox_owner_field and getattr(self, self.outbox_owner_field)
+        return OutboxEvent.objects.using(using).create(
+            event_type=f"{self._meta.model_name}.{action}",
+            model=self._meta.label,
+            object_id=str(self.pk),
+            owner_id=owner_id,
+            payload=payload,
+        )
@@ -0,0 +1,113 @@
+from django.db import router, transaction
+from django.utils import timezone
+
+from .cache import invalidate_objects
+from .models import OutboxEvent
+
+# Most rows changed by one bulk request.
+MAX_ITEMS = 1000
+
+
+def bulk_set_status(queryset, status, ids=None, from_status=None, actor=None):
+    """
+    Sets the ``status`` of many rows of an ``OutboxMixin`` model with a
+    single ``UPDATE``.
+
+    The rows are those of ``queryset`` listed in ``ids`` or, without
+    ``ids``, the first ``MAX_ITEMS`` of ``queryset`` not already in
+    ``status``. ``queryset`` must already be restricted to the rows the
+    user may change. With ``from_status`` only the rows in that status are
+    changed, so a transition is applied once even by concurrent requests.
+
+    The rows are locked with ``SELECT ... FOR UPDATE`` while their previous
+    status is read, then updated, and a ``<model>.status_changed`` outbox
+    event is written for each, in the same transaction, with
+    ``bulk_create()``; ``actor`` is recorded in the event payload. Cached
+    responses of the owners of the changed rows are invalidated.
+
+    Returns:
+        dict: ``results``, the outcome of each row (``updated``,
+            ``unchanged``, ``skipped`` or, for ids matching no row the
+            user may change, ``not_found``); ``changed``, the id, owner id
+            and previous status of the changed rows; ``more``, whether
+            more rows match the filter.
+    """
+    model = queryset.model
+    owner_field = model.outbox_owner_field
+    using = router.db_for_write(model)
+    rows = queryset.using(using).select_for_update().order_by("pk")
+    if ids is not None:
+        rows = rows.filter(pk__in=ids)
+    else:
+        rows = rows.exclude(status=status)
+        if from_status is not None:
+            rows = rows.filter(status=from_status)
+    # Only the fields the outbox and the response cache need.
+    rows = rows.only("status", owner_field)
+    with transaction.atomic(using=using):
+        found = list(rows[: MAX_ITEMS + 1])
+        more = ids is None and len(found) > MAX_ITEMS
+        found = found[:MAX_ITEMS]
+        outcomes = {}
+        changed = []
+        for instance in found:
+            if instance.status == status:
+                outcomes[instance.pk] = "unchanged"
+            elif from_status is not None and instance.status != from_status:
+                outcomes[instance.pk] = "skipped"
+            else:
+                outcomes[instance.pk] = "updated"
+                changed.append(instance)
+        if changed:
+            changes = {"status": status}
+            for field in model._meta.concrete_fields:
+                if getattr(field, "auto_now", False):
+                    changes[field.name] = timezone.now()
+            model._default_manager.using(using).filter(
+                pk__in=[instance.pk for instance in changed]
+            ).update(**changes)
+            OutboxEvent.objects.using(using).bulk_create(
+                [
+                    OutboxEvent(
+                        event_type=f"{model._meta.model_name}.status_changed",
+                        model=model._meta.label,
+                        object_id=str(instance.pk),
+                        owner_id=getattr(instance, owner_field),
+                        payload={
+                            "field": "status",
+                            "old": instance.status,
+                            "new": status,
+                            "by": actor,
+                        },
+                    )
+                    for instance in changed
+                ],
+                batch_size=500,
+            )
+            invalidate_objects(changed, using)
+
+    statuses = {instance.pk: instance.status for instance in found}
+    if ids is None:
+        ids = list(outcomes)
+    results = []
+    for pk in ids:
+        outcome = outcomes.get(pk, "not_found")
+        results.append(
+            {
+                "id": pk,
+                "result": outcome,
+                "status": status if outcome == "updated" else statuses.get(pk),
+            }
+        )
+    return {
+        "results": results,
+        "changed": [
+            {
+                "id": instance.pk,
+                "owner_id": getattr(instance, owner_field),
+                "old": instance.status,
+            }
+            for instance in changed
+        ],
+        "more": more,
+    }
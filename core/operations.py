@@ -0,0 +1,100 @@
+from django.contrib.postgres import operations
+from django.db.migrations.operations.base import Operation
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """
+    Create an index without locking writes out of the table.
+
+    Uses ``CREATE INDEX CONCURRENTLY`` on PostgreSQL, which needs the
+    migration to set ``atomic = False``. Other databases (SQLite in dev and
+    tests) get a plain ``CREATE INDEX``.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+            return
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index)
+
+
+class AddTrigramIndex(Operation):
+    """
+    Create a trigram GIN index on ``UPPER(field)``, concurrently.
+
+    It serves the ``UPPER(column::text) LIKE UPPER(...)`` queries Django
+    emits for ``icontains``/``istartswith`` on PostgreSQL, which is what the
+    admin search box runs. PostgreSQL only: the index is not part of the
+    model state, so SQLite table rebuilds never try to recreate it. The
+    migration must set ``atomic = False``.
+    """
+
+    reversible = True
+    reduces_to_sql = True
+
+    def __init__(self, model_name, field_name, name):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.name = name
+
+    def deconstruct(self):
+        kwargs = {
+            "model_name": self.model_name,
+            "field_name": self.field_name,
+            "name": self.name,
+        }
+        return self.__class__.__qualname__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor != "postgresql":
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(connection.alias, model):
+            return
+        if connection.in_atomic_block:
+            raise ValueError(
+                "AddTrigramIndex cannot run inside a transaction, "
+                "set atomic = False on the migration."
+            )
+        qn = schema_editor.quote_name
+        column = model._meta.get_field(self.field_name).column
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(self.name)} "
+            f"ON {qn(model._meta.db_table)} "
+            f"USING gin (UPPER({qn(column)}::text) gin_trgm_ops)"
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor != "postgresql":
+            return
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(connection.alias, model):
+            schema_editor.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(self.name)}"
+            )
+
+    def describe(self):
+        return (
+            f"Create trigram index {self.name} on "
+            f"{self.model_name}.{self.field_name}"
+        )
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_{self.name.lower()}"
@@ -0,0 +1,155 @@
+import hashlib
+import hmac
+import json
+import logging
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+class LogSink:
+    """
+    Writes each event to a logger, one JSON document per line.
+    """
+
+    def __init__(self, logger="core.outbox.events", level="INFO"):
+        self.logger = logging.getLogger(logger)
+        self.level = logging.getLevelName(level)
+
+    def send(self, events):
+        for event in events:
+            self.logger.log(self.level, json.dumps(event, cls=DjangoJSONEncoder))
+
+
+class WebhookSink:
+    """
+    POSTs each batch as ``{"events": [...]}`` to ``url``.
+
+    With a ``secret``, the body is signed with HMAC-SHA256 in the
+    ``X-Outbox-Signature`` header. Any response other than 2xx fails the
+    batch, which is then sent again: receivers must ignore event ids they
+    have already processed.
+    """
+
+    def __init__(self, url, secret=None, timeout=10):
+        self.url = url
+        self.secret = secret
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, events):
+        body = json.dumps({"events": events}, cls=DjangoJSONEncoder).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            digest = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-Outbox-Signature"] = f"sha256={digest}"
+        response = self.session.post(
+            self.url, data=body, headers=headers, timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class TaskSink:
+    """
+    Queues each batch for the ``task`` registered with ``core.tasks.task``,
+    which is called with the list of events by ``run_task_worker``.
+
+    The task is queued in the relay's transaction, so it is handed each
+    batch exactly once.
+    """
+
+    def __init__(self, task):
+        self.task = task
+
+    def send(self, events):
+        from .tasks import REGISTRY
+
+        REGISTRY[self.task].enqueue(events)
+
+
+@lru_cache(maxsize=None)
+def get_sinks():
+    """
+    Returns the sinks configured by ``OUTBOX["SINKS"]``.
+    """
+    return [
+        import_string(sink["BACKEND"])(**sink.get("OPTIONS", {}))
+        for sink in settings.OUTBOX["SINKS"]
+    ]
+
+
+@receiver(setting_changed)
+def _reset(setting, **kwargs):
+    if setting == "OUTBOX":
+        get_sinks.cache_clear()
+
+
+def relay(batch_size=None):
+    """
+    Sends the oldest unpublished events to every sink, then marks them as
+    published.
+
+    The batch is locked with ``SELECT ... FOR UPDATE SKIP LOCKED`` while it
+    is sent, so concurrent relays never send the same events. Events are
+    delivered at least once: when a sink fails, the whole batch is kept,
+    with the error, and sent again to every sink on the next call.
+
+    Returns:
+        int: The number of events published.
+
+    Raises:
+        Exception: The error of the sink that failed.
+    """
+    batch_size = batch_size or settings.OUTBOX["BATCH_SIZE"]
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.filter(published_at__isnull=True)
+            .order_by("pk")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not events:
+            return 0
+        pks = [event.pk for event in events]
+        payload = [event.as_dict() for event in events]
+        try:
+            # In a savepoint, so the tasks queued by a TaskSink are dropped
+            # with a failed batch rather than sent again on the next call.
+            with transaction.atomic():
+                for sink in get_sinks():
+                    sink.send(payload)
+        except Exception as error:
+            # Recorded in the transaction, which still commits.
+            OutboxEvent.objects.filter(pk__in=pks).update(
+                attempts=F("attempts") + 1, last_error=repr(error)
+            )
+            failure = error
+        else:
+            failure = None
+            OutboxEvent.objects.filter(pk__in=pks).update(published_at=timezone.now())
+    if failure is not None:
+        raise failure
+    return len(events)
+
+
+def purge():
+    """
+    Deletes the events published more than ``OUTBOX["RETENTION"]`` ago.
+
+    Returns:
+        int: The number of events deleted.
+    """
+    cutoff = timezone.now() - settings.OUTBOX["RETENTION"]
+    deleted, _ = OutboxEvent.objects.filter(published_at__lt=cutoff).delete()
+    return deleted
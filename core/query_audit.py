@@ -0,0 +1,243 @@
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Statements worth explaining. Everything else (DDL, transactions, savepoints,
+# PRAGMAs, INSERTs) has no access path to audit.
+AUDITED_STATEMENT_RE = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+# Django always quotes and qualifies columns as "table"."column".
+COLUMN = r'"(?P<table>\w+)"\."(?P<column>\w+)"'
+EQUALITY_RE = re.compile(COLUMN + r"\s*(=|IN\s*\()", re.IGNORECASE)
+RANGE_RE = re.compile(COLUMN + r"\s*(<=|>=|<|>|BETWEEN\b)", re.IGNORECASE)
+IS_NULL_RE = re.compile(COLUMN + r"\s+IS\s+NULL", re.IGNORECASE)
+ORDER_BY_RE = re.compile(r"\bORDER BY\s+(?P<clause>.+?)(?:\s+LIMIT\b|\s+OFFSET\b|$)")
+ORDER_TERM_RE = re.compile(COLUMN + r"(?P<descending>\s+DESC)?", re.IGNORECASE)
+
+SQLITE_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(?P<table>\w+)(?P<rest>.*)$")
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper appending every audited statement to a log.
+
+    Each line of the log is a JSON object with the ``alias``, ``sql`` and
+    ``params`` of one statement, which ``load_log`` reads back. Install it
+    for a whole process with the ``QUERY_CAPTURE_LOG`` setting.
+    """
+
+    def __init__(self, path, alias="default"):
+        self.path = path
+        self.alias = alias
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and AUDITED_STATEMENT_RE.match(sql):
+            line = json.dumps(
+                {"alias": self.alias, "sql": sql, "params": params or []},
+                cls=DjangoJSONEncoder,
+            )
+            with self.lock, open(self.path, "a") as log:
+                log.write(line + "\n")
+        return execute(sql, params, many, context)
+
+
+def install_recorder(path, connection):
+    """
+    Record the statements run on ``connection`` into the log at ``path``.
+    """
+    if not any(isinstance(w, QueryRecorder) for w in connection.execute_wrappers):
+        connection.execute_wrappers.append(QueryRecorder(path, connection.alias))
+
+
+def load_log(path):
+    """
+    Read the statements captured by ``QueryRecorder``.
+
+    Returns:
+        list[tuple[str, str, list]]: ``(alias, sql, params)`` per statement.
+    """
+    statements = []
+    with open(path) as log:
+        for line in log:
+            if line.strip():
+                entry = json.loads(line)
+                statements.append(
+                    (entry.get("alias", "default"), entry["sql"], entry["params"])
+                )
+    return statements
+
+
+@dataclass
+class Finding:
+    """
+    A statement whose plan reads a table without an index.
+    """
+
+    sql: str
+    params: list
+    table: str
+    detail: str
+    calls: int = 1
+    columns: dict = field(default_factory=dict)
+
+
+def explain(connection, sql, params):
+    """
+    Returns the tables ``sql`` reads with a full scan, and how.
+
+    Returns:
+        list[tuple[str, str]]: ``(table, plan detail)`` per sequential scan.
+    """
+    scans = []
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # With sequential scans priced out, the planner only keeps one
+            # where no index can serve the query, whatever the table size.
+            cursor.execute("SET enable_seqscan = off")
+            try:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute("RESET enable_seqscan")
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = [plan[0]["Plan"]]
+            while nodes:
+                node = nodes.pop()
+                if node["Node Type"] == "Seq Scan":
+                    detail = f"Seq Scan (~{node['Plan Rows']} rows)"
+                    if "Filter" in node:
+                        detail += f" filter {node['Filter']}"
+                    scans.append((node["Relation Name"], detail))
+                nodes.extend(node.get("Plans", []))
+        elif connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            for row in cursor.fetchall():
+                match = SQLITE_SCAN_RE.match(row[-1])
+                # "SCAN t USING INDEX i" walks an index, only bare scans count.
+                if (
+                    match
+                    and "INDEX" not in match["rest"]
+                    and model_for_table(match["table"])
+                ):
+                    scans.append((match["table"], row[-1]))
+    return scans
+
+
+def referenced_columns(sql, table):
+    """
+    Returns the columns of ``table`` used to filter and sort in ``sql``.
+
+    Returns:
+        dict: ``equality``, ``range`` and ``is_null`` column lists, and
+        ``order`` as ``(column, descending)`` pairs.
+    """
+    columns = {"equality": [], "range": [], "is_null": [], "order": []}
+    where = sql.split(" WHERE ", 1)[1] if " WHERE " in sql else ""
+    where = ORDER_BY_RE.split(where)[0]
+    for key, regex in (
+        ("equality", EQUALITY_RE),
+        ("range", RANGE_RE),
+        ("is_null", IS_NULL_RE),
+    ):
+        for match in regex.finditer(where):
+            if match["table"] == table and match["column"] not in columns[key]:
+                columns[key].append(match["column"])
+    order_by = ORDER_BY_RE.search(sql)
+    if order_by:
+        for match in ORDER_TERM_RE.finditer(order_by["clause"]):
+            if match["table"] != table:
+                break
+            columns["order"].append((match["column"], bool(match["descending"])))
+    return columns
+
+
+def model_for_table(table):
+    """
+    Returns the installed model stored in ``table``, if any.
+    """
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def propose_index(table, columns):
+    """
+    Suggest an index for the filters and sort of a scanned table.
+
+    Equality columns come first, then at most one range column, then the sort
+    columns, so one B-tree range scan answers the query in order. Columns
+    tested with ``IS NULL`` turn the index into a partial one.
+
+    Returns:
+        str | None: The ``models.Index(...)`` to add to the model's
+        ``Meta.indexes``, or None if nothing indexable was found.
+    """
+    model = model_for_table(table)
+    if model is None:
+        return None
+    by_column = {f.column: f.name for f in model._meta.concrete_fields}
+    fields = []
+    for column in columns["equality"] + columns["range"][:1]:
+        if column in by_column and by_column[column] not in fields:
+            fields.append(by_column[column])
+    for column, descending in columns["order"]:
+        name = by_column.get(column)
+        if name and name not in fields:
+            fields.append(f"-{name}" if descending else name)
+    if not fields:
+        return None
+    suffix = "_".join(name.lstrip("-") for name in fields)
+    index_name = f"{model._meta.model_name}_{suffix}"[:26] + "_idx"
+    arguments = [f"fields={fields!r}", f'name="{index_name}"']
+    nullable = [by_column[c] for c in columns["is_null"] if c in by_column]
+    if nullable:
+        condition = ", ".join(f"{name}__isnull=True" for name in nullable)
+        arguments.append(f"condition=models.Q({condition})")
+    return f"{model._meta.label}: models.Index({', '.join(arguments)})"
+
+
+def normalize(sql):
+    """
+    Returns ``sql`` with its ``IN`` lists collapsed, to group repeated shapes.
+    """
+    return re.sub(r"IN \((%s,? ?)+\)", "IN (...)", sql)
+
+
+def audit(statements, connections):
+    """
+    Explain every distinct statement and collect the sequential scans.
+
+    Args:
+        statements (Iterable[tuple[str, str, list]]): ``(alias, sql, params)``.
+        connections (ConnectionHandler): The connections to explain on.
+
+    Returns:
+        list[Finding]: One finding per scanned table and statement shape,
+        most frequent first.
+    """
+    findings = {}
+    for alias, sql, params in statements:
+        key = (alias, normalize(sql))
+        if key in findings:
+            for finding in findings[key]:
+                finding.calls += 1
+            continue
+        try:
+            scans = explain(connections[alias], sql, params)
+        except Exception as error:  # Replayed params may not fit anymore.
+            scans = [("?", f"EXPLAIN failed: {error}")]
+        findings[key] = [
+            Finding(sql, params, table, detail, columns=referenced_columns(sql, table))
+            for table, detail in scans
+        ]
+    return sorted(
+        (finding for group in findings.values() for finding in group),
+        key=lambda finding: -finding.calls,
+    )
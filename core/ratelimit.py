@@ -0,0 +1,230 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class Rule:
+    """
+    A token bucket applied to the requests matching ``path`` and
+    ``methods``, per ``scope``:
+
+    - ``"user"``: per authenticated user, per IP address for anonymous ones.
+    - ``"ip"``: per client IP address.
+    - ``"global"``: one bucket shared by every client, to cap an endpoint.
+
+    ``rate`` is a DRF-style rate (``"10/min"``, ``"5/s"``...), the refill
+    speed; ``burst`` is the bucket size, defaulting to the rate's count.
+    """
+
+    def __init__(self, name, path, rate, scope="user", methods=None, burst=None):
+        if scope not in ("user", "ip", "global"):
+            raise ValueError(f"Unknown rate limit scope {scope!r}.")
+        count, _, period = rate.partition("/")
+        self.name = name
+        self.path = re.compile(path)
+        self.scope = scope
+        self.methods = {method.upper() for method in methods} if methods else None
+        self.rate = int(count) / PERIODS[period[0]]
+        self.capacity = burst or int(count)
+
+    def matches(self, request):
+        return (
+            self.methods is None or request.method in self.methods
+        ) and self.path.search(request.path_info)
+
+
+class LocalBucketStore:
+    """
+    Token buckets kept in process memory.
+
+    Checking a request costs a dictionary lookup, so floods are shed
+    without touching the database or the network. Each worker process
+    enforces the limits on its own: with N workers, a client can get up to
+    N times the configured rate. The least recently used buckets are
+    evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, rule, now=None):
+        """
+        Takes a token from the bucket ``key`` of ``rule``.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the number of
+                seconds until a token is available.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            bucket = self.get_bucket(key, rule, now)
+            self.refill(bucket, rule, now)
+            if bucket["tokens"] >= 1:
+                bucket["tokens"] -= 1
+                bucket["used"] += 1
+                return 0
+            return (1 - bucket["tokens"]) / rule.rate
+
+    def get_bucket(self, key, rule, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = {
+                "tokens": rule.capacity,
+                "updated": now,
+                "used": 0,
+            }
+            if len(self.buckets) > self.max_entries:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def refill(self, bucket, rule, now):
+        elapsed = now - bucket["updated"]
+        bucket["tokens"] = min(rule.capacity, bucket["tokens"] + elapsed * rule.rate)
+        bucket["updated"] = now
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class SharedBucketStore(LocalBucketStore):
+    """
+    Local token buckets synchronized through one of the ``CACHES``, so that
+    limits hold across worker processes and hosts.
+
+    Requests are still checked against the local bucket. Every
+    ``sync_interval`` seconds, a bucket adds the tokens it used to a shared
+    counter (one ``incr`` on the cache) and deducts those the other
+    processes used in the meantime. Limits can be exceeded by what the
+    other processes admit during one interval.
+    """
+
+    def __init__(self, alias="default", sync_interval=1.0, max_entries=100_000):
+        super().__init__(max_entries)
+        self.cache = caches[alias]
+        self.sync_interval = sync_interval
+
+    def get_bucket(self, key, rule, now):
+        bucket = super().get_bucket(key, rule, now)
+        if "synced" not in bucket:
+            bucket.update(synced=now, seen=None)
+            self.sync(key, bucket, rule)
+        elif now - bucket["synced"] >= self.sync_interval:
+            bucket["synced"] = now
+            self.sync(key, bucket, rule)
+        return bucket
+
+    def sync(self, key, bucket, rule):
+        shared_key = f"ratelimit:{key}"
+        used, bucket["used"] = bucket["used"], 0
+        try:
+            total = self.cache.incr(shared_key, used)
+        except ValueError:
+            # Counters expire some time after any bucket would be full again.
+            timeout = math.ceil(rule.capacity / rule.rate) + 60
+            self.cache.add(shared_key, used, timeout)
+            total = used
+            bucket["seen"] = None
+        if bucket["seen"] is not None:
+            bucket["tokens"] = max(
+                0, bucket["tokens"] - (total - bucket["seen"] - used)
+            )
+        bucket["seen"] = total
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    """
+    Returns the bucket store configured by ``RATE_LIMITS["STORE"]``.
+    """
+    config = settings.RATE_LIMITS["STORE"]
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+@lru_cache(maxsize=None)
+def get_rules():
+    return [Rule(**rule) for rule in settings.RATE_LIMITS["RULES"]]
+
+
+@receiver(setting_changed)
+def _reset(setting, **kwargs):
+    if setting == "RATE_LIMITS":
+        get_store.cache_clear()
+        get_rules.cache_clear()
+
+
+def client_ip(request):
+    """
+    Returns the client address, read from ``X-Forwarded-For`` when
+    ``RATE_LIMITS["NUM_PROXIES"]`` proxies are in front of the app.
+    """
+    num_proxies = settings.RATE_LIMITS.get("NUM_PROXIES")
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if num_proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(",")]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def user_id(request):
+    """
+    Returns the user id of the request's access token, or None.
+
+    Only the token is checked (signature and expiry), the user is not
+    loaded, so this costs no query.
+    """
+    header = request.META.get(jwt_settings.AUTH_HEADER_NAME, "")
+    parts = header.split()
+    if len(parts) != 2 or parts[0] not in jwt_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        token = AccessToken(parts[1])
+    except TokenError:
+        return None
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+def check(request):
+    """
+    Takes a token from every bucket ``request`` falls in.
+
+    Returns:
+        tuple[Rule, float] | None: The first rule whose bucket is empty and
+            the seconds until it refills, or None if the request is allowed.
+    """
+    store = get_store()
+    uid = None
+    for rule in get_rules():
+        if not rule.matches(request):
+            continue
+        if rule.scope == "user" and uid is None:
+            # Empty string when anonymous, so the token is decoded once.
+            uid = user_id(request) or ""
+        if rule.scope == "global":
+            key = rule.name
+        elif rule.scope == "user" and uid:
+            key = f"{rule.name}:user:{uid}"
+        else:
+            key = f"{rule.name}:ip:{client_ip(request)}"
+        wait = store.consume(key, rule)
+        if wait:
+            return rule, wait
+    return None
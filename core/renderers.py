@@ -0,0 +1,59 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Types orjson does not serialize are handed to DRF's encoder: Decimal, lazy
+# translations, querysets, timedeltas...
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using orjson, several times faster than ``json.dumps``.
+
+    Output matches DRF's ``JSONRenderer``: UUIDs as canonical strings,
+    datetimes, dates and times formatted by DRF's encoder (``Z`` suffix,
+    millisecond precision), Decimals per ``COERCE_DECIMAL_TO_STRING``. Falls
+    back to ``JSONRenderer`` when orjson is not installed.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            # orjson only indents by two spaces.
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer for the MessagePack binary format, for the mobile client.
+
+    Values msgpack has no type for are converted like in JSON responses.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if msgpack is None:
+            raise ImproperlyConfigured("MessagePackRenderer requires msgpack.")
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, use_bin_type=True)
@@ -0,0 +1,192 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# The replica the current request reads from, None for the primary.
+_read_alias = ContextVar("read_alias", default=None)
+
+# Replica alias -> (checked at, healthy), per process.
+_health = {}
+
+
+def replica_aliases():
+    """
+    Returns the aliases of the configured read replicas.
+    """
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def replica_lag(alias):
+    """
+    Returns how many seconds the replica ``alias`` is behind the primary.
+
+    A replica that has replayed everything it received counts as up to date,
+    however long ago the primary last wrote.
+    """
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+            "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM "
+            "now() - pg_last_xact_replay_timestamp()), 0) END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+def is_healthy(alias):
+    """
+    Returns whether the replica ``alias`` is reachable and lags less than
+    ``REPLICA_MAX_LAG`` seconds.
+
+    The answer is cached for ``REPLICA_HEALTH_CHECK_INTERVAL`` seconds so the
+    check costs one query per replica and interval, not one per request.
+    """
+    now = time.monotonic()
+    checked_at, healthy = _health.get(alias, (None, False))
+    if (
+        checked_at is not None
+        and now - checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL
+    ):
+        return healthy
+    try:
+        lag = replica_lag(alias)
+        healthy = lag <= settings.REPLICA_MAX_LAG
+        if not healthy:
+            logger.warning(
+                f"Replica {alias} is {lag:.1f}s behind, reading from primary."
+            )
+    except Exception:
+        logger.exception(f"Replica {alias} is unavailable, reading from primary.")
+        healthy = False
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+def check_pin_cache():
+    """
+    Refuses to route reads to replicas when the default cache, which holds
+    the primary pins, is private to each process: a user writing through
+    one worker would keep reading stale data through the others.
+
+    Raises:
+        ImproperlyConfigured: Replicas are configured and ``CACHES``
+            lacks a shared default backend.
+    """
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if replica_aliases() and isinstance(backend, (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            "Read replicas require a CACHES['default'] backend shared between "
+            "processes (Redis, Memcached or the database cache) to pin users "
+            "to the primary after they write."
+        )
+
+
+def pin_key(user_id):
+    return f"db-primary-pin:{user_id}"
+
+
+def pin_to_primary(user):
+    """
+    Send the reads of ``user`` to the primary for ``REPLICA_PIN_SECONDS``,
+    so they see their own writes even if the replicas lag behind.
+
+    The pin lives in the default cache, which must be shared between
+    processes for it to follow the user across workers; see
+    ``check_pin_cache()``.
+    """
+    cache.set(pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return bool(user and user.is_authenticated and cache.get(pin_key(user.pk)))
+
+
+def choose_replica(user=None):
+    """
+    Returns a healthy replica for ``user`` to read from, or None to read from
+    the primary.
+    """
+    if is_pinned(user):
+        return None
+    replicas = [alias for alias in replica_aliases() if is_healthy(alias)]
+    return random.choice(replicas) if replicas else None
+
+
+def current_read_alias():
+    """
+    Returns the replica the current context reads from, None for the
+    primary.
+    """
+    return _read_alias.get()
+
+
+def route_reads(alias):
+    """
+    Send the reads of the current context to ``alias``, or to the primary when
+    ``alias`` is None.
+
+    Returns:
+        Token: The token to pass to ``stop_routing_reads``.
+    """
+    return _read_alias.set(alias)
+
+
+def stop_routing_reads(token):
+    """
+    Restore the read routing that was active before ``route_reads``.
+    """
+    _read_alias.reset(token)
+
+
+@contextmanager
+def read_from(alias):
+    """
+    Route the reads made inside the block to ``alias``, or to the primary when
+    ``alias`` is None.
+    """
+    token = route_reads(alias)
+    try:
+        yield
+    finally:
+        stop_routing_reads(token)
+
+
+class ReplicaRouter:
+    """
+    Database router sending reads to the replica selected for the current
+    request, and everything else to the primary.
+
+    Reads only leave the primary once ``route_reads()`` picked a replica,
+    which ``ReplicaReadMixin`` does for safe requests to the viewsets using
+    it, or inside a ``read_from()`` block. Objects loaded from a replica keep
+    reading their relations from it.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
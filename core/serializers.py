@@ -0,0 +1,186 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .models import ChunkedUpload
+from .moderation import MAX_ITEMS
+from .uploads import allowed_extensions, file_extension
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the ChunkedUpload model.
+    """
+
+    class Meta:
+        """
+        Meta class for the ChunkedUpload model.
+        """
+
+        model = ChunkedUpload
+        fields = [
+            "uuid",
+            "field_name",
+            "filename",
+            "size",
+            "offset",
+            "checksum",
+            "status",
+            "date_created",
+            "date_updated",
+        ]
+        read_only_fields = ["uuid", "offset", "status", "date_created", "date_updated"]
+
+    def validate_size(self, value):
+        """
+        Refuses sessions for files larger than ``MAX_UPLOAD_SIZE``.
+        """
+        if value > settings.MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f"File too large ( > {settings.MAX_UPLOAD_SIZE} bytes )"
+            )
+        return value
+
+    def validate(self, data):
+        """
+        Refuses file names with an extension the target field does not accept.
+        """
+        extensions = allowed_extensions(data.get("field_name", ""))
+        if (
+            extensions is not None
+            and file_extension(data["filename"]) not in extensions
+        ):
+            raise serializers.ValidationError(
+                {
+                    "filename": f"File extension is not allowed. "
+                    f"Allowed extensions are: {', '.join(extensions)}."
+                }
+            )
+        return data
+
+
+class ChunkedUploadField(serializers.PrimaryKeyRelatedField):
+    """
+    Write-only field that takes the uuid of a completed chunked upload owned
+    by the requesting user and hands the uploaded file to its ``source``.
+
+    Declare it next to a file field, e.g.
+    ``attachments_upload = ChunkedUploadField(source="attachments")``.
+    """
+
+    default_error_messages = {
+        **serializers.PrimaryKeyRelatedField.default_error_messages,
+        "wrong_field": "Upload was created for field {field_name!r}.",
+    }
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("required", False)
+        kwargs["write_only"] = True
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        # Consumed uploads were attached already and their file moved away.
+        queryset = ChunkedUpload.objects.filter(status="complete")
+        request = self.context.get("request")
+        if request is None or not request.user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(user=request.user)
+
+    def to_internal_value(self, data):
+        upload = super().to_internal_value(data)
+        if upload.field_name and upload.field_name != self.source:
+            self.fail("wrong_field", field_name=upload.field_name)
+        return upload.as_file()
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Read-only field exposing the generated variants of an image as URLs.
+
+    Reads a ``<field>_variants`` JSONField filled by ``core.images``. Until an
+    upload has been processed it renders as an empty object.
+    """
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        urls = {}
+        for label, name in (value or {}).items():
+            if label == "source":
+                continue
+            url = default_storage.url(name)
+            urls[label] = request.build_absolute_uri(url) if request else url
+        return urls
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin letting clients pick the fields of read responses.
+
+    ``?fields=uuid,status`` keeps only the listed fields and ``?omit=description``
+    drops the listed ones. Unknown names are rejected with a 400. Writes
+    always use the full field set. See ``core.mixins.FieldProjectionMixin`` to
+    trim the ``SELECT`` accordingly.
+    """
+
+    fields_param = "fields"
+    omit_param = "omit"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        params = getattr(request, "query_params", request.GET)
+        selected = self._requested(params, self.fields_param)
+        omitted = self._requested(params, self.omit_param)
+        if selected is None and omitted is None:
+            return
+        readable = {name for name, field in self.fields.items() if not field.write_only}
+        for param, names in ((self.fields_param, selected), (self.omit_param, omitted)):
+            unknown = (names or set()) - readable
+            if unknown:
+                raise serializers.ValidationError(
+                    {param: [f"Unknown field(s): {', '.join(sorted(unknown))}."]}
+                )
+        keep = (selected if selected is not None else readable) - (omitted or set())
+        for name in list(self.fields):
+            if name in readable and name not in keep:
+                self.fields.pop(name)
+
+    @staticmethod
+    def _requested(params, name):
+        if name not in params:
+            return None
+        return {
+            field.strip()
+            for value in params.getlist(name)
+            for field in value.split(",")
+            if field.strip()
+        }
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    """
+    Base serializer of the bulk status requests of ``core.moderation``.
+
+    A request names the rows to change either by ``ids`` or by ``filter``.
+    Subclasses declare ``status`` and ``from_status`` with the choices of
+    their model, the type of the ``ids`` and the fields of ``filter``.
+    """
+
+    ids = serializers.ListField(min_length=1, max_length=MAX_ITEMS, required=False)
+    filter = serializers.DictField(required=False)
+
+    def validate(self, data):
+        """
+        Check that exactly one of ``ids`` and ``filter`` is given, and that a
+        filter matching every row at least names the status to change from.
+        """
+        if ("ids" in data) == ("filter" in data):
+            raise serializers.ValidationError("Provide either ids or filter.")
+        if "ids" in data:
+            data["ids"] = list(dict.fromkeys(data["ids"]))
+        elif not data["filter"] and "from_status" not in data:
+            raise serializers.ValidationError("An empty filter requires from_status.")
+        return data
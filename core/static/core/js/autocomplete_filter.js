@@ -0,0 +1,16 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Reload the changelist with the picked value as the filter parameter.
+    $(document).on('change', '.autocomplete-filter select', function() {
+        const params = new URLSearchParams(window.location.search);
+        params.delete('p');
+        if (this.value) {
+            params.set(this.dataset.lookup, this.value);
+        } else {
+            params.delete(this.dataset.lookup);
+        }
+        window.location.search = params.toString();
+    });
+}
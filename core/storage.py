@@ -0,0 +1,191 @@
+import hashlib
+import os
+from uuid import uuid4
+
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, storages
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from .uploads import file_extension
+
+BLOB_PREFIX = "blobs/"
+
+# (model label, field name) pairs whose files are reference counted.
+TRACKED_FIELDS = set()
+
+
+def blob_storage():
+    """
+    Returns the content-addressed storage configured as ``STORAGES["blobs"]``.
+
+    Pass this callable as ``storage=`` so migrations reference the alias
+    rather than a concrete backend.
+    """
+    return storages["blobs"]
+
+
+def is_blob(name):
+    """
+    Returns whether ``name`` was written by ``ContentAddressedStorage``.
+    """
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Filesystem storage that keeps a single copy of each distinct content.
+
+    Files are named after the SHA-256 of their content, so uploading a file
+    that is already stored costs a hash and no write. The digest computed by
+    ``StreamingUploadHandler`` while the upload streamed in is reused when
+    present. Blobs are reference counted from the model fields registered with
+    ``track_blob_field`` and removed by the ``collect_media_garbage`` command.
+    """
+
+    def blob_name(self, digest, name):
+        """
+        Returns the storage name of a blob, sharded to keep directories small.
+        """
+        extension = file_extension(name)
+        suffix = f".{extension}" if extension else ""
+        return f"{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+    def digest(self, content):
+        """
+        Returns the SHA-256 hex digest of ``content``.
+        """
+        digest = getattr(content, "sha256", None)
+        if digest:
+            return digest
+        hasher = hashlib.sha256()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        if hasattr(content, "seek"):
+            content.seek(0)
+        return hasher.hexdigest()
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.blob_name(self.digest(content), name)
+        try:
+            self.touch(name)
+        except FileNotFoundError:
+            name = self._save(name, content)
+        # Chunked uploads can only be attached once.
+        if hasattr(content, "stored"):
+            content.stored()
+        return name
+
+    def touch(self, name):
+        """
+        Restart the garbage collection grace period of an existing blob, so
+        ``collect_media_garbage`` cannot delete it before the reference being
+        saved is counted.
+
+        Raises:
+            FileNotFoundError: The blob is not stored.
+        """
+        from .models import Blob
+
+        if not self.exists(name):
+            raise FileNotFoundError(name)
+        Blob.objects.update_or_create(
+            name=name, defaults={"date_updated": timezone.now()}
+        )
+        os.utime(self.path(name))
+
+    def _save(self, name, content):
+        """
+        Write the blob through a temporary file and rename it into place.
+
+        Two uploads of the same content racing each other both rename onto
+        the same name, which is harmless because the bytes are identical.
+        """
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        temp_path = f"{full_path}.{uuid4().hex}.tmp"
+        try:
+            if hasattr(content, "temporary_file_path"):
+                file_move_safe(content.temporary_file_path(), temp_path)
+            else:
+                with open(temp_path, "wb") as destination:
+                    for chunk in content.chunks():
+                        destination.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name.replace("\\", "/")
+
+
+def add_reference(name, delta):
+    """
+    Adjust the reference count of the blob ``name`` by ``delta``.
+    """
+    from .models import Blob
+
+    if not is_blob(name):
+        return
+    if delta > 0:
+        Blob.objects.get_or_create(name=name)
+    Blob.objects.filter(name=name).update(ref_count=F("ref_count") + delta)
+
+
+def _loaded_name(instance, field_name):
+    """
+    Returns the file name currently held by the instance, without loading it.
+
+    Returns None for deferred fields, whose value is unknown until accessed.
+    """
+    if field_name not in instance.__dict__:
+        return None
+    value = instance.__dict__[field_name]
+    return getattr(value, "name", value) or ""
+
+
+def _snapshot(sender, instance, **kwargs):
+    instance._blob_names = {
+        field_name: _loaded_name(instance, field_name)
+        for model_label, field_name in TRACKED_FIELDS
+        if model_label == sender._meta.label
+    }
+
+
+def _on_save(sender, instance, **kwargs):
+    for field_name, old_name in instance._blob_names.items():
+        new_name = _loaded_name(instance, field_name)
+        if new_name is not None and new_name != old_name:
+            add_reference(new_name, 1)
+            add_reference(old_name, -1)
+    _snapshot(sender, instance)
+
+
+def _on_delete(sender, instance, **kwargs):
+    for field_name, old_name in instance._blob_names.items():
+        if old_name is not None:
+            add_reference(old_name, -1)
+
+
+def track_blob_field(model, field_name):
+    """
+    Reference count the blobs stored in ``model.field_name``.
+
+    The field must use ``blob_storage``. The name loaded from the database is
+    remembered on each instance, so saving only touches the counts when the
+    file actually changed.
+    """
+    TRACKED_FIELDS.add((model._meta.label, field_name))
+    uid = f"blob_refs_{model._meta.label}"
+    post_init.connect(_snapshot, sender=model, dispatch_uid=uid)
+    post_save.connect(_on_save, sender=model, dispatch_uid=uid)
+    post_delete.connect(_on_delete, sender=model, dispatch_uid=uid)
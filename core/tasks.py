@@ -0,0 +1,198 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# Task functions by name, filled by the ``task`` decorator.
+REGISTRY = {}
+
+
+class TaskFunction:
+    """
+    A function that can be called directly or queued for a worker with
+    ``enqueue()``. Arguments must be JSON serializable.
+    """
+
+    def __init__(self, func, name, queue, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<TaskFunction {self.name}>"
+
+    def enqueue(self, *args, run_at=None, delay=None, priority=None, **kwargs):
+        """
+        Queues a call of the function.
+
+        The row is written in the current transaction, if any, so the task
+        only becomes visible to workers if the transaction commits. With
+        ``TASK_QUEUE["EAGER"]`` the function is called right away instead.
+
+        Args:
+            run_at (datetime): Do not run the task before this time.
+            delay (float | timedelta): Do not run the task before this many
+                seconds have passed.
+            priority (int): Overrides the priority of the task function;
+                higher priorities run first.
+
+        Returns:
+            Task | None: The queued task, or None when run eagerly.
+        """
+        if settings.TASK_QUEUE["EAGER"]:
+            self.func(*args, **kwargs)
+            return None
+        if run_at is None:
+            run_at = timezone.now()
+            if delay is not None:
+                if not isinstance(delay, timedelta):
+                    delay = timedelta(seconds=delay)
+                run_at += delay
+        return Task.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            queue=self.queue,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=run_at,
+        )
+
+
+def task(func=None, *, name=None, queue="default", priority=0, max_attempts=3):
+    """
+    Registers ``func`` as a task, usable as ``@task`` or ``@task(...)``.
+
+    Task functions are looked up by name in the workers, which import the
+    ``tasks`` module of every installed app. The name defaults to the
+    module and name of the function.
+    """
+
+    def register(func):
+        task_name = name or f"{func.__module__}.{func.__qualname__}"
+        wrapper = TaskFunction(func, task_name, queue, priority, max_attempts)
+        REGISTRY[task_name] = wrapper
+        return wrapper
+
+    return register if func is None else register(func)
+
+
+def claim(worker, queues):
+    """
+    Atomically takes the next task due in ``queues`` for ``worker``.
+
+    Like ``referrals.triage.claim_next_ticket``, candidates are read with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent workers skip each
+    other's rows, and the claim is a conditional ``UPDATE`` so that SQLite,
+    which has no row locks, cannot hand a task out twice.
+
+    Returns:
+        Task | None: The claimed task, or None if nothing is due.
+    """
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            task = (
+                Task.objects.filter(status="queued", queue__in=queues, run_at__lte=now)
+                .order_by("-priority", "run_at")
+                .select_for_update(skip_locked=True)
+                .first()
+            )
+            if task is None:
+                return None
+            claimed = Task.objects.filter(pk=task.pk, status="queued").update(
+                status="running",
+                attempts=task.attempts + 1,
+                locked_by=worker,
+                locked_at=now,
+                date_updated=now,
+            )
+            if claimed:
+                task.status = "running"
+                task.attempts += 1
+                task.locked_by = worker
+                task.locked_at = now
+                return task
+
+
+def retry_delay(attempts):
+    """
+    Returns the seconds to wait before the next attempt, doubling from
+    ``TASK_QUEUE["RETRY_BACKOFF"]`` up to ``RETRY_BACKOFF_MAX``, with jitter
+    so tasks failing together do not retry together.
+    """
+    config = settings.TASK_QUEUE
+    delay = min(
+        config["RETRY_BACKOFF"] * 2 ** (attempts - 1), config["RETRY_BACKOFF_MAX"]
+    )
+    return delay * random.uniform(0.5, 1)
+
+
+def execute(task):
+    """
+    Runs a claimed task, then deletes it or schedules its next attempt.
+
+    Returns:
+        bool: Whether the task succeeded.
+    """
+    try:
+        func = REGISTRY[task.name]
+        func(*task.args, **task.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        changes = {"last_error": error, "locked_by": "", "locked_at": None}
+        if task.attempts < task.max_attempts:
+            delay = retry_delay(task.attempts)
+            changes.update(
+                status="queued",
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+            logger.warning(
+                f"Task {task.name} ({task.pk}) failed, attempt {task.attempts} "
+                f"of {task.max_attempts}, retrying in {delay:.0f}s."
+            )
+        else:
+            changes["status"] = "failed"
+            logger.error(
+                f"Task {task.name} ({task.pk}) failed after {task.attempts} "
+                f"attempts:\n{error}"
+            )
+        Task.objects.filter(pk=task.pk, locked_by=task.locked_by).update(
+            date_updated=timezone.now(), **changes
+        )
+        return False
+    Task.objects.filter(pk=task.pk, locked_by=task.locked_by).delete()
+    return True
+
+
+def recover_stale():
+    """
+    Puts back the tasks left running by workers that died, once they have
+    been locked for more than ``TASK_QUEUE["LOCK_TIMEOUT"]`` seconds. Those
+    out of attempts are marked as failed.
+
+    Returns:
+        int: The number of tasks recovered.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.TASK_QUEUE["LOCK_TIMEOUT"])
+    stale = Task.objects.filter(status="running", locked_at__lt=cutoff)
+    unlock = {"locked_by": "", "locked_at": None, "date_updated": now}
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status="failed", last_error="The worker running the task died.", **unlock
+    )
+    return stale.update(status="queued", run_at=now, **unlock)
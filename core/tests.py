@@ -0,0 +1,675 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from referrals.models import Product, SupportTicket
+from useraccounts.models import CustomUser
+
+from . import outbox, routers, tasks
+from .cache import get_cache, invalidate_rows
+from .middleware import CompressionMiddleware, PrimaryPinningMiddleware
+from .models import Blob, ChunkedUpload, OutboxEvent, Task
+from .views import StreamTicket, get_stream_user
+
+# Calls of the test tasks, by name.
+CALLS = []
+
+
+@tasks.task(name="core.tests.record")
+def record(*args):
+    CALLS.append(args)
+
+
+@tasks.task(name="core.tests.fail", max_attempts=2)
+def fail():
+    raise RuntimeError("Task failed.")
+
+
+class FailingSink:
+    def send(self, events):
+        raise ConnectionError("Sink unavailable.")
+
+
+def create_user(email, user_type="company", **kwargs):
+    return CustomUser.objects.create_user(
+        email=email, password="password", name=email, user_type=user_type, **kwargs
+    )
+
+
+def create_product(company, **kwargs):
+    return Product.objects.create(
+        product_name="Product",
+        company=company,
+        description="Description",
+        product_link="https://example.com",
+        **kwargs,
+    )
+
+
+class MediaRootMixin:
+    """
+    Stores the files written by a test in a temporary ``MEDIA_ROOT``.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, IMAGE_PIPELINE_WORKERS=0)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+class TaskQueueTests(TestCase):
+    """
+    Tests of the database task queue of ``core.tasks``.
+    """
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_claims_by_priority_and_never_twice(self):
+        low = record.enqueue("low")
+        high = record.enqueue("high", priority=5)
+        record.enqueue("later", delay=60)
+        self.assertEqual(tasks.claim("worker-1", ["default"]).pk, high.pk)
+        self.assertEqual(tasks.claim("worker-2", ["default"]).pk, low.pk)
+        self.assertIsNone(tasks.claim("worker-3", ["default"]))
+        self.assertEqual(Task.objects.get(pk=low.pk).locked_by, "worker-2")
+
+    def test_success_deletes_the_task(self):
+        record.enqueue(1, 2)
+        self.assertTrue(tasks.execute(tasks.claim("worker", ["default"])))
+        self.assertEqual(CALLS, [(1, 2)])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failures_are_retried_with_backoff_then_kept(self):
+        queued = fail.enqueue()
+        with self.assertLogs("core.tasks", "WARNING"):
+            self.assertFalse(tasks.execute(tasks.claim("worker", ["default"])))
+        retried = Task.objects.get(pk=queued.pk)
+        self.assertEqual(retried.status, "queued")
+        self.assertEqual(retried.attempts, 1)
+        self.assertGreater(retried.run_at, timezone.now())
+        self.assertIn("Task failed.", retried.last_error)
+
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        with self.assertLogs("core.tasks", "ERROR"):
+            self.assertFalse(tasks.execute(tasks.claim("worker", ["default"])))
+        failed = Task.objects.get(pk=queued.pk)
+        self.assertEqual(failed.status, "failed")
+        self.assertEqual(failed.attempts, 2)
+        self.assertIsNone(tasks.claim("worker", ["default"]))
+
+    def test_recovers_tasks_of_dead_workers(self):
+        queued = record.enqueue()
+        tasks.claim("worker", ["default"])
+        Task.objects.filter(pk=queued.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(tasks.recover_stale(), 1)
+        self.assertEqual(tasks.claim("other", ["default"]).pk, queued.pk)
+
+
+class OutboxTests(TestCase):
+    """
+    Tests of the outbox events and their relay to the sinks.
+    """
+
+    def setUp(self):
+        CALLS.clear()
+        self.company = create_user("company@example.com")
+        OutboxEvent.objects.all().delete()
+
+    def test_changes_write_events(self):
+        product = create_product(self.company)
+        product.status = "active"
+        product.save()
+        product.description = "Changed"
+        product.save()
+        events = OutboxEvent.objects.order_by("pk")
+        self.assertEqual(
+            [event.event_type for event in events],
+            ["product.created", "product.status_changed"],
+        )
+        self.assertEqual(
+            events[1].payload, {"field": "status", "old": "pending", "new": "active"}
+        )
+        self.assertEqual(events[1].owner_id, self.company.pk)
+
+    def test_relay_publishes_each_event_once(self):
+        create_product(self.company)
+        create_product(self.company)
+        with self.assertLogs("core.outbox.events") as logs:
+            self.assertEqual(outbox.relay(batch_size=1), 1)
+            self.assertEqual(outbox.relay(), 1)
+        self.assertEqual(outbox.relay(), 0)
+        self.assertEqual(len(logs.records), 2)
+        self.assertFalse(OutboxEvent.objects.filter(published_at__isnull=True).exists())
+
+    @override_settings(
+        OUTBOX={
+            "SINKS": [
+                {
+                    "BACKEND": "core.outbox.TaskSink",
+                    "OPTIONS": {"task": "core.tests.record"},
+                },
+                {"BACKEND": "core.tests.FailingSink"},
+            ],
+            "BATCH_SIZE": 100,
+        }
+    )
+    def test_failed_batches_are_kept_for_the_next_relay(self):
+        product = create_product(self.company)
+        with self.assertRaises(ConnectionError):
+            outbox.relay()
+        event = OutboxEvent.objects.get()
+        self.assertIsNone(event.published_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("Sink unavailable.", event.last_error)
+        self.assertFalse(Task.objects.exists())
+
+        with override_settings(
+            OUTBOX={
+                "SINKS": [
+                    {
+                        "BACKEND": "core.outbox.TaskSink",
+                        "OPTIONS": {"task": "core.tests.record"},
+                    }
+                ],
+                "BATCH_SIZE": 100,
+            }
+        ):
+            self.assertEqual(outbox.relay(), 1)
+        task = Task.objects.get(name="core.tests.record")
+        self.assertEqual(task.args[0][0]["object_id"], str(product.pk))
+
+
+class ChunkedUploadTests(MediaRootMixin, TestCase):
+    """
+    Tests of resumable uploads and their use by the file fields.
+    """
+
+    content = b"%PDF-1.4 " + b"0123456789" * 100
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("person@example.com", "individual")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start(self, content=None, checksum=None):
+        content = self.content if content is None else content
+        response = self.client.post(
+            "/api/v1/uploads/",
+            {
+                "filename": "document.pdf",
+                "field_name": "attachments",
+                "size": len(content),
+                "checksum": checksum or hashlib.sha256(content).hexdigest(),
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["uuid"]
+
+    def send(self, uuid, data, offset):
+        return self.client.generic(
+            "PATCH",
+            f"/api/v1/uploads/{uuid}/",
+            data,
+            content_type="application/offset+octet-stream",
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    def attach(self, uuid):
+        return self.client.post(
+            "/api/v1/referrals/supporttickets/",
+            {
+                "title": "Title",
+                "description": "Description",
+                "attachments_upload": uuid,
+            },
+            format="json",
+        )
+
+    def test_resume_after_an_interrupted_chunk(self):
+        uuid = self.start()
+        response = self.send(uuid, self.content[:400], 0)
+        self.assertEqual(response["Upload-Offset"], "400")
+
+        response = self.send(uuid, self.content[400:], 100)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 400)
+        response = self.client.get(f"/api/v1/uploads/{uuid}/")
+        self.assertEqual(response["Upload-Offset"], "400")
+
+        response = self.send(uuid, self.content[400:], 400)
+        self.assertEqual(response.json()["status"], "complete")
+        self.assertEqual(response.json()["offset"], len(self.content))
+
+    def test_checksum_mismatch_restarts_the_upload(self):
+        uuid = self.start(checksum="0" * 64)
+        response = self.send(uuid, self.content, 0)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(ChunkedUpload.objects.get(pk=uuid).offset, 0)
+
+    def test_attach_consumes_the_upload(self):
+        uuid = self.start()
+        self.send(uuid, self.content, 0)
+        response = self.attach(uuid)
+        self.assertEqual(response.status_code, 201)
+        ticket = SupportTicket.objects.get(pk=response.json()["uuid"])
+        self.assertTrue(ticket.attachments.name.startswith("blobs/"))
+        with ticket.attachments.open("rb") as stored:
+            self.assertEqual(stored.read(), self.content)
+        upload = ChunkedUpload.objects.get(pk=uuid)
+        self.assertEqual(upload.status, "consumed")
+        self.assertFalse(os.path.exists(upload.part_path))
+
+        response = self.attach(uuid)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("attachments_upload", response.json())
+
+    def test_incomplete_uploads_cannot_be_attached(self):
+        uuid = self.start()
+        self.send(uuid, self.content[:10], 0)
+        self.assertEqual(self.attach(uuid).status_code, 400)
+
+
+class BlobStorageTests(MediaRootMixin, TestCase):
+    """
+    Tests of the content-addressed storage and its garbage collection.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("person@example.com", "individual")
+
+    def create_ticket(self, content, file_name="document.pdf"):
+        return SupportTicket.objects.create(
+            title="Title",
+            description="Description",
+            submitted_by=self.user,
+            attachments=SimpleUploadedFile(file_name, content),
+        )
+
+    def collect(self, grace_period=timedelta(hours=1)):
+        with override_settings(BLOB_GC_GRACE_PERIOD=grace_period):
+            call_command("collect_media_garbage", stdout=StringIO())
+
+    def test_identical_content_is_stored_once(self):
+        first = self.create_ticket(b"%PDF same", "first.pdf")
+        second = self.create_ticket(b"%PDF same", "second.pdf")
+        self.assertEqual(first.attachments.name, second.attachments.name)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        self.create_ticket(b"%PDF other")
+        self.assertEqual(Blob.objects.count(), 2)
+
+    def test_unreferenced_blobs_are_collected_after_the_grace_period(self):
+        ticket = self.create_ticket(b"%PDF content")
+        name = ticket.attachments.name
+        storage = ticket.attachments.storage
+        ticket.delete()
+        self.assertEqual(Blob.objects.get(name=name).ref_count, 0)
+
+        self.collect()
+        self.assertTrue(storage.exists(name))
+        self.collect(timedelta(seconds=-1))
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_reusing_a_blob_restarts_its_grace_period(self):
+        ticket = self.create_ticket(b"%PDF content")
+        name = ticket.attachments.name
+        ticket.delete()
+        Blob.objects.filter(name=name).update(
+            date_updated=timezone.now() - timedelta(days=1)
+        )
+        # An upload of the same content, whose row is not saved yet.
+        ticket.attachments.storage.save(
+            "again.pdf", SimpleUploadedFile("again.pdf", b"%PDF content")
+        )
+        self.collect()
+        self.assertTrue(ticket.attachments.storage.exists(name))
+
+
+class ImageVariantTests(MediaRootMixin, TestCase):
+    """
+    Tests of the image variants of ``core.images``.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_user("company@example.com")
+
+    def image(self, color):
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 300), color).save(buffer, format="PNG")
+        return SimpleUploadedFile(f"{color}.png", buffer.getvalue())
+
+    def save(self, product, image):
+        product.product_image = image
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        variants = Product.objects.get(pk=product.pk).product_image_variants
+        return [name for label, name in variants.items() if label != "source"]
+
+    def test_replaced_variants_are_deleted(self):
+        product = create_product(self.company)
+        red = self.save(product, self.image("red"))
+        self.assertEqual(len(red), 3)
+        self.assertTrue(all(default_storage.exists(name) for name in red))
+
+        blue = self.save(product, self.image("blue"))
+        self.assertFalse(any(default_storage.exists(name) for name in red))
+        self.assertTrue(all(default_storage.exists(name) for name in blue))
+
+        self.assertEqual(self.save(product, None), [])
+        self.assertFalse(any(default_storage.exists(name) for name in blue))
+
+    def test_shared_variants_are_kept(self):
+        first, second = create_product(self.company), create_product(self.company)
+        self.save(first, self.image("red"))
+        red = self.save(second, self.image("red"))
+        self.save(first, self.image("blue"))
+        self.assertTrue(all(default_storage.exists(name) for name in red))
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Tests of the validators of ``ConditionalGetMixin``.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        self.company = create_user("company@example.com")
+        self.product = create_product(self.company)
+        self.client = APIClient()
+        self.client.force_authenticate(self.company)
+
+    def test_list_not_modified(self):
+        response = self.client.get("/api/v1/referrals/products/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        etag = response["ETag"]
+        response = self.client.get(
+            "/api/v1/referrals/products/", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.product.delete()
+        response = self.client.get(
+            "/api/v1/referrals/products/", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_not_modified_without_a_query(self):
+        etag = self.client.get("/api/v1/referrals/products/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/api/v1/referrals/products/", headers={"If-None-Match": etag}
+            )
+        self.assertEqual(response.status_code, 304)
+
+        Product.objects.filter(pk=self.product.pk).update(traffic=5)
+        invalidate_rows(Product.objects.filter(pk=self.product.pk))
+        response = self.client.get(
+            "/api/v1/referrals/products/", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_retrieve_not_modified(self):
+        url = f"/api/v1/referrals/products/{self.product.pk}/"
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+        response = self.client.get(url, headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+        self.product.status = "active"
+        self.product.save()
+        self.assertEqual(
+            self.client.get(
+                url, headers={"If-None-Match": response["ETag"]}
+            ).status_code,
+            200,
+        )
+
+    def test_malformed_or_missing_object(self):
+        self.assertEqual(
+            self.client.get("/api/v1/referrals/products/not-a-uuid/").status_code, 404
+        )
+        other = create_product(create_user("other@example.com"))
+        self.assertEqual(
+            self.client.get(f"/api/v1/referrals/products/{other.pk}/").status_code, 404
+        )
+
+
+class RateLimitTests(TestCase):
+    """
+    Tests of ``RateLimitMiddleware``.
+    """
+
+    @override_settings(
+        RATE_LIMITS={
+            "STORE": {"BACKEND": "core.ratelimit.LocalBucketStore"},
+            "RULES": [
+                {
+                    "name": "signup",
+                    "path": r"^/api/v1/accounts/signup/$",
+                    "scope": "ip",
+                    "rate": "2/hour",
+                }
+            ],
+        }
+    )
+    def test_rejects_requests_over_the_burst(self):
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(
+                client.post("/api/v1/accounts/signup/", {}, format="json").status_code,
+                400,
+            )
+        response = client.post("/api/v1/accounts/signup/", {}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+        other = APIClient(REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(
+            other.post("/api/v1/accounts/signup/", {}, format="json").status_code, 400
+        )
+        # Other endpoints are not limited by the rule.
+        self.assertEqual(client.get("/api/v1/referrals/products/").status_code, 401)
+
+
+class IdempotencyTests(TestCase):
+    """
+    Tests of ``IdempotentCreateMixin``.
+    """
+
+    data = {
+        "product_name": "Product",
+        "description": "Description",
+        "product_link": "https://example.com",
+    }
+
+    def setUp(self):
+        self.company = create_user("company@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.company)
+
+    def create(self, data, key="key"):
+        return self.client.post(
+            "/api/v1/referrals/products/",
+            json.dumps(data),
+            content_type="application/json",
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retries_replay_the_first_response(self):
+        first = self.create(self.data)
+        self.assertEqual(first.status_code, 201)
+        retry = self.create(dict(reversed(list(self.data.items()))))
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json()["uuid"], first.json()["uuid"])
+        self.assertEqual(Product.objects.count(), 1)
+
+        self.assertEqual(self.create(self.data, key="other").status_code, 201)
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_key_reused_for_a_different_request(self):
+        self.create(self.data)
+        response = self.create({**self.data, "product_name": "Other"})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.create(self.data)
+        self.client.force_authenticate(create_user("other@example.com"))
+        response = self.create(self.data)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Product.objects.count(), 2)
+
+
+class CompressionTests(TestCase):
+    """
+    Tests of ``CompressionMiddleware``.
+    """
+
+    def setUp(self):
+        self.request = RequestFactory().get("/", headers={"Accept-Encoding": "gzip"})
+
+    def respond(self, content_type):
+        body = b"<p>" + b"compressible " * 200 + b"</p>"
+        middleware = CompressionMiddleware(
+            lambda request: HttpResponse(body, content_type=content_type)
+        )
+        return middleware(self.request), body
+
+    def test_compresses_api_payloads(self):
+        response, body = self.respond("application/json")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_leaves_html_alone(self):
+        response, body = self.respond("text/html; charset=utf-8")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response.content, body)
+
+
+@mock.patch("core.routers.replica_aliases", return_value=["replica_1"])
+@mock.patch("core.routers.is_healthy", return_value=True)
+class ReplicaRoutingTests(TestCase):
+    """
+    Tests of the read replica routing of ``core.routers``.
+    """
+
+    def test_refuses_a_process_local_cache(self, *mocks):
+        with self.assertRaises(ImproperlyConfigured):
+            PrimaryPinningMiddleware(lambda request: HttpResponse())
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                    "LOCATION": "django_cache",
+                }
+            }
+        ):
+            PrimaryPinningMiddleware(lambda request: HttpResponse())
+
+    def test_writers_read_from_the_primary(self, *mocks):
+        user = create_user("company@example.com")
+        self.assertEqual(routers.choose_replica(user), "replica_1")
+        routers.pin_to_primary(user)
+        self.assertIsNone(routers.choose_replica(user))
+
+    def test_replica_reads_are_cached_briefly(self, *mocks):
+        get_cache().clear()
+        user = create_user("company@example.com")
+        client = APIClient()
+        client.force_authenticate(user)
+        shared = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": self.enterContext(tempfile.TemporaryDirectory()),
+            }
+        }
+        # The "replica" is the test database itself.
+        with override_settings(CACHES=shared), mock.patch(
+            "core.mixins.choose_replica", return_value="default"
+        ):
+            self.assertEqual(client.get("/api/v1/referrals/products/").status_code, 200)
+        # Versions outlive the response, which expires after REPLICA_MAX_LAG.
+        expires = sorted(expires for _, expires in get_cache().entries.values())
+        self.assertLessEqual(expires[0], time.monotonic() + 5)
+        self.assertGreater(expires[-1], time.monotonic() + 5)
+
+
+class EventStreamAuthTests(TestCase):
+    """
+    Tests of the authentication of ``GET events/``.
+    """
+
+    def setUp(self):
+        self.user = create_user("company@example.com")
+        self.factory = RequestFactory()
+
+    def test_issues_tickets(self):
+        client = APIClient()
+        self.assertEqual(client.post("/api/v1/events/ticket/").status_code, 401)
+        client.force_authenticate(self.user)
+        response = client.post("/api/v1/events/ticket/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["expires_in"], 60)
+        ticket = StreamTicket(response.json()["ticket"])
+        self.assertEqual(ticket["user_id"], self.user.pk)
+
+    async def test_tickets_in_the_query_string(self):
+        ticket = str(StreamTicket.for_user(self.user))
+        request = self.factory.get("/api/v1/events/", {"ticket": ticket})
+        self.assertEqual((await get_stream_user(request)).pk, self.user.pk)
+
+    async def test_no_access_tokens_in_the_query_string(self):
+        token = str(AccessToken.for_user(self.user))
+        for name in ("ticket", "token"):
+            request = self.factory.get("/api/v1/events/", {name: token})
+            self.assertIsNone(await get_stream_user(request))
+        request = self.factory.get(
+            "/api/v1/events/", headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual((await get_stream_user(request)).pk, self.user.pk)
+
+    def test_tickets_only_open_the_stream(self):
+        ticket = str(StreamTicket.for_user(self.user))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ticket}")
+        self.assertEqual(client.get("/api/v1/referrals/products/").status_code, 401)
+
+    @override_settings(SSE={**settings.SSE, "TICKET_LIFETIME": timedelta(0)})
+    async def test_expired_tickets(self):
+        ticket = str(StreamTicket.for_user(self.user))
+        request = self.factory.get("/api/v1/events/", {"ticket": ticket})
+        self.assertIsNone(await get_stream_user(request))
@@ -0,0 +1,119 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+
+class UploadRejected(MultiPartParserError, BadRequest):
+    """
+    Raised while the request body is still streaming in, to abort an upload.
+
+    DRF turns ``MultiPartParserError`` into a 400 response and plain Django
+    views turn ``BadRequest`` into one, so the rest of the body is never read.
+    """
+
+
+def file_extension(file_name):
+    """
+    Returns the lowercase extension of ``file_name``, without the dot.
+    """
+    return os.path.splitext(file_name or "")[1].lstrip(".").lower()
+
+
+def allowed_extensions(field_name):
+    """
+    Returns the extensions accepted for the form field ``field_name``.
+
+    Returns:
+        list[str] | None: The allowed extensions, or None if any is accepted.
+    """
+    return settings.UPLOAD_ALLOWED_EXTENSIONS.get(field_name)
+
+
+class ChecksummedUploadedFile(TemporaryUploadedFile):
+    """
+    A temporary uploaded file that also carries the SHA-256 of its content.
+    """
+
+    sha256 = None
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    """
+    Upload handler that streams each file to a temporary file on disk.
+
+    Size and SHA-256 are computed chunk by chunk while the body arrives, and
+    the upload is aborted as soon as the file name has a disallowed extension
+    or the running size goes over ``MAX_UPLOAD_SIZE``. Because the result has
+    a ``temporary_file_path()``, ``FileSystemStorage`` moves it into place
+    instead of copying it.
+    """
+
+    chunk_size = 64 * 2**10
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.MAX_UPLOAD_SIZE
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        """
+        Reject bodies that cannot possibly hold a valid upload before reading.
+
+        Non-file form data is already capped by ``DATA_UPLOAD_MAX_MEMORY_SIZE``,
+        so anything above that plus one maximum size file is refused outright.
+        """
+        limit = self.max_size + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        if content_length and content_length > limit:
+            raise UploadRejected(f"Request body too large ( > {limit} bytes )")
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        """
+        Start a new file, refusing disallowed extensions up front.
+        """
+        super().new_file(field_name, file_name, *args, **kwargs)
+        extensions = allowed_extensions(field_name)
+        if extensions is not None and file_extension(file_name) not in extensions:
+            raise UploadRejected(
+                f"File extension of {field_name!r} is not allowed. "
+                f"Allowed extensions are: {', '.join(extensions)}."
+            )
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.file = ChecksummedUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        """
+        Hash and write a chunk, aborting once the file grows too large.
+        """
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.file.close()
+            raise UploadRejected(f"File too large ( > {self.max_size} bytes )")
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        """
+        Rewind the finished file and record its size and checksum.
+        """
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hasher.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            temp_location = self.file.temporary_file_path()
+            try:
+                self.file.close()
+                os.remove(temp_location)
+            except FileNotFoundError:
+                pass
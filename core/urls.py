@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ChunkedUploadViewSet, StreamTicketView, event_stream
+
+router = DefaultRouter()
+router.register(r"uploads", ChunkedUploadViewSet)
+
+urlpatterns = [
+    path("events/", event_stream, name="event-stream"),
+    path("events/ticket/", StreamTicketView.as_view(), name="event-stream-ticket"),
+    path("", include(router.urls)),
+]
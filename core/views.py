@@ -0,0 +1,209 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, Token
+from rest_framework import mixins, status, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import events
+from .models import ChunkedUpload
+from .serializers import ChunkedUploadSerializer
+
+UPLOAD_OFFSET_HEADER = "Upload-Offset"
+
+
+class ChunkedUploadViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    ViewSet for resumable chunked uploads.
+
+    ``POST`` declares a file and opens a session, ``HEAD``/``GET`` report the
+    current ``Upload-Offset``, and ``PATCH`` appends the raw request body at
+    the ``Upload-Offset`` given by the client. Once ``offset`` reaches
+    ``size`` the session is complete and its uuid can be passed to the
+    ``*_upload`` fields of the product and support ticket endpoints.
+    """
+
+    queryset = ChunkedUpload.objects.all()
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Returns the upload sessions of the current user.
+        """
+        return ChunkedUpload.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Adds the ``Upload-Offset`` header to every session response.
+        """
+        if isinstance(getattr(response, "data", None), dict):
+            offset = response.data.get("offset")
+            if offset is not None:
+                response[UPLOAD_OFFSET_HEADER] = str(offset)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def partial_update(self, request, *args, **kwargs):
+        """
+        Appends the request body to the upload at the given ``Upload-Offset``.
+
+        A mismatching offset answers ``409 Conflict`` with the server offset so
+        the client can resume from there. Completing the file verifies the
+        declared checksum, if any.
+        """
+        with transaction.atomic():
+            upload = self.get_queryset().select_for_update().get(pk=kwargs["pk"])
+            self.check_object_permissions(request, upload)
+            if upload.status != "uploading":
+                return Response(
+                    {"detail": "Upload is already complete."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            try:
+                client_offset = int(request.headers.get(UPLOAD_OFFSET_HEADER, ""))
+            except ValueError:
+                return Response(
+                    {"detail": f"{UPLOAD_OFFSET_HEADER} header is required."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if client_offset != upload.offset:
+                return Response(
+                    self.get_serializer(upload).data, status=status.HTTP_409_CONFLICT
+                )
+
+            if request.stream is not None:
+                upload.append(request.stream)
+            if upload.offset >= upload.size:
+                checksum = upload.compute_checksum()
+                if upload.checksum and upload.checksum != checksum:
+                    upload.discard()
+                    upload.offset = 0
+                    upload.save(update_fields=["offset", "date_updated"])
+                    return Response(
+                        {"detail": "Checksum mismatch, upload restarted."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                upload.checksum = checksum
+                upload.status = "complete"
+            upload.save()
+        return Response(self.get_serializer(upload).data)
+
+    def perform_destroy(self, instance):
+        instance.discard()
+        instance.delete()
+
+
+class StreamTicket(Token):
+    """
+    Token only accepted by the event stream, valid for
+    ``SSE["TICKET_LIFETIME"]``.
+
+    ``EventSource`` cannot set headers, so browsers pass it in the query
+    string, where it ends up in access logs and history. Unlike an access
+    token, it opens nothing but the stream and expires shortly after.
+    """
+
+    token_type = "stream"
+
+    @property
+    def lifetime(self):
+        return settings.SSE["TICKET_LIFETIME"]
+
+
+class StreamTicketView(APIView):
+    """
+    Issues a ``StreamTicket`` for ``GET events/?ticket=``.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ticket = StreamTicket.for_user(request.user)
+        return Response(
+            {
+                "ticket": str(ticket),
+                "expires_in": int(ticket.lifetime.total_seconds()),
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+async def get_stream_user(request):
+    """
+    Returns the active user of the access token sent in the Authorization
+    header or of the ``StreamTicket`` sent in ``?ticket=``. Access tokens
+    are never read from the query string.
+    """
+    header = request.headers.get("Authorization", "").split()
+    if len(header) == 2 and header[0] in jwt_settings.AUTH_HEADER_TYPES:
+        token_class, raw = AccessToken, header[1]
+    else:
+        token_class, raw = StreamTicket, request.GET.get("ticket")
+    if not raw:
+        return None
+    try:
+        token = token_class(raw)
+    except TokenError:
+        return None
+    return (
+        await get_user_model()
+        .objects.filter(
+            **{jwt_settings.USER_ID_FIELD: token.get(jwt_settings.USER_ID_CLAIM)},
+            is_active=True,
+        )
+        .only("pk", "user_type", "is_staff")
+        .afirst()
+    )
+
+
+@require_GET
+async def event_stream(request):
+    """
+    Server-Sent Events stream of the changes to the user's products, tickets
+    and account, as recorded in the outbox.
+
+    Admins receive the events of every product and staff those of every
+    ticket, like in the list endpoints. Each message carries the outbox id,
+    so a reconnecting ``EventSource`` resumes after the last event it got
+    through the ``Last-Event-ID`` header. Browsers authenticate with a
+    ticket from ``POST events/ticket/``, and fetch a new one when a
+    reconnection is refused with a 401. Needs an ASGI server.
+    """
+    user = await get_stream_user(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    all_models = set()
+    if user.user_type == "admin":
+        all_models.add("referrals.Product")
+    if user.is_staff:
+        all_models.add("referrals.SupportTicket")
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get(
+        "last_event_id", ""
+    )
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+
+    subscription = events.broker.subscribe(user.pk, frozenset(all_models))
+    response = StreamingHttpResponse(
+        events.stream(subscription, last_event_id),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Tells nginx not to buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
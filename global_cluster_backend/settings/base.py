@@ -23,19 +23,23 @@ INSTALLED_APPS = [
     "corsheaders",
     "drf_spectacular",
     # Local
+    "core.apps.CoreConfig",
     "useraccounts.apps.UseraccountsConfig",
     "referrals.apps.ReferralsConfig",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "core.middleware.RateLimitMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.PrimaryPinningMiddleware",
 ]
 
 ROOT_URLCONF = "global_cluster_backend.urls"
@@ -65,6 +69,15 @@ DATABASES = {
     }
 }
 
+# Read replicas: any database besides "default" is used as a replica by the
+# viewsets using core.mixins.ReplicaReadMixin.
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+# Replicas lagging more than this many seconds are skipped.
+REPLICA_MAX_LAG = 5
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+# How long a user reads from the primary after writing, in seconds.
+REPLICA_PIN_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -89,6 +102,17 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = "static/"
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "blobs": {
+        "BACKEND": "core.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -97,12 +121,203 @@ AUTH_USER_MODEL = "useraccounts.CustomUser"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "mediafiles"
 
+# Uploads
+FILE_UPLOAD_HANDLERS = ["core.uploads.StreamingUploadHandler"]
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10 MB
+UPLOAD_ALLOWED_EXTENSIONS = {
+    "product_image": ["png", "jpg", "jpeg", "tiff"],
+    "attachments": ["png", "jpg", "jpeg", "tiff", "pdf"],
+}
+CHUNKED_UPLOAD_EXPIRY = timedelta(days=1)
+# Unreferenced blobs younger than this are kept, they may belong to an
+# upload whose row has not been committed yet.
+BLOB_GC_GRACE_PERIOD = timedelta(hours=1)
+
+# Image variants (longest side in pixels, by label)
+IMAGE_VARIANTS = {"thumbnail": 128, "small": 320, "medium": 800}
+IMAGE_VARIANT_FORMAT = "WEBP"
+IMAGE_VARIANT_QUALITY = 80
+# Size of the process pool rendering variants; 0 renders inline.
+IMAGE_PIPELINE_WORKERS = 2
+# Render variants in run_task_worker processes ("images" queue) instead of
+# a pool owned by each web process.
+IMAGE_PIPELINE_TASK_QUEUE = False
+
+# Background tasks (core.tasks), run by the run_task_worker command.
+TASK_QUEUE = {
+    # Run tasks when they are queued, in the caller's process.
+    "EAGER": False,
+    # Queues served by workers started without --queue.
+    "QUEUES": ["default", "images"],
+    # Seconds an idle worker waits before looking for tasks again.
+    "POLL_INTERVAL": 1,
+    # Seconds after which a running task is assumed to have lost its worker.
+    "LOCK_TIMEOUT": 600,
+    # Seconds before the first retry, doubled on each further attempt.
+    "RETRY_BACKOFF": 10,
+    "RETRY_BACKOFF_MAX": 3600,
+}
+
+# Admin changelists estimate their row count from the query plan once the
+# planner expects at least this many rows (PostgreSQL only).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10_000
+
+# Append every SELECT/UPDATE/DELETE to this file, for the audit_indexes
+# command to replay. Leave unset outside of profiling runs.
+QUERY_CAPTURE_LOG = None
+
+# Cache of list/retrieve responses (core.mixins.CachedResponseMixin). The
+# in-process LRU needs no infrastructure but is private to each worker; use
+# "core.cache.DjangoCache" with a shared CACHES entry to invalidate across
+# workers immediately.
+RESPONSE_CACHE = {
+    "BACKEND": "core.cache.LRUCache",
+    "OPTIONS": {"max_entries": 5000},
+    # Seconds, also the staleness bound between workers with the LRU.
+    "TIMEOUT": 60,
+}
+
+# Compression of API responses by core.middleware.CompressionMiddleware.
+# Brotli is used when installed and preferred by the client; set
+# BROTLI_QUALITY to None to only use gzip.
+RESPONSE_COMPRESSION = {
+    # Bytes, below which compressing costs more than it saves.
+    "MIN_SIZE": 860,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,
+    # Media types, or prefixes ending with "/". Only API payloads: HTML
+    # pages carry CSRF tokens next to reflected input, which compression
+    # would expose to BREACH.
+    "CONTENT_TYPES": [
+        "application/json",
+        "application/msgpack",
+        "application/vnd.oai.openapi",
+    ],
+}
+
+# Bank account verification API used by referrals.views.VerifyAccountView.
+ACCOUNT_VERIFICATION_URL = "http://nubapi.test/api/verify"
+ACCOUNT_VERIFICATION_TOKEN = "Your_Bearer_Token"
+
+# Transactional outbox (core.models.OutboxMixin): change events are relayed
+# to these sinks by the relay_outbox command. See core.outbox for the
+# backends; TaskSink hands batches to a core.tasks task.
+OUTBOX = {
+    "SINKS": [
+        {"BACKEND": "core.outbox.LogSink"},
+        # {
+        #     "BACKEND": "core.outbox.WebhookSink",
+        #     "OPTIONS": {"url": "https://example.com/hooks", "secret": "..."},
+        # },
+    ],
+    "BATCH_SIZE": 100,
+    # Seconds an idle relay waits before looking for events again.
+    "POLL_INTERVAL": 1,
+    # How long published events are kept.
+    "RETENTION": timedelta(days=7),
+}
+
+# Server-Sent Events stream of outbox events (core.views.event_stream).
+SSE = {
+    # Models whose events are streamed.
+    "MODELS": [
+        "referrals.Product",
+        "referrals.SupportTicket",
+        "useraccounts.CustomUser",
+    ],
+    # Seconds between two reads of the outbox, shared by all the streams of
+    # a process.
+    "POLL_INTERVAL": 1,
+    "BATCH_SIZE": 500,
+    # Events a stream may fall behind before it is closed to catch up.
+    "QUEUE_SIZE": 100,
+    # Seconds between keep-alive comments on idle streams.
+    "HEARTBEAT": 15,
+    # Seconds clients wait before reconnecting.
+    "RETRY": 3,
+    # Lifetime of the tickets authenticating browsers, which pass them in
+    # the query string (core.views.StreamTicket).
+    "TICKET_LIFETIME": timedelta(seconds=60),
+}
+
+# Responses to requests sent with an Idempotency-Key header, replayed on
+# retries (core.mixins.IdempotentCreateMixin).
+IDEMPOTENCY = {
+    "TTL": timedelta(hours=24),
+    # Seconds a duplicate waits for the first request before getting a 409.
+    "WAIT_TIMEOUT": 10,
+    # Seconds after which a request still in progress is assumed dead.
+    "LOCK_TIMEOUT": 60,
+}
+
+# Token bucket rate limits applied by core.middleware.RateLimitMiddleware,
+# in order; see core.ratelimit.Rule. The local store keeps buckets in each
+# process; core.ratelimit.SharedBucketStore syncs them through CACHES.
+RATE_LIMITS = {
+    "STORE": {
+        "BACKEND": "core.ratelimit.LocalBucketStore",
+        "OPTIONS": {"max_entries": 100_000},
+    },
+    # Number of proxies setting X-Forwarded-For in front of the app.
+    "NUM_PROXIES": None,
+    "RULES": [
+        # Unauthenticated endpoints, by client address.
+        {
+            "name": "signup",
+            "path": r"^/api/v1/accounts/signup/$",
+            "methods": ["POST"],
+            "scope": "ip",
+            "rate": "10/hour",
+            "burst": 5,
+        },
+        {
+            "name": "token",
+            "path": r"^/api/v1/accounts/token/",
+            "methods": ["POST"],
+            "scope": "ip",
+            "rate": "20/min",
+            "burst": 10,
+        },
+        # Each call is billed by the bank verification API.
+        {
+            "name": "verify",
+            "path": r"^/api/v1/referrals/verify/$",
+            "scope": "user",
+            "rate": "30/hour",
+            "burst": 5,
+        },
+        {
+            "name": "verify-all",
+            "path": r"^/api/v1/referrals/verify/$",
+            "scope": "global",
+            "rate": "600/hour",
+            "burst": 20,
+        },
+        {
+            "name": "api",
+            "path": r"^/api/",
+            "scope": "user",
+            "rate": "20/s",
+            "burst": 100,
+        },
+    ],
+}
+
 # REST framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.ORJSONRenderer",
+        "core.renderers.MessagePackRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.ORJSONParser",
+        "core.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
@@ -166,6 +381,18 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "upload-offset",
+    "if-none-match",
+    "if-modified-since",
+    "idempotency-key",
+    "last-event-id",
+]
+
+CORS_EXPOSE_HEADERS = [
+    "upload-offset",
+    "etag",
+    "last-modified",
+    "idempotent-replayed",
 ]
 
 # CSRF
@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 
 import dj_database_url
+from psycopg_pool import ConnectionPool
 
 
 
@@ -31,6 +32,7 @@ INSTALLED_APPS = [
     "corsheaders",
     "drf_spectacular",
     # Local
+    "core.apps.CoreConfig",
     "useraccounts.apps.UseraccountsConfig",
     "referrals.apps.ReferralsConfig",
 ]
@@ -38,13 +40,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "core.middleware.RateLimitMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.PrimaryPinningMiddleware",
 ]
 
 ROOT_URLCONF = "global_cluster_backend.urls"
@@ -67,6 +72,37 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "global_cluster_backend.wsgi.application"
 
+# Connection handling. With DB_POOL_ENABLED each worker process shares a
+# psycopg pool between its threads; otherwise every thread keeps its own
+# persistent connection for DB_CONN_MAX_AGE seconds.
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "False") == "True"
+DB_POOL_OPTIONS = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    # Seconds a request waits for a free connection before failing.
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    # Seconds before idle connections above min_size are closed.
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+    # Seconds before a connection is recycled, whatever its use.
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+    # Ping connections when they are handed out, dropping broken ones.
+    "check": ConnectionPool.check_connection,
+}
+# Django refuses persistent connections on top of a pool.
+DB_CONN_MAX_AGE = 0 if DB_POOL_ENABLED else int(os.getenv("DB_CONN_MAX_AGE", "500"))
+
+
+def database_options(config):
+    """
+    Returns ``config`` with the connection settings above applied.
+    """
+    config["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+    config["CONN_HEALTH_CHECKS"] = not DB_POOL_ENABLED
+    if DB_POOL_ENABLED:
+        config["OPTIONS"] = {**config.get("OPTIONS", {}), "pool": DB_POOL_OPTIONS}
+    return config
+
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -80,8 +116,46 @@ DATABASES = {
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-db_from_env = dj_database_url.config(default=DATABASE_URL, conn_max_age=500)
+db_from_env = dj_database_url.config(default=DATABASE_URL)
 DATABASES["default"].update(db_from_env)
+database_options(DATABASES["default"])
+
+# Comma separated URLs of read replicas, registered as replica_1, replica_2...
+REPLICA_URLS = [url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url]
+for index, url in enumerate(REPLICA_URLS, start=1):
+    DATABASES[f"replica_{index}"] = {
+        **database_options(dj_database_url.parse(url.strip())),
+        # Tests run against the primary's test database only.
+        "TEST": {"MIRROR": "default"},
+    }
+
+# Read replicas: any database besides "default" is used as a replica by the
+# viewsets using core.mixins.ReplicaReadMixin.
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+# Replicas lagging more than this many seconds are skipped.
+REPLICA_MAX_LAG = 5
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+# How long a user reads from the primary after writing, in seconds.
+REPLICA_PIN_SECONDS = 10
+
+# Shared by every worker process: it holds the primary pins above, which
+# must follow users across workers, and the shared rate limit buckets and
+# response cache when enabled. Redis when REDIS_URL is set, otherwise the
+# database cache (created by "manage.py createcachetable").
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
+    }
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,6 +183,12 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "blobs": {
+        "BACKEND": "core.storage.ContentAddressedStorage",
+    },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
@@ -121,12 +201,194 @@ AUTH_USER_MODEL = "useraccounts.CustomUser"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "mediafiles"
 
+# Uploads
+FILE_UPLOAD_HANDLERS = ["core.uploads.StreamingUploadHandler"]
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10 MB
+UPLOAD_ALLOWED_EXTENSIONS = {
+    "product_image": ["png", "jpg", "jpeg", "tiff"],
+    "attachments": ["png", "jpg", "jpeg", "tiff", "pdf"],
+}
+CHUNKED_UPLOAD_EXPIRY = timedelta(days=1)
+# Unreferenced blobs younger than this are kept, they may belong to an
+# upload whose row has not been committed yet.
+BLOB_GC_GRACE_PERIOD = timedelta(hours=1)
+
+# Image variants (longest side in pixels, by label)
+IMAGE_VARIANTS = {"thumbnail": 128, "small": 320, "medium": 800}
+IMAGE_VARIANT_FORMAT = "WEBP"
+IMAGE_VARIANT_QUALITY = 80
+# Size of the process pool rendering variants; 0 renders inline.
+IMAGE_PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", "2"))
+# Render variants in run_task_worker processes ("images" queue) instead of
+# a pool owned by each web process.
+IMAGE_PIPELINE_TASK_QUEUE = os.getenv("IMAGE_PIPELINE_TASK_QUEUE", "False") == "True"
+
+# Admin changelists estimate their row count from the query plan once the
+# planner expects at least this many rows (PostgreSQL only).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10_000
+
+# Append every SELECT/UPDATE/DELETE to this file, for the audit_indexes
+# command to replay. Leave unset outside of profiling runs.
+QUERY_CAPTURE_LOG = os.getenv("QUERY_CAPTURE_LOG")
+
+# Cache of list/retrieve responses (core.mixins.CachedResponseMixin). The
+# in-process LRU needs no infrastructure but is private to each worker; use
+# "core.cache.DjangoCache" with a shared CACHES entry to invalidate across
+# workers immediately.
+RESPONSE_CACHE = {
+    "BACKEND": os.getenv("RESPONSE_CACHE_BACKEND", "core.cache.LRUCache"),
+    "OPTIONS": {},
+    # Seconds, also the staleness bound between workers with the LRU.
+    "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", "60")),
+}
+
+RESPONSE_COMPRESSION = {
+    "MIN_SIZE": int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "860")),
+    "GZIP_LEVEL": int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "6")),
+    "BROTLI_QUALITY": int(os.getenv("RESPONSE_COMPRESSION_BROTLI_QUALITY", "5")),
+    "CONTENT_TYPES": [
+        "application/json",
+        "application/msgpack",
+        "application/vnd.oai.openapi",
+    ],
+}
+
+ACCOUNT_VERIFICATION_URL = os.getenv(
+    "ACCOUNT_VERIFICATION_URL", "http://nubapi.test/api/verify"
+)
+ACCOUNT_VERIFICATION_TOKEN = os.getenv("ACCOUNT_VERIFICATION_TOKEN", "")
+
+# Background tasks (core.tasks), run by the run_task_worker command.
+TASK_QUEUE = {
+    # Run tasks when they are queued, in the caller's process.
+    "EAGER": os.getenv("TASK_QUEUE_EAGER", "False") == "True",
+    # Queues served by workers started without --queue.
+    "QUEUES": ["default", "images"],
+    # Seconds an idle worker waits before looking for tasks again.
+    "POLL_INTERVAL": float(os.getenv("TASK_QUEUE_POLL_INTERVAL", "1")),
+    # Seconds after which a running task is assumed to have lost its worker.
+    "LOCK_TIMEOUT": 600,
+    # Seconds before the first retry, doubled on each further attempt.
+    "RETRY_BACKOFF": 10,
+    "RETRY_BACKOFF_MAX": 3600,
+}
+
+# Transactional outbox (core.models.OutboxMixin): change events are relayed
+# to these sinks by the relay_outbox command.
+OUTBOX = {
+    "SINKS": [{"BACKEND": "core.outbox.LogSink"}],
+    "BATCH_SIZE": int(os.getenv("OUTBOX_BATCH_SIZE", "100")),
+    "POLL_INTERVAL": float(os.getenv("OUTBOX_POLL_INTERVAL", "1")),
+    "RETENTION": timedelta(days=7),
+}
+if os.getenv("OUTBOX_WEBHOOK_URL"):
+    OUTBOX["SINKS"].append(
+        {
+            "BACKEND": "core.outbox.WebhookSink",
+            "OPTIONS": {
+                "url": os.getenv("OUTBOX_WEBHOOK_URL"),
+                "secret": os.getenv("OUTBOX_WEBHOOK_SECRET"),
+            },
+        }
+    )
+
+# Server-Sent Events stream of outbox events (core.views.event_stream).
+SSE = {
+    # Models whose events are streamed.
+    "MODELS": [
+        "referrals.Product",
+        "referrals.SupportTicket",
+        "useraccounts.CustomUser",
+    ],
+    # Seconds between two reads of the outbox, shared by all the streams of
+    # a process.
+    "POLL_INTERVAL": float(os.getenv("SSE_POLL_INTERVAL", "1")),
+    "BATCH_SIZE": 500,
+    # Events a stream may fall behind before it is closed to catch up.
+    "QUEUE_SIZE": 100,
+    # Seconds between keep-alive comments on idle streams.
+    "HEARTBEAT": 15,
+    # Seconds clients wait before reconnecting.
+    "RETRY": 3,
+    # Lifetime of the tickets authenticating browsers, which pass them in
+    # the query string (core.views.StreamTicket).
+    "TICKET_LIFETIME": timedelta(seconds=60),
+}
+
+# Responses to requests sent with an Idempotency-Key header, replayed on
+# retries (core.mixins.IdempotentCreateMixin).
+IDEMPOTENCY = {
+    "TTL": timedelta(hours=24),
+    # Seconds a duplicate waits for the first request before getting a 409.
+    "WAIT_TIMEOUT": 10,
+    # Seconds after which a request still in progress is assumed dead.
+    "LOCK_TIMEOUT": 60,
+}
+
+RATE_LIMITS = {
+    "STORE": {
+        "BACKEND": os.getenv("RATE_LIMIT_STORE", "core.ratelimit.LocalBucketStore"),
+        "OPTIONS": {},
+    },
+    "NUM_PROXIES": int(os.getenv("RATE_LIMIT_NUM_PROXIES", "0")) or None,
+    "RULES": [
+        # Unauthenticated endpoints, by client address.
+        {
+            "name": "signup",
+            "path": r"^/api/v1/accounts/signup/$",
+            "methods": ["POST"],
+            "scope": "ip",
+            "rate": "10/hour",
+            "burst": 5,
+        },
+        {
+            "name": "token",
+            "path": r"^/api/v1/accounts/token/",
+            "methods": ["POST"],
+            "scope": "ip",
+            "rate": "20/min",
+            "burst": 10,
+        },
+        # Each call is billed by the bank verification API.
+        {
+            "name": "verify",
+            "path": r"^/api/v1/referrals/verify/$",
+            "scope": "user",
+            "rate": "30/hour",
+            "burst": 5,
+        },
+        {
+            "name": "verify-all",
+            "path": r"^/api/v1/referrals/verify/$",
+            "scope": "global",
+            "rate": "600/hour",
+            "burst": 20,
+        },
+        {
+            "name": "api",
+            "path": r"^/api/",
+            "scope": "user",
+            "rate": "20/s",
+            "burst": 100,
+        },
+    ],
+}
+
 # REST framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.ORJSONRenderer",
+        "core.renderers.MessagePackRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.ORJSONParser",
+        "core.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
@@ -187,6 +449,18 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "upload-offset",
+    "if-none-match",
+    "if-modified-since",
+    "idempotency-key",
+    "last-event-id",
+]
+
+CORS_EXPOSE_HEADERS = [
+    "upload-offset",
+    "etag",
+    "last-modified",
+    "idempotent-replayed",
 ]
 
 # CSRF
@@ -29,6 +29,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/v1/accounts/", include("useraccounts.urls")),
     path("api/v1/referrals/", include("referrals.urls")),
+    path("api/v1/", include("core.urls")),
     path("api/v1/api-schema/", SpectacularAPIView.as_view(), name="api-schema"),
     path(
         "api/v1/api-schema/swagger-ui/",
@@ -1,26 +1,33 @@
 from django.contrib import admin
 
+from core.admin_utils import AutocompleteFilter, LargeTableAdminMixin
 from .models import Product, SupportTicket, UserRanking, Staff
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin class for the Product model.
     """
 
     list_display = ["product_name", "company", "date_created", "date_updated"]
-    list_filter = ["company"]
+    list_filter = ["status", ("company", AutocompleteFilter)]
+    list_select_related = ["company"]
+    search_fields = ["product_name"]
+    autocomplete_fields = ["company"]
 
 
 @admin.register(SupportTicket)
-class SupportTicketAdmin(admin.ModelAdmin):
+class SupportTicketAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Admin class for the SupportTicket model.
     """
 
     list_display = ["title", "submitted_by", "date_created", "date_updated"]
     list_filter = ["support", "status", "priority"]
+    list_select_related = ["submitted_by"]
+    search_fields = ["title"]
+    autocomplete_fields = ["submitted_by", "claimed_by"]
 
 
 @admin.register(UserRanking)
@@ -41,3 +48,5 @@ class StaffAdmin(admin.ModelAdmin):
 
     list_display = ["user", "role"]
     list_filter = ["role"]
+    list_select_related = ["user"]
+    autocomplete_fields = ["user"]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ReferralsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "referrals"
+
+    def ready(self):
+        """
+        Connect the signal handlers of the app.
+        """
+        from . import signals  # noqa: F401
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from referrals.search import SEARCH_FIELDS, get_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the full-text search index of products and support tickets.
+
+    Only needed on backends that keep the index outside the table (SQLite
+    FTS5), after changes that bypass model signals such as
+    ``QuerySet.update()`` or ``bulk_create()``.
+    """
+
+    help = "Rebuild the full-text search index of products and support tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to rebuild the index on.",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend(options["database"])
+        for model in SEARCH_FIELDS:
+            count = backend.rebuild(model)
+            if count is None:
+                self.stdout.write(
+                    f"{model._meta.label}: index is maintained by the database."
+                )
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(f"{model._meta.label}: indexed {count} rows.")
+                )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from referrals.summaries import reconcile
+
+
+class Command(BaseCommand):
+    """
+    Recompute the dashboard summaries of every company.
+
+    Summaries are updated as products and tickets are saved and deleted;
+    this repairs the drift left by changes that bypass model signals, such
+    as ``QuerySet.update()`` or ``bulk_create()``. Run it periodically, e.g.
+    nightly from cron.
+    """
+
+    help = "Recompute company dashboard summaries and fix those that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to reconcile the summaries on.",
+        )
+
+    def handle(self, *args, **options):
+        fixed = reconcile(options["database"])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} company summaries."))
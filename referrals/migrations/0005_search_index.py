@@ -0,0 +1,73 @@
+from django.db import migrations
+
+# (table, weighted columns) pairs covered by the full-text index. Column
+# order doubles as weight order: the first column is the title-like field.
+SEARCH_TABLES = [
+    ("referrals_product", ["product_name", "description"]),
+    ("referrals_supportticket", ["title", "description"]),
+]
+
+
+def sqlite_has_fts5(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return ("ENABLE_FTS5",) in cursor.fetchall()
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create the full-text index of each searchable table.
+
+    PostgreSQL gets a generated, weighted tsvector column with a GIN index.
+    SQLite gets an FTS5 table seeded with the existing rows; later changes
+    are applied from the model signals.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for table, (title, body) in SEARCH_TABLES:
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ("
+                f"setweight(to_tsvector('english', coalesce({title}, '')), 'A') || "
+                f"setweight(to_tsvector('english', coalesce({body}, '')), 'B')"
+                f") STORED"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX {table}_search_idx ON {table} USING gin (search_vector)"
+            )
+    elif vendor == "sqlite" and sqlite_has_fts5(schema_editor):
+        # No porter stemming: it rewrites prefix terms ("pay" -> "pai"),
+        # which breaks the prefix matching the search endpoints rely on.
+        for table, columns in SEARCH_TABLES:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+                f"object_id UNINDEXED, {', '.join(columns)}, "
+                f"tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table}_fts (object_id, {', '.join(columns)}) "
+                f"SELECT uuid, {', '.join(columns)} FROM {table}"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    """
+    Drop the full-text index of each searchable table.
+    """
+    vendor = schema_editor.connection.vendor
+    for table, _ in SEARCH_TABLES:
+        if vendor == "postgresql":
+            schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN search_vector")
+        elif vendor == "sqlite":
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("referrals", "0004_supportticket_triage_queue"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
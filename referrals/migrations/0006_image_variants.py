@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("referrals", "0005_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="product_image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="userranking",
+            name="icon_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:21
+
+import core.storage
+import django.core.validators
+import referrals.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("referrals", "0006_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="product_image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=core.storage.blob_storage,
+                upload_to="product_images/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["png", "jpg", "jpeg", "tiff"]
+                    ),
+                    referrals.validators.validate_file_size,
+                ],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="supportticket",
+            name="attachments",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=core.storage.blob_storage,
+                upload_to="support_ticket_attachments/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["png", "jpg", "jpeg", "tiff", "pdf"]
+                    ),
+                    referrals.validators.validate_file_size,
+                ],
+            ),
+        ),
+    ]
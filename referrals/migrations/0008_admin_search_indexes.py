@@ -0,0 +1,17 @@
+from django.db import migrations
+
+from core.operations import AddTrigramIndex
+
+
+class Migration(migrations.Migration):
+    # Trigram indexes are built concurrently, outside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("referrals", "0007_blob_storage"),
+    ]
+
+    operations = [
+        AddTrigramIndex("product", "product_name", "product_name_trgm_idx"),
+        AddTrigramIndex("supportticket", "title", "supportticket_title_trgm_idx"),
+    ]
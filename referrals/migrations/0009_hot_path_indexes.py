@@ -0,0 +1,46 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("referrals", "0008_admin_search_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="product",
+            index=models.Index(
+                fields=["status", "-date_created"], name="product_status_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="product",
+            index=models.Index(
+                fields=["company", "status"], name="product_company_status_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="supportticket",
+            index=models.Index(
+                fields=["submitted_by", "status", "priority"],
+                name="supportticket_submitter_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="supportticket",
+            index=models.Index(
+                condition=models.Q(("claimed_by__isnull", False)),
+                fields=["claimed_by", "status"],
+                name="supportticket_claimed_idx",
+            ),
+        ),
+    ]
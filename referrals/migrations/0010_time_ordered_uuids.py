@@ -0,0 +1,34 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:28
+
+import core.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("referrals", "0009_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="uuid",
+            field=models.UUIDField(
+                default=core.uuids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="supportticket",
+            name="uuid",
+            field=models.UUIDField(
+                default=core.uuids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.2 on 2026-10-19 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("referrals", "0010_time_ordered_uuids"),
+        ("useraccounts", "0004_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompanySummary",
+            fields=[
+                (
+                    "company",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("products_pending", models.IntegerField(default=0)),
+                ("products_active", models.IntegerField(default=0)),
+                ("products_declined", models.IntegerField(default=0)),
+                ("total_traffic", models.BigIntegerField(default=0)),
+                ("total_shares", models.BigIntegerField(default=0)),
+                ("tickets_open", models.IntegerField(default=0)),
+                ("tickets_resolved", models.IntegerField(default=0)),
+                ("date_updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Company Summary",
+                "verbose_name_plural": "Company Summaries",
+            },
+        ),
+    ]
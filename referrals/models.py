@@ -1,18 +1,23 @@
 from django.db import models
-from uuid import uuid4
 from django.core.validators import MaxValueValidator, FileExtensionValidator
 from useraccounts.models import CompanyProfile, CustomUser
 from .validators import validate_file_size
 from django.conf import settings
+from core.models import OutboxMixin
+from core.storage import blob_storage
+from core.uuids import uuid7
 from useraccounts.models import CustomUser
 
 
-class Product(models.Model):
+class Product(OutboxMixin, models.Model):
     """
     Product model.
     """
 
-    uuid = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    outbox_fields = ("status",)
+    outbox_owner_field = "company_id"
+
+    uuid = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     product_name = models.CharField(max_length=255)
     company = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE, related_name="products"
@@ -24,11 +29,13 @@ class Product(models.Model):
         blank=True,
         null=True,
         upload_to="product_images/",
+        storage=blob_storage,
         validators=[
             FileExtensionValidator(allowed_extensions=["png", "jpg", "jpeg", "tiff"]),
             validate_file_size,
         ],
     )
+    product_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     product_value = models.CharField(
         max_length=10,
         choices=[("whatsapp", "Whatsapp"), ("phone", "Phone"), ("website", "Website")],
@@ -55,6 +62,16 @@ class Product(models.Model):
 
         verbose_name = "Product"
         verbose_name_plural = "Products"
+        indexes = [
+            # Listings filtered by moderation status, newest first.
+            models.Index(
+                fields=["status", "-date_created"], name="product_status_created_idx"
+            ),
+            # A company's products filtered by status.
+            models.Index(
+                fields=["company", "status"], name="product_company_status_idx"
+            ),
+        ]
 
     def __str__(self):
         """
@@ -66,12 +83,15 @@ class Product(models.Model):
         return self.product_name
 
 
-class SupportTicket(models.Model):
+class SupportTicket(OutboxMixin, models.Model):
     """
     A model representing a support ticket.
     """
 
-    uuid = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    outbox_fields = ("status",)
+    outbox_owner_field = "submitted_by_id"
+
+    uuid = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
     submitted_by = models.ForeignKey(
@@ -103,6 +123,7 @@ class SupportTicket(models.Model):
         blank=True,
         null=True,
         upload_to="support_ticket_attachments/",
+        storage=blob_storage,
         validators=[
             FileExtensionValidator(
                 allowed_extensions=["png", "jpg", "jpeg", "tiff", "pdf"]
@@ -110,6 +131,14 @@ class SupportTicket(models.Model):
             validate_file_size,
         ],
     )
+    claimed_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="claimed_support_tickets",
+    )
+    claimed_at = models.DateTimeField(blank=True, null=True)
 
     def save(self, *args, **kwargs):
         """
@@ -125,7 +154,7 @@ class SupportTicket(models.Model):
             None
         """
         if not self.uuid:
-            self.uuid = uuid4()
+            self.uuid = uuid7()
         super().save(*args, **kwargs)
 
     class Meta:
@@ -135,6 +164,26 @@ class SupportTicket(models.Model):
 
         verbose_name = "Support Ticket"
         verbose_name_plural = "Support Tickets"
+        indexes = [
+            # Backs the staff triage queue: one range scan per priority bucket,
+            # already in age order, restricted to tickets nobody has claimed.
+            models.Index(
+                fields=["status", "priority", "date_created"],
+                name="supportticket_triage_idx",
+                condition=models.Q(claimed_by__isnull=True),
+            ),
+            # A user's own tickets, filtered by status and priority.
+            models.Index(
+                fields=["submitted_by", "status", "priority"],
+                name="supportticket_submitter_idx",
+            ),
+            # Tickets a staff member is working on; most tickets are unclaimed.
+            models.Index(
+                fields=["claimed_by", "status"],
+                name="supportticket_claimed_idx",
+                condition=models.Q(claimed_by__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         """
@@ -146,6 +195,56 @@ class SupportTicket(models.Model):
         return self.title
 
 
+class CompanySummary(models.Model):
+    """
+    Running totals of a company's products and support tickets, for the
+    dashboard.
+
+    Kept up to date by ``referrals.summaries`` as products and tickets are
+    saved and deleted, and recomputed by ``reconcile_company_summaries``
+    to repair the drift left by bulk writes.
+    """
+
+    company = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="summary",
+    )
+    products_pending = models.IntegerField(default=0)
+    products_active = models.IntegerField(default=0)
+    products_declined = models.IntegerField(default=0)
+    total_traffic = models.BigIntegerField(default=0)
+    total_shares = models.BigIntegerField(default=0)
+    tickets_open = models.IntegerField(default=0)
+    tickets_resolved = models.IntegerField(default=0)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta class for the CompanySummary model.
+        """
+
+        verbose_name = "Company Summary"
+        verbose_name_plural = "Company Summaries"
+
+    def __str__(self):
+        """
+        Returns a string representation of the object.
+
+        :return: The id of the company.
+        :rtype: str
+        """
+        return str(self.company_id)
+
+    @property
+    def product_count(self):
+        """
+        Returns the number of products of the company, in any status.
+        """
+        return self.products_pending + self.products_active + self.products_declined
+
+
 class UserRanking(models.Model):
     """
     User ranking model for the referral program.
@@ -157,6 +256,7 @@ class UserRanking(models.Model):
         blank=True,
         null=True,
     )
+    icon_variants = models.JSONField(default=dict, blank=True, editable=False)
     user = models.CharField(max_length=255, blank=True, null=True)
     rank_level = models.IntegerField(default=0)
     NAME_CHOICES = [
@@ -0,0 +1,247 @@
+import re
+from functools import lru_cache
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Product, SupportTicket
+
+# Fields covered by the full-text index of each searchable model, most
+# relevant first. Must stay in sync with migration 0005.
+SEARCH_FIELDS = {
+    Product: ("product_name", "description"),
+    SupportTicket: ("title", "description"),
+}
+
+# Only word characters reach the database, so user input can never inject
+# query-syntax operators into to_tsquery() or an FTS5 MATCH expression.
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TOKENS = 8
+
+PG_SEARCH_CONFIG = "english"
+
+
+def tokenize(query):
+    """
+    Split a raw search string into at most ``MAX_TOKENS`` lowercase terms.
+
+    Args:
+        query (str): The user supplied search string.
+
+    Returns:
+        list[str]: The search terms.
+    """
+    return [token.lower() for token in TOKEN_RE.findall(query or "")][:MAX_TOKENS]
+
+
+def fts_table(model):
+    """
+    Returns the name of the SQLite FTS5 table that indexes ``model``.
+    """
+    return f"{model._meta.db_table}_fts"
+
+
+class SearchBackend:
+    """
+    Basic backend that falls back to ``icontains`` filtering.
+
+    Used for databases without a native full-text index. Results are not
+    ranked.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, queryset, tokens):
+        """
+        Filter ``queryset`` down to the rows matching every token.
+
+        Args:
+            queryset (QuerySet): The queryset to search in.
+            tokens (list[str]): The search terms, as returned by ``tokenize``.
+
+        Returns:
+            QuerySet: The filtered queryset.
+        """
+        fields = SEARCH_FIELDS[queryset.model]
+        for token in tokens:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f"{field}__icontains": token})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def update(self, instance):
+        """
+        Refresh the index entry of ``instance`` after it has been saved.
+        """
+
+    def delete(self, instance):
+        """
+        Drop the index entry of ``instance`` after it has been deleted.
+        """
+
+    def rebuild(self, model):
+        """
+        Rebuild the whole index of ``model``.
+
+        Returns:
+            int: The number of indexed rows, or None if nothing was rebuilt.
+        """
+        return None
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Backend using the generated ``search_vector`` tsvector column and its GIN
+    index. PostgreSQL maintains the column itself on every insert and update.
+    """
+
+    def search(self, queryset, tokens):
+        table = self.connection.ops.quote_name(queryset.model._meta.db_table)
+        ts_query = " & ".join(f"{token}:*" for token in tokens)
+        return (
+            queryset.filter(
+                RawSQL(
+                    f"{table}.search_vector @@ to_tsquery(%s::regconfig, %s)",
+                    (PG_SEARCH_CONFIG, ts_query),
+                    output_field=BooleanField(),
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f"ts_rank_cd({table}.search_vector, "
+                    f"to_tsquery(%s::regconfig, %s))",
+                    (PG_SEARCH_CONFIG, ts_query),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank")
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    Backend using an FTS5 virtual table per model, kept up to date from the
+    ``post_save``/``post_delete`` signals in ``referrals.signals``.
+    """
+
+    def _db_pk(self, instance):
+        return instance._meta.pk.get_db_prep_value(instance.pk, self.connection)
+
+    def search(self, queryset, tokens):
+        opts = queryset.model._meta
+        qn = self.connection.ops.quote_name
+        table = qn(opts.db_table)
+        pk_column = qn(opts.pk.column)
+        fts = qn(fts_table(queryset.model))
+        match = " ".join(f'"{token}"*' for token in tokens)
+        return (
+            queryset.filter(
+                RawSQL(
+                    f"{table}.{pk_column} IN "
+                    f"(SELECT object_id FROM {fts} WHERE {fts} MATCH %s)",
+                    (match,),
+                    output_field=BooleanField(),
+                )
+            )
+            .annotate(
+                # bm25() is lower-is-better, negate it to rank like Postgres.
+                # The first weight is for the unindexed object_id column.
+                search_rank=RawSQL(
+                    f"(SELECT -bm25({fts}, 0.0, 4.0, 1.0) FROM {fts} "
+                    f"WHERE {fts} MATCH %s "
+                    f"AND {fts}.object_id = {table}.{pk_column})",
+                    (match,),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank")
+        )
+
+    def update(self, instance):
+        fields = SEARCH_FIELDS[type(instance)]
+        fts = self.connection.ops.quote_name(fts_table(type(instance)))
+        columns = ", ".join(fields)
+        placeholders = ", ".join(["%s"] * (len(fields) + 1))
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {fts} WHERE object_id = %s", [self._db_pk(instance)]
+            )
+            cursor.execute(
+                f"INSERT INTO {fts} (object_id, {columns}) VALUES ({placeholders})",
+                [self._db_pk(instance)]
+                + [getattr(instance, field) or "" for field in fields],
+            )
+
+    def delete(self, instance):
+        fts = self.connection.ops.quote_name(fts_table(type(instance)))
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {fts} WHERE object_id = %s", [self._db_pk(instance)]
+            )
+
+    def rebuild(self, model):
+        qn = self.connection.ops.quote_name
+        fields = SEARCH_FIELDS[model]
+        columns = ", ".join(fields)
+        source = ", ".join(qn(model._meta.get_field(field).column) for field in fields)
+        fts = qn(fts_table(model))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {fts}")
+            cursor.execute(
+                f"INSERT INTO {fts} (object_id, {columns}) "
+                f"SELECT {qn(model._meta.pk.column)}, {source} "
+                f"FROM {qn(model._meta.db_table)}"
+            )
+            return cursor.rowcount
+
+
+@lru_cache(maxsize=None)
+def sqlite_has_fts5(alias):
+    """
+    Returns whether the SQLite library behind ``alias`` was built with FTS5.
+    """
+    with connections[alias].cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return ("ENABLE_FTS5",) in cursor.fetchall()
+
+
+def get_backend(using="default"):
+    """
+    Returns the search backend for the database ``using``.
+
+    Args:
+        using (str): The database alias.
+
+    Returns:
+        SearchBackend: The backend matching the database vendor.
+    """
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend(connection)
+    if connection.vendor == "sqlite" and sqlite_has_fts5(using):
+        return SQLiteSearchBackend(connection)
+    return SearchBackend(connection)
+
+
+def search(queryset, query):
+    """
+    Full-text search ``queryset`` for ``query`` with prefix matching.
+
+    Every term must match (as a prefix) in one of the indexed fields of the
+    model. Results are ordered by relevance, title fields weighing more than
+    descriptions.
+
+    Args:
+        queryset (QuerySet): A queryset of a model in ``SEARCH_FIELDS``.
+        query (str): The user supplied search string.
+
+    Returns:
+        QuerySet: The matching rows, best match first.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.none()
+    return get_backend(queryset.db).search(queryset, tokens)
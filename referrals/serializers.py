@@ -1,13 +1,23 @@
 from rest_framework import serializers
-from .models import Product, SupportTicket, UserRanking, Staff
+from core.moderation import MAX_ITEMS
+from core.serializers import (
+    BulkStatusSerializer,
+    ChunkedUploadField,
+    ImageVariantsField,
+    SparseFieldsMixin,
+)
+from .models import CompanySummary, Product, SupportTicket, UserRanking, Staff
 from useraccounts.models import CustomUser
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Product model.
     """
 
+    product_image_upload = ChunkedUploadField(source="product_image")
+    product_image_variants = ImageVariantsField()
+
     class Meta:
         """
         Meta class for the Product model.
@@ -33,11 +43,40 @@ class ProductSerializer(serializers.ModelSerializer):
         return data
 
 
-class SupportTicketSerializer(serializers.ModelSerializer):
+class ProductBulkFilterSerializer(serializers.Serializer):
+    """
+    Serializer for the filter of bulk product status changes.
+    """
+
+    company = serializers.IntegerField(required=False, min_value=1)
+    created_before = serializers.DateTimeField(required=False)
+
+
+class ProductBulkStatusSerializer(BulkStatusSerializer):
+    """
+    Serializer for bulk product status changes.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        min_length=1,
+        max_length=MAX_ITEMS,
+        required=False,
+    )
+    filter = ProductBulkFilterSerializer(required=False)
+    status = serializers.ChoiceField(choices=Product.STATUS_CHOICES)
+    from_status = serializers.ChoiceField(
+        choices=Product.STATUS_CHOICES, required=False
+    )
+
+
+class SupportTicketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the SupportTicket model.
     """
 
+    attachments_upload = ChunkedUploadField(source="attachments")
+
     class Meta:
         """
         Meta class for the SupportTicket model.
@@ -45,7 +84,7 @@ class SupportTicketSerializer(serializers.ModelSerializer):
 
         model = SupportTicket
         fields = "__all__"
-        read_only_fields = ("submitted_by",)
+        read_only_fields = ("submitted_by", "claimed_by", "claimed_at")
 
     def validate(self, data):
         """
@@ -68,11 +107,55 @@ class SupportTicketSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class TriageQueueSerializer(serializers.Serializer):
+    """
+    Serializer for the staff triage queue query parameters.
+    """
+
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    priority = serializers.MultipleChoiceField(
+        choices=SupportTicket.PRIORITY_CHOICES, required=False
+    )
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """
+    Serializer for full-text search query parameters.
+    """
+
+    q = serializers.CharField(max_length=255)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    company = serializers.IntegerField(required=False)
+
+
+class ProductSearchSerializer(SearchQuerySerializer):
+    """
+    Serializer for the product search query parameters.
+    """
+
+    status = serializers.ChoiceField(choices=Product.STATUS_CHOICES, required=False)
+
+
+class SupportTicketSearchSerializer(SearchQuerySerializer):
+    """
+    Serializer for the support ticket search query parameters.
+    """
+
+    status = serializers.ChoiceField(
+        choices=SupportTicket.STATUS_CHOICES, required=False
+    )
+    priority = serializers.ChoiceField(
+        choices=SupportTicket.PRIORITY_CHOICES, required=False
+    )
+
+
 class UserRankingSerializer(serializers.ModelSerializer):
     """
     Serializer for the UserRanking model.
     """
 
+    icon_variants = ImageVariantsField()
+
     class Meta:
         """
         Meta class for the UserRankingSerializer.
@@ -82,6 +165,42 @@ class UserRankingSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class CompanySummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer for the CompanySummary model.
+    """
+
+    product_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        """
+        Meta class for the CompanySummarySerializer.
+        """
+
+        model = CompanySummary
+        fields = [
+            "company",
+            "product_count",
+            "products_pending",
+            "products_active",
+            "products_declined",
+            "total_traffic",
+            "total_shares",
+            "tickets_open",
+            "tickets_resolved",
+            "date_updated",
+        ]
+        read_only_fields = fields
+
+
+class CompanySummaryQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the company summary.
+    """
+
+    company = serializers.IntegerField(required=False, min_value=1)
+
+
 class VerifyAccountSerializer(serializers.Serializer):
     """
     Serializer for verifying an account.
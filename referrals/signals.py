@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import register_scope
+from core.images import track_image_field
+from core.storage import track_blob_field
+
+from . import summaries
+from .models import Product, SupportTicket, UserRanking
+from .search import SEARCH_FIELDS, get_backend
+
+track_image_field(Product, "product_image")
+track_image_field(UserRanking, "icon")
+track_blob_field(Product, "product_image")
+track_blob_field(SupportTicket, "attachments")
+register_scope(Product, "company_id")
+register_scope(SupportTicket, "submitted_by_id")
+
+for model in summaries.TRACKED:
+    pre_save.connect(summaries.remember, sender=model)
+    post_save.connect(summaries.record_save, sender=model)
+    post_delete.connect(summaries.record_delete, sender=model)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=SupportTicket)
+def update_search_index(sender, instance, using, update_fields=None, **kwargs):
+    """
+    Refresh the full-text index entry of a saved product or ticket.
+
+    Saves that only touch non-indexed fields are skipped.
+    """
+    if update_fields is not None and not set(update_fields) & set(
+        SEARCH_FIELDS[sender]
+    ):
+        return
+    get_backend(using).update(instance)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=SupportTicket)
+def delete_search_index(sender, instance, using, **kwargs):
+    """
+    Remove a deleted product or ticket from the full-text index.
+    """
+    get_backend(using).delete(instance)
@@ -0,0 +1,309 @@
+from collections import Counter
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from useraccounts.models import CustomUser
+
+from .models import CompanySummary, Product, SupportTicket
+
+# Only the users of this type have a summary; the products and tickets of
+# other users (admins, individuals) are not counted.
+COMPANY_TYPE = "company"
+
+# Summary counter of each status.
+PRODUCT_STATUS_FIELDS = {
+    "pending": "products_pending",
+    "active": "products_active",
+    "declined": "products_declined",
+}
+TICKET_STATUS_FIELDS = {
+    "in-progress": "tickets_open",
+    "resolved": "tickets_resolved",
+}
+
+# How each tracked model contributes to the summary of its owner: the
+# owner field and the fields read to compute the contribution.
+TRACKED = {
+    Product: ("company_id", ("status", "traffic", "shares")),
+    SupportTicket: ("submitted_by_id", ("status",)),
+}
+
+SUMMARY_FIELDS = [
+    *PRODUCT_STATUS_FIELDS.values(),
+    "total_traffic",
+    "total_shares",
+    *TICKET_STATUS_FIELDS.values(),
+]
+
+
+def contribution(model, values):
+    """
+    Returns what a row with ``values`` adds to the summary of its owner.
+
+    A status outside the model's choices is not counted, as in
+    ``compute()``, rather than failing the save.
+
+    Returns:
+        Counter: Summary field -> amount.
+    """
+    counts = Counter()
+    if model is Product:
+        field = PRODUCT_STATUS_FIELDS.get(values["status"])
+        counts["total_traffic"] += values["traffic"]
+        counts["total_shares"] += values["shares"]
+    else:
+        field = TICKET_STATUS_FIELDS.get(values["status"])
+    if field is not None:
+        counts[field] += 1
+    return counts
+
+
+def compute(company_ids=None, using="default"):
+    """
+    Computes summaries from the products and tickets tables, with one
+    grouped query per table.
+
+    Args:
+        company_ids (Iterable[int] | None): The companies to compute, or
+            None for all of them.
+
+    Returns:
+        dict[int, dict]: Summary field values by company id, for the
+            companies owning at least one product or ticket. Users of
+            other types are left out.
+    """
+    products = Product.objects.using(using).filter(company__user_type=COMPANY_TYPE)
+    tickets = SupportTicket.objects.using(using).filter(
+        submitted_by__user_type=COMPANY_TYPE
+    )
+    if company_ids is not None:
+        products = products.filter(company_id__in=company_ids)
+        tickets = tickets.filter(submitted_by_id__in=company_ids)
+    summaries = {}
+    rows = products.values("company_id").annotate(
+        total_traffic=Sum("traffic"),
+        total_shares=Sum("shares"),
+        **{
+            field: Count("pk", filter=Q(status=status))
+            for status, field in PRODUCT_STATUS_FIELDS.items()
+        },
+    )
+    for row in rows.order_by():
+        summaries[row.pop("company_id")] = row
+    rows = tickets.values("submitted_by_id").annotate(
+        **{
+            field: Count("pk", filter=Q(status=status))
+            for status, field in TICKET_STATUS_FIELDS.items()
+        }
+    )
+    for row in rows.order_by():
+        summaries.setdefault(row.pop("submitted_by_id"), {}).update(row)
+    return {
+        company_id: {field: values.get(field) or 0 for field in SUMMARY_FIELDS}
+        for company_id, values in summaries.items()
+    }
+
+
+def is_company(company_id, using="default"):
+    """
+    Returns whether ``company_id`` is a user that has a summary.
+    """
+    return (
+        CustomUser.objects.using(using)
+        .filter(pk=company_id, user_type=COMPANY_TYPE)
+        .exists()
+    )
+
+
+def refresh(company_id, using="default"):
+    """
+    Recomputes the summary of one company from scratch.
+
+    Returns:
+        CompanySummary: The saved summary.
+    """
+    values = compute([company_id], using).get(
+        company_id, dict.fromkeys(SUMMARY_FIELDS, 0)
+    )
+    summary, _ = CompanySummary.objects.using(using).update_or_create(
+        company_id=company_id, defaults=values
+    )
+    return summary
+
+
+def apply(company_id, deltas, using="default", create=True):
+    """
+    Adds ``deltas`` to the summary of a company with a single ``UPDATE``
+    of ``F()`` expressions, so concurrent changes never overwrite each
+    other. A company without a summary gets one computed from scratch,
+    which already includes the change, unless ``create`` is false; other
+    users never get one.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    updated = (
+        CompanySummary.objects.using(using)
+        .filter(company_id=company_id)
+        .update(date_updated=timezone.now(), **changes)
+    )
+    if not updated and create and is_company(company_id, using):
+        try:
+            with transaction.atomic(using=using):
+                refresh(company_id, using)
+        except IntegrityError:
+            # Created concurrently, with or without this change.
+            refresh(company_id, using)
+
+
+def get_summary(company_id):
+    """
+    Returns the summary of a company, creating it on first use. The caller
+    checks that ``company_id`` is a company.
+
+    The lookup goes through the database router, so it may be served by a
+    replica; a missing summary is created on the primary.
+    """
+    summary = CompanySummary.objects.filter(company_id=company_id).first()
+    return summary or refresh(company_id)
+
+
+def reconcile(using="default"):
+    """
+    Recomputes every summary and saves those that drifted. Summaries of
+    users that are not companies, such as those whose type changed, are
+    deleted.
+
+    Returns:
+        int: The number of summaries created, corrected or deleted.
+    """
+    deleted, _ = (
+        CompanySummary.objects.using(using)
+        .exclude(company__user_type=COMPANY_TYPE)
+        .delete()
+    )
+    computed = compute(using=using)
+    zero = dict.fromkeys(SUMMARY_FIELDS, 0)
+    existing = {
+        summary.company_id: summary
+        for summary in CompanySummary.objects.using(using).iterator()
+    }
+    now = timezone.now()
+    changed, created = [], []
+    for company_id, summary in existing.items():
+        values = computed.get(company_id, zero)
+        if any(getattr(summary, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(summary, field, value)
+            summary.date_updated = now
+            changed.append(summary)
+    for company_id, values in computed.items():
+        if company_id not in existing:
+            created.append(CompanySummary(company_id=company_id, **values))
+    CompanySummary.objects.using(using).bulk_update(
+        changed, [*SUMMARY_FIELDS, "date_updated"], batch_size=1000
+    )
+    CompanySummary.objects.using(using).bulk_create(
+        created, batch_size=1000, ignore_conflicts=True
+    )
+    return deleted + len(changed) + len(created)
+
+
+def _is_other_user(sender, instance, owner_id):
+    """
+    Returns whether the owner loaded on ``instance`` is ``owner_id`` and not
+    a company, in which case there is no summary to update. An owner that is
+    not loaded is not fetched.
+    """
+    field = sender._meta.get_field(TRACKED[sender][0])
+    if not field.is_cached(instance):
+        return False
+    owner = field.get_cached_value(instance)
+    return (
+        owner is not None and owner.pk == owner_id and owner.user_type != COMPANY_TYPE
+    )
+
+
+def remember(sender, instance, using, raw=False, update_fields=None, **kwargs):
+    """
+    ``pre_save`` handler loading the values a row contributed before the
+    save.
+
+    In a transaction the row is read with ``SELECT ... FOR UPDATE``, so a
+    concurrent save of the same row waits and computes its change from
+    this one's result.
+    """
+    owner_field, fields = TRACKED[sender]
+    instance._summary_before = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not {owner_field, *fields} & {
+        sender._meta.get_field(name).attname for name in update_fields
+    }:
+        return
+    rows = sender._default_manager.using(using).filter(pk=instance.pk)
+    if connections[using].in_atomic_block:
+        rows = rows.select_for_update()
+    instance._summary_before = rows.values(owner_field, *fields).first()
+
+
+def record_save(sender, instance, using, created, raw=False, **kwargs):
+    """
+    ``post_save`` handler applying the change of a row to the summaries.
+    """
+    if raw:
+        return
+    owner_field, fields = TRACKED[sender]
+    before = getattr(instance, "_summary_before", None)
+    if not created and before is None:
+        return
+    after = {name: getattr(instance, name) for name in (owner_field, *fields)}
+    deltas = {after[owner_field]: contribution(sender, after)}
+    if before is not None:
+        old = deltas.setdefault(before[owner_field], Counter())
+        old.subtract(contribution(sender, before))
+    for company_id, changes in deltas.items():
+        if not _is_other_user(sender, instance, company_id):
+            apply(company_id, changes, using)
+
+
+def record_delete(sender, instance, using, **kwargs):
+    """
+    ``post_delete`` handler removing a row from the summaries.
+
+    Only an existing summary is updated: when the company itself is being
+    deleted, its summary is already gone and must not be created again.
+    """
+    owner_field, fields = TRACKED[sender]
+    values = {name: getattr(instance, name) for name in (owner_field, *fields)}
+    if _is_other_user(sender, instance, values[owner_field]):
+        return
+    changes = contribution(sender, values)
+    apply(
+        values[owner_field],
+        {field: -delta for field, delta in changes.items()},
+        using,
+        create=False,
+    )
+
+
+def record_status_changes(changed, status, using="default"):
+    """
+    Applies products moved to ``status`` by ``core.moderation`` to the
+    summaries of their companies, one ``UPDATE`` per company.
+
+    Args:
+        changed (list[dict]): The ``owner_id`` and ``old`` status of each
+            changed product.
+    """
+    zero = {"traffic": 0, "shares": 0}
+    deltas = {}
+    for row in changed:
+        counts = deltas.setdefault(row["owner_id"], Counter())
+        counts.subtract(contribution(Product, {**zero, "status": row["old"]}))
+        counts.update(contribution(Product, {**zero, "status": status}))
+    # In id order, so concurrent requests lock the summaries in one order.
+    for company_id in sorted(deltas):
+        apply(company_id, deltas[company_id], using)
@@ -1,3 +1,329 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import OutboxEvent
+from useraccounts.models import CustomUser
+
+from . import triage
+from .models import CompanySummary, Product, SupportTicket
+from .summaries import SUMMARY_FIELDS, compute
+
+
+def create_user(email, user_type="company", **kwargs):
+    return CustomUser.objects.create_user(
+        email=email, password="password", name=email, user_type=user_type, **kwargs
+    )
+
+
+def create_product(company, **kwargs):
+    return Product.objects.create(
+        product_name="Product",
+        company=company,
+        description="Description",
+        product_link="https://example.com",
+        **kwargs,
+    )
+
+
+class CompanySummaryTests(TestCase):
+    """
+    Tests of the summaries maintained by ``referrals.summaries``.
+    """
+
+    def setUp(self):
+        self.company = create_user("company@example.com")
+        self.other = create_user("other@example.com")
+
+    def summary(self, company):
+        summary = CompanySummary.objects.get(pk=company.pk)
+        return {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+
+    def assertMatchesTables(self, company):
+        self.assertEqual(self.summary(company), compute([company.pk])[company.pk])
+
+    def test_deltas_follow_saves_and_deletes(self):
+        product = create_product(self.company, traffic=5, shares=2)
+        self.assertEqual(self.summary(self.company)["products_pending"], 1)
+        self.assertEqual(self.summary(self.company)["total_traffic"], 5)
+
+        product.status = "active"
+        product.traffic = 12
+        product.save()
+        ticket = SupportTicket.objects.create(
+            title="Title", description="Description", submitted_by=self.company
+        )
+        ticket.status = "resolved"
+        ticket.save()
+        summary = self.summary(self.company)
+        self.assertEqual(summary["products_pending"], 0)
+        self.assertEqual(summary["products_active"], 1)
+        self.assertEqual(summary["total_traffic"], 12)
+        self.assertEqual(summary["tickets_resolved"], 1)
+
+        product.company = self.other
+        product.save()
+        self.assertMatchesTables(self.company)
+        self.assertEqual(self.summary(self.other)["products_active"], 1)
+
+        product.delete()
+        self.assertEqual(self.summary(self.other)["total_traffic"], 0)
+
+    def test_saves_not_touching_tracked_fields_are_skipped(self):
+        product = create_product(self.company)
+        before = CompanySummary.objects.get(pk=self.company.pk).date_updated
+        product.product_name = "Renamed"
+        product.save(update_fields=["product_name"])
+        after = CompanySummary.objects.get(pk=self.company.pk).date_updated
+        self.assertEqual(before, after)
+
+    def test_unknown_status_does_not_fail_the_save(self):
+        product = create_product(self.company)
+        product.status = "inactive"
+        product.save()
+        self.assertEqual(self.summary(self.company)["products_pending"], 0)
+        self.assertMatchesTables(self.company)
+
+    def test_deleting_a_company_with_products_and_tickets(self):
+        create_product(self.company)
+        SupportTicket.objects.create(
+            title="Title", description="Description", submitted_by=self.company
+        )
+        self.company.delete()
+        self.assertFalse(CompanySummary.objects.filter(pk=self.company.pk).exists())
+        self.assertFalse(Product.objects.exists())
+
+    def test_deleting_a_row_does_not_create_a_summary(self):
+        product = create_product(self.company)
+        CompanySummary.objects.all().delete()
+        product.delete()
+        self.assertFalse(CompanySummary.objects.exists())
+
+    def test_other_users_get_no_summary(self):
+        person = create_user("person@example.com", "individual")
+        admin = create_user("admin@example.com", "admin")
+        ticket = SupportTicket.objects.create(
+            title="Title", description="Description", submitted_by=person
+        )
+        ticket.status = "resolved"
+        ticket.save()
+        create_product(admin, traffic=3)
+        self.assertFalse(CompanySummary.objects.exists())
+        self.assertEqual(compute(), {})
+
+    def test_reconcile_drops_summaries_of_other_users(self):
+        create_product(self.company)
+        CustomUser.objects.filter(pk=self.company.pk).update(user_type="individual")
+        call_command("reconcile_company_summaries", stdout=StringIO())
+        self.assertFalse(CompanySummary.objects.exists())
+
+    def test_reconcile_repairs_bulk_writes(self):
+        create_product(self.company, traffic=1)
+        create_product(self.company, traffic=1)
+        Product.objects.filter(company=self.company).update(
+            status="declined", traffic=100
+        )
+        call_command("reconcile_company_summaries", stdout=StringIO())
+        summary = self.summary(self.company)
+        self.assertEqual(summary["products_declined"], 2)
+        self.assertEqual(summary["total_traffic"], 200)
+
+    def test_summary_endpoint(self):
+        create_product(self.company, shares=3)
+        CompanySummary.objects.all().delete()
+        client = APIClient()
+        client.force_authenticate(self.company)
+        response = client.get("/api/v1/referrals/summary/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["product_count"], 1)
+        self.assertEqual(response.json()["total_shares"], 3)
+
+        client.force_authenticate(create_user("person@example.com", "individual"))
+        self.assertEqual(client.get("/api/v1/referrals/summary/").status_code, 403)
+
+    def test_admins_name_the_company(self):
+        client = APIClient()
+        client.force_authenticate(create_user("admin@example.com", "admin"))
+        person = create_user("person@example.com", "individual")
+        url = "/api/v1/referrals/summary/"
+        self.assertEqual(client.get(url).status_code, 400)
+        self.assertEqual(client.get(url, {"company": person.pk}).status_code, 404)
+        response = client.get(url, {"company": self.company.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(CompanySummary.objects.values_list("pk", flat=True)), {self.company.pk}
+        )
+
+
+class TriageTests(TestCase):
+    """
+    Tests of the support ticket queue of ``referrals.triage``.
+    """
+
+    def setUp(self):
+        self.company = create_user("company@example.com")
+        self.agent = create_user("agent@example.com", "admin", is_staff=True)
+
+    def create_ticket(self, priority, **kwargs):
+        return SupportTicket.objects.create(
+            title="Title",
+            description="Description",
+            submitted_by=self.company,
+            priority=priority,
+            **kwargs,
+        )
+
+    def test_claims_by_priority_then_age_and_never_twice(self):
+        low = self.create_ticket("low")
+        first_high = self.create_ticket("high")
+        second_high = self.create_ticket("high")
+        self.create_ticket("high", status="resolved")
+
+        claimed = [triage.claim_next_ticket(self.agent) for _ in range(4)]
+        self.assertEqual(
+            [ticket and ticket.pk for ticket in claimed],
+            [first_high.pk, second_high.pk, low.pk, None],
+        )
+        self.assertEqual(SupportTicket.objects.filter(claimed_by=self.agent).count(), 3)
+
+    def test_released_tickets_go_back_to_the_queue(self):
+        ticket = self.create_ticket("medium")
+        triage.claim_next_ticket(self.agent)
+        self.assertEqual(triage.next_tickets(), [])
+        triage.release_ticket(ticket, self.agent)
+        self.assertEqual(triage.next_tickets(), [ticket])
+
+    def test_claim_endpoint(self):
+        ticket = self.create_ticket("low")
+        client = APIClient()
+        client.force_authenticate(self.agent)
+        response = client.post("/api/v1/referrals/supporttickets/claim/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["uuid"], str(ticket.pk))
+        response = client.post("/api/v1/referrals/supporttickets/claim/")
+        self.assertEqual(response.status_code, 204)
+
+    def test_agents_only_release_their_own_claims(self):
+        ticket = self.create_ticket("low")
+        other = create_user("other-agent@example.com", "admin", is_staff=True)
+        triage.claim_next_ticket(self.agent)
+        url = f"/api/v1/referrals/supporttickets/{ticket.pk}/release/"
+        client = APIClient()
+
+        client.force_authenticate(other)
+        response = client.post(url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(SupportTicket.objects.get(pk=ticket.pk).claimed_by, self.agent)
+
+        client.force_authenticate(self.agent)
+        response = client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["claimed_by"])
+        self.assertEqual(client.post(url).status_code, 409)
+
+    def test_superusers_release_any_claim(self):
+        ticket = self.create_ticket("low")
+        superuser = create_user(
+            "super@example.com", "admin", is_staff=True, is_superuser=True
+        )
+        url = f"/api/v1/referrals/supporttickets/{ticket.pk}/release/"
+        client = APIClient()
+        client.force_authenticate(superuser)
+        self.assertEqual(client.post(url).status_code, 409)
+        triage.claim_next_ticket(self.agent)
+        self.assertEqual(client.post(url).status_code, 200)
+        self.assertIsNone(SupportTicket.objects.get(pk=ticket.pk).claimed_by)
+
+
+class ProductBulkStatusTests(TestCase):
+    """
+    Tests of ``POST products/bulk-status/``.
+    """
+
+    url = "/api/v1/referrals/products/bulk-status/"
+
+    def setUp(self):
+        self.company = create_user("company@example.com")
+        self.other = create_user("other@example.com")
+        self.admin = create_user("admin@example.com", "admin")
+        self.client = APIClient()
+
+    def test_owners_change_only_their_products(self):
+        own = create_product(self.company)
+        foreign = create_product(self.other)
+        self.client.force_authenticate(self.company)
+        OutboxEvent.objects.all().delete()
+        response = self.client.post(
+            self.url,
+            {"ids": [str(own.pk), str(foreign.pk)], "status": "active"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        results = {row["id"]: row["result"] for row in response.json()["results"]}
+        self.assertEqual(
+            results, {str(own.pk): "updated", str(foreign.pk): "not_found"}
+        )
+        self.assertEqual(Product.objects.get(pk=foreign.pk).status, "pending")
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.event_type, "product.status_changed")
+        self.assertEqual(event.object_id, str(own.pk))
+        self.assertEqual(
+            event.payload,
+            {
+                "field": "status",
+                "old": "pending",
+                "new": "active",
+                "by": self.company.pk,
+            },
+        )
+
+    def test_filter_with_from_status(self):
+        pending = [create_product(self.company) for _ in range(2)]
+        declined = create_product(self.other, status="declined")
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            self.url,
+            {"filter": {}, "from_status": "pending", "status": "active"},
+            format="json",
+        )
+        self.assertEqual(response.json()["updated"], 2)
+        self.assertFalse(response.json()["more"])
+        self.assertEqual(
+            set(Product.objects.filter(status="active").values_list("pk", flat=True)),
+            {product.pk for product in pending},
+        )
+        self.assertEqual(Product.objects.get(pk=declined.pk).status, "declined")
+
+        response = self.client.post(
+            self.url,
+            {"ids": [str(declined.pk)], "from_status": "pending", "status": "active"},
+            format="json",
+        )
+        self.assertEqual(response.json()["results"][0]["result"], "skipped")
+
+    def test_summaries_follow_bulk_changes(self):
+        create_product(self.company, traffic=4)
+        create_product(self.company, status="active")
+        self.client.force_authenticate(self.admin)
+        self.client.post(
+            self.url,
+            {"filter": {"company": self.company.pk}, "status": "declined"},
+            format="json",
+        )
+        summary = CompanySummary.objects.get(pk=self.company.pk)
+        self.assertEqual(summary.products_declined, 2)
+        self.assertEqual(summary.products_pending, 0)
+        self.assertEqual(summary.products_active, 0)
+        self.assertEqual(summary.total_traffic, 4)
 
-# Create your tests here.
+    def test_requires_ids_or_filter(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(self.url, {"status": "active"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            self.url, {"filter": {}, "status": "active"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,128 @@
+from django.db import transaction
+from django.utils import timezone
+
+from core.cache import invalidate_instance
+
+from .models import SupportTicket
+
+# Buckets are walked in this order, so "high" tickets always come first and
+# each bucket is served oldest-first.
+PRIORITY_ORDER = ("high", "medium", "low")
+
+OPEN_STATUS = "in-progress"
+
+# How many times a claim retries a bucket after losing a race for a row.
+CLAIM_ATTEMPTS = 3
+
+
+def triage_queryset(priority):
+    """
+    Return the unclaimed, open tickets of a single priority, oldest first.
+
+    The filter and ordering match ``supportticket_triage_idx`` exactly, so the
+    database answers this with an index range scan instead of a sort.
+
+    Args:
+        priority (str): One of ``SupportTicket.PRIORITY_CHOICES``.
+
+    Returns:
+        QuerySet: The ordered tickets for that priority bucket.
+    """
+    return SupportTicket.objects.filter(
+        status=OPEN_STATUS, priority=priority, claimed_by__isnull=True
+    ).order_by("date_created")
+
+
+def next_tickets(limit=20, priorities=PRIORITY_ORDER):
+    """
+    Return the next tickets to work on, by priority and then by age.
+
+    At most one query is issued per priority bucket and buckets are skipped
+    as soon as ``limit`` tickets have been collected.
+
+    Args:
+        limit (int): The maximum number of tickets to return.
+        priorities (Iterable[str]): The priority buckets to read, in order.
+
+    Returns:
+        list[SupportTicket]: The tickets at the head of the queue.
+    """
+    tickets = []
+    for priority in priorities:
+        remaining = limit - len(tickets)
+        if remaining <= 0:
+            break
+        tickets.extend(
+            triage_queryset(priority).select_related("submitted_by")[:remaining]
+        )
+    return tickets
+
+
+def claim_next_ticket(agent, priorities=PRIORITY_ORDER):
+    """
+    Atomically assign the next ticket in the queue to ``agent``.
+
+    Candidate rows are read with ``SELECT ... FOR UPDATE SKIP LOCKED`` so
+    concurrent agents skip rows another agent is claiming instead of waiting
+    on them. The claim itself is a conditional ``UPDATE`` that only succeeds
+    while the ticket is still unclaimed, which keeps backends without row
+    locks (SQLite) from handing the same ticket out twice.
+
+    Args:
+        agent (CustomUser): The staff member claiming the ticket.
+        priorities (Iterable[str]): The priority buckets to read, in order.
+
+    Returns:
+        SupportTicket | None: The claimed ticket, or None if the queue is empty.
+    """
+    for priority in priorities:
+        for _ in range(CLAIM_ATTEMPTS):
+            with transaction.atomic():
+                ticket = (
+                    triage_queryset(priority)
+                    .select_for_update(skip_locked=True)
+                    .first()
+                )
+                if ticket is None:
+                    break
+                now = timezone.now()
+                claimed = SupportTicket.objects.filter(
+                    pk=ticket.pk, claimed_by__isnull=True
+                ).update(claimed_by=agent, claimed_at=now, date_updated=now)
+                if claimed:
+                    ticket.claimed_by = agent
+                    ticket.claimed_at = now
+                    ticket.date_updated = now
+                    invalidate_instance(ticket)
+                    return ticket
+    return None
+
+
+def release_ticket(ticket, agent, override=False):
+    """
+    Put a ticket claimed by ``agent`` back into the queue.
+
+    Like the claim, the release is a conditional ``UPDATE``, so it only
+    succeeds while ``agent`` still holds the ticket and can never drop a
+    claim another agent took in the meantime.
+
+    Args:
+        ticket (SupportTicket): The ticket to release.
+        agent (CustomUser): The staff member releasing the ticket.
+        override (bool): Release the ticket whoever claimed it.
+
+    Returns:
+        SupportTicket | None: The released ticket, or None if it is not
+            claimed (by ``agent``, without ``override``).
+    """
+    claims = SupportTicket.objects.filter(pk=ticket.pk, claimed_by__isnull=False)
+    if not override:
+        claims = claims.filter(claimed_by=agent)
+    now = timezone.now()
+    if not claims.update(claimed_by=None, claimed_at=None, date_updated=now):
+        return None
+    ticket.claimed_by = None
+    ticket.claimed_at = None
+    ticket.date_updated = now
+    invalidate_instance(ticket)
+    return ticket
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
+    CompanySummaryView,
     ProductViewSet,
     SupportTicketViewSet,
     UserRankingViewSet,
@@ -17,4 +18,5 @@ router.register(r"staff", StaffViewSet)
 urlpatterns = [
     path("", include(router.urls)),
     path("verify/", VerifyAccountView.as_view(), name="verify-account"),
+    path("summary/", CompanySummaryView.as_view(), name="company-summary"),
 ]
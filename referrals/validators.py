@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError
 
 
@@ -12,6 +13,6 @@ def validate_file_size(image):
         ValidationError: If the size of the image file exceeds the maximum allowed size.
 
     """
-    max_size = 10 * 1024 * 1024  # 10 MB
+    max_size = settings.MAX_UPLOAD_SIZE
     if image.size > max_size:
         raise ValidationError(f"File too large ( > {max_size} bytes )")
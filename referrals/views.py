@@ -1,23 +1,49 @@
 import requests
 import logging
+from django.conf import settings
+from django.db import transaction
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.generics import GenericAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from .models import Product, SupportTicket, UserRanking, Staff
 from .serializers import (
+    CompanySummaryQuerySerializer,
+    CompanySummarySerializer,
+    ProductBulkStatusSerializer,
+    ProductSearchSerializer,
     ProductSerializer,
+    SupportTicketSearchSerializer,
     SupportTicketSerializer,
+    TriageQueueSerializer,
     UserRankingSerializer,
     VerifyAccountSerializer,
     StaffSerializer,
 )
-from .permissions import IsOwnerOrAdmin
+from core import moderation
+from core.mixins import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    FieldProjectionMixin,
+    IdempotentCreateMixin,
+    ReplicaReadMixin,
+)
+from .permissions import IsCompanyOrAdmin, IsOwnerOrAdmin
+from . import search, summaries, triage
 
 logger = logging.getLogger(__name__)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    ReplicaReadMixin,
+    FieldProjectionMixin,
+    IdempotentCreateMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet for the Product model.
     """
@@ -35,6 +61,64 @@ class ProductViewSet(viewsets.ModelViewSet):
         else:
             return Product.objects.none()
 
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Full-text search over product names and descriptions, best match first.
+        """
+        params = ProductSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+        queryset = self.get_queryset()
+        if "status" in filters:
+            queryset = queryset.filter(status=filters["status"])
+        if "company" in filters:
+            queryset = queryset.filter(company_id=filters["company"])
+        products = search.search(queryset, filters["q"])[: filters["limit"]]
+        serializer = self.get_serializer(products, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["post"], url_path="bulk-status")
+    def bulk_status(self, request):
+        """
+        Sets the status of many products at once, listed by ``ids`` or
+        matching ``filter``, with a single ``UPDATE``.
+
+        Ownership is enforced by ``get_queryset()`` in the same query, so
+        products of other companies are reported as ``not_found``, as they
+        would be by ``update``.
+        """
+        params = ProductBulkStatusSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        queryset = self.get_queryset()
+        filters = data.get("filter", {})
+        if "company" in filters:
+            queryset = queryset.filter(company_id=filters["company"])
+        if "created_before" in filters:
+            queryset = queryset.filter(date_created__lt=filters["created_before"])
+        with transaction.atomic():
+            outcome = moderation.bulk_set_status(
+                queryset,
+                data["status"],
+                ids=data.get("ids"),
+                from_status=data.get("from_status"),
+                actor=request.user.pk,
+            )
+            summaries.record_status_changes(outcome["changed"], data["status"])
+        logger.info(
+            f"{len(outcome['changed'])} products set to {data['status']} "
+            f"by {request.user.pk}"
+        )
+        return Response(
+            {
+                "status": data["status"],
+                "updated": len(outcome["changed"]),
+                "more": outcome["more"],
+                "results": outcome["results"],
+            }
+        )
+
     def update(self, request, *args, **kwargs):
         """
         Update an instance of the model using the provided serializer.
@@ -52,7 +136,13 @@ class ProductViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SupportTicketViewSet(viewsets.ModelViewSet):
+class SupportTicketViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FieldProjectionMixin,
+    IdempotentCreateMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet for the SupportTicket model.
     """
@@ -71,8 +161,84 @@ class SupportTicketViewSet(viewsets.ModelViewSet):
             return SupportTicket.objects.all()
         return SupportTicket.objects.filter(submitted_by=user)
 
+    def get_cache_owner(self):
+        user = self.request.user
+        return None if user.is_staff else user.pk
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Full-text search over ticket titles and descriptions, best match first.
+        """
+        params = SupportTicketSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+        queryset = self.get_queryset()
+        for field in ("status", "priority"):
+            if field in filters:
+                queryset = queryset.filter(**{field: filters[field]})
+        if "company" in filters:
+            queryset = queryset.filter(submitted_by_id=filters["company"])
+        tickets = search.search(queryset, filters["q"])[: filters["limit"]]
+        serializer = self.get_serializer(tickets, many=True)
+        return Response(serializer.data)
+
+    def _triage_priorities(self, data):
+        """
+        Returns the requested priority buckets in queue order.
+        """
+        requested = data.get("priority")
+        if not requested:
+            return triage.PRIORITY_ORDER
+        return tuple(p for p in triage.PRIORITY_ORDER if p in requested)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def queue(self, request):
+        """
+        Lists the next unclaimed tickets, highest priority and oldest first.
+        """
+        params = TriageQueueSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        tickets = triage.next_tickets(
+            limit=params.validated_data["limit"],
+            priorities=self._triage_priorities(params.validated_data),
+        )
+        serializer = self.get_serializer(tickets, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def claim(self, request):
+        """
+        Claims the ticket at the head of the queue for the current agent.
+        """
+        params = TriageQueueSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        ticket = triage.claim_next_ticket(
+            request.user, priorities=self._triage_priorities(params.validated_data)
+        )
+        if ticket is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        logger.info(f"Ticket {ticket.pk} claimed by {request.user.pk}")
+        serializer = self.get_serializer(ticket)
+        return Response(serializer.data)
 
-class UserRankingViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
+    def release(self, request, pk=None):
+        """
+        Puts a ticket claimed by the current agent back into the queue.
+        Superusers can release the claims of other agents.
+        """
+        override = request.user.is_superuser
+        ticket = triage.release_ticket(self.get_object(), request.user, override)
+        if ticket is None:
+            detail = "Ticket is not claimed" + ("." if override else " by you.")
+            return Response({"detail": detail}, status=status.HTTP_409_CONFLICT)
+        logger.info(f"Ticket {ticket.pk} released by {request.user.pk}")
+        serializer = self.get_serializer(ticket)
+        return Response(serializer.data)
+
+
+class UserRankingViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for the UserRanking model.
     """
@@ -82,6 +248,36 @@ class UserRankingViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 
+class CompanySummaryView(ReplicaReadMixin, GenericAPIView):
+    """
+    View returning the dashboard totals of a company.
+    """
+
+    permission_classes = [IsAuthenticated, IsCompanyOrAdmin]
+    serializer_class = CompanySummarySerializer
+
+    def get(self, request):
+        """
+        Returns the product counts by status, traffic and share totals and
+        ticket counts of the current company, or of ``?company=``, which
+        admins must give.
+
+        The totals are read from the maintained ``CompanySummary`` row, a
+        single primary-key lookup however many products the company has.
+        """
+        params = CompanySummaryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        company_id = request.user.pk
+        if request.user.user_type == "admin":
+            if "company" not in params.validated_data:
+                raise ValidationError({"company": ["This parameter is required."]})
+            company_id = params.validated_data["company"]
+            if not summaries.is_company(company_id):
+                raise NotFound("No such company.")
+        serializer = self.get_serializer(summaries.get_summary(company_id))
+        return Response(serializer.data)
+
+
 class VerifyAccountView(GenericAPIView):
     """
     View for verifying an account.
@@ -100,9 +296,8 @@ class VerifyAccountView(GenericAPIView):
         account_number = serializer.validated_data.get("account_number")
         bank_code = serializer.validated_data.get("bank_code")
 
-        # Replace with your actual Bearer token and API URL
         headers = {
-            "Authorization": "Bearer Your_Bearer_Token",
+            "Authorization": f"Bearer {settings.ACCOUNT_VERIFICATION_TOKEN}",
         }
 
         params = {
@@ -112,7 +307,7 @@ class VerifyAccountView(GenericAPIView):
 
         try:
             response = requests.get(
-                "http://nubapi.test/api/verify", headers=headers, params=params
+                settings.ACCOUNT_VERIFICATION_URL, headers=headers, params=params
             )
             response.raise_for_status()  # Raises an HTTPError for bad responses
             data = response.json()
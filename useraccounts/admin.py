@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from core.admin_utils import LargeTableAdminMixin
 from .models import CustomUser, IndividualProfile, CompanyProfile
 from .forms import UserCreationForm, UserChangeForm
 
 
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     """
     Define admin model for custom User model with no email field
     """
@@ -41,7 +43,8 @@ class UserAdmin(BaseUserAdmin):
             },
         ),
     )
-    search_fields = ("email",)
+    # Both columns carry a trigram index on PostgreSQL (migration 0003).
+    search_fields = ("email", "name")
     ordering = ("email",)
 
 
@@ -58,6 +61,8 @@ class CompanyProfileAdmin(admin.ModelAdmin):
         "user",
         "company_registration_number",
     )
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
 
 
 @admin.register(IndividualProfile)
@@ -67,3 +72,5 @@ class IndividualProfileAdmin(admin.ModelAdmin):
     """
 
     list_display = ("user", "gender")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
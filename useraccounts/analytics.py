@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import CustomUser, RegionStatusStat, SignupDailyStat
+
+STATUSES = [status for status, _ in CustomUser.STATUS_CHOICES]
+USER_TYPES = [
+    user_type for user_type, _ in CustomUser._meta.get_field("user_type").choices
+]
+
+
+def rollup_signups(full=False, lookback_days=2, using="default"):
+    """
+    Recomputes the daily signup counts.
+
+    Only the last ``lookback_days`` already rolled up are recomputed, along
+    with the days since, unless ``full`` is set or nothing was rolled up
+    yet; a full rollup also drops the counts of deleted users.
+
+    Returns:
+        int: The number of rows written.
+    """
+    stats = SignupDailyStat.objects.using(using)
+    last_day = None if full else stats.aggregate(last=Max("day"))["last"]
+    users = CustomUser.objects.using(using)
+    if last_day is not None:
+        since = last_day - timedelta(days=lookback_days)
+        users = users.filter(date_joined__gte=since)
+        stats = stats.filter(day__gte=since)
+    rows = [
+        SignupDailyStat(
+            day=row["date_joined"],
+            user_type=row["user_type"],
+            country=row["country"],
+            signups=row["signups"],
+        )
+        for row in users.values("date_joined", "user_type", "country")
+        .annotate(signups=Count("pk"))
+        .order_by()
+    ]
+    with transaction.atomic(using=using):
+        stats.delete()
+        SignupDailyStat.objects.using(using).bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rollup_regions(using="default"):
+    """
+    Replaces the user counts by region, account type and status with a
+    single grouped scan of the users table.
+
+    Returns:
+        int: The number of rows written.
+    """
+    now = timezone.now()
+    rows = [
+        RegionStatusStat(date_computed=now, **row)
+        for row in CustomUser.objects.using(using)
+        .values("country", "state", "user_type", "status")
+        .annotate(users=Count("pk"))
+        .order_by()
+    ]
+    with transaction.atomic(using=using):
+        RegionStatusStat.objects.using(using).all().delete()
+        RegionStatusStat.objects.using(using).bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def signups_per_day(start, end, user_type=None, country=None):
+    """
+    Returns the signups of each day from ``start`` to ``end`` included,
+    with their split by account type. Days without signups are listed with
+    zero counts.
+    """
+    stats = SignupDailyStat.objects.filter(day__range=(start, end))
+    if user_type:
+        stats = stats.filter(user_type=user_type)
+    if country:
+        stats = stats.filter(country__iexact=country)
+    days = {}
+    day = start
+    while day <= end:
+        days[day] = {
+            "day": day,
+            "total": 0,
+            "by_user_type": dict.fromkeys(USER_TYPES, 0),
+        }
+        day += timedelta(days=1)
+    for row in stats.values("day", "user_type").annotate(signups=Sum("signups")):
+        entry = days[row["day"]]
+        entry["total"] += row["signups"]
+        entry["by_user_type"][row["user_type"]] = row["signups"]
+    return list(days.values())
+
+
+def _status_counts(stats, group_by):
+    return (
+        stats.values(*group_by)
+        .annotate(
+            total=Sum("users"),
+            **{
+                status: Sum("users", filter=Q(status=status), default=0)
+                for status in STATUSES
+            },
+        )
+        .order_by("-total", *group_by)
+    )
+
+
+def users_by_region(level="country", user_type=None, country=None):
+    """
+    Returns the number of users of each status per country, or per state
+    with ``level="state"``, largest regions first.
+    """
+    stats = RegionStatusStat.objects.all()
+    if user_type:
+        stats = stats.filter(user_type=user_type)
+    if country:
+        stats = stats.filter(country__iexact=country)
+    group_by = ["country", "state"] if level == "state" else ["country"]
+    return list(_status_counts(stats, group_by))
+
+
+def users_by_type(user_type=None, country=None):
+    """
+    Returns the number of users of each status per account type.
+    """
+    stats = RegionStatusStat.objects.all()
+    if user_type:
+        stats = stats.filter(user_type=user_type)
+    if country:
+        stats = stats.filter(country__iexact=country)
+    return list(_status_counts(stats, ["user_type"]))
+
+
+def last_rollup():
+    """
+    Returns when the region counts were last computed, None if never.
+    """
+    return RegionStatusStat.objects.aggregate(last=Max("date_computed"))["last"]
@@ -9,3 +9,9 @@ class UseraccountsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "useraccounts"
+
+    def ready(self):
+        """
+        Connect the signal handlers of the app.
+        """
+        from . import signals  # noqa: F401
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from useraccounts import analytics
+
+
+class Command(BaseCommand):
+    """
+    Refresh the summary tables behind the admin analytics endpoints.
+
+    Run it periodically, e.g. hourly from cron. Each run recomputes the
+    last few days of signups and the current user counts by region, so the
+    endpoints read a few hundred rows however many users there are.
+    """
+
+    help = "Roll users up into the analytics summary tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every day of signups, not only the latest ones.",
+        )
+        parser.add_argument(
+            "--lookback-days",
+            type=int,
+            default=2,
+            help="Days before the last rolled up one to recompute.",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to roll up.",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        signups = analytics.rollup_signups(
+            full=options["full"], lookback_days=options["lookback_days"], using=using
+        )
+        regions = analytics.rollup_regions(using=using)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rolled up {signups} daily signup rows and {regions} region rows."
+            )
+        )
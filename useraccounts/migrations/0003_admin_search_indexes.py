@@ -0,0 +1,17 @@
+from django.db import migrations
+
+from core.operations import AddTrigramIndex
+
+
+class Migration(migrations.Migration):
+    # Trigram indexes are built concurrently, outside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("useraccounts", "0002_customuser_profile_picture_variants"),
+    ]
+
+    operations = [
+        AddTrigramIndex("customuser", "email", "customuser_email_trgm_idx"),
+        AddTrigramIndex("customuser", "name", "customuser_name_trgm_idx"),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:27
+
+from django.db import migrations, models
+
+from core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("useraccounts", "0003_admin_search_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="customuser",
+            index=models.Index(
+                fields=["user_type", "status"], name="customuser_type_status_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.2 on 2026-10-19 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("useraccounts", "0004_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RegionStatusStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("country", models.CharField(max_length=50)),
+                ("state", models.CharField(max_length=50)),
+                ("user_type", models.CharField(max_length=20)),
+                ("status", models.CharField(max_length=10)),
+                ("users", models.PositiveIntegerField(default=0)),
+                ("date_computed", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Region Status Stat",
+                "verbose_name_plural": "Region Status Stats",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("country", "state", "user_type", "status"),
+                        name="regionstatusstat_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="SignupDailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("user_type", models.CharField(max_length=20)),
+                ("country", models.CharField(max_length=50)),
+                ("signups", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Signup Daily Stat",
+                "verbose_name_plural": "Signup Daily Stats",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "user_type", "country"),
+                        name="signupdailystat_unique",
+                    )
+                ],
+            },
+        ),
+    ]
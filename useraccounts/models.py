@@ -6,6 +6,8 @@ from django.contrib.auth.models import (
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from core.models import OutboxMixin
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -35,11 +37,14 @@ class CustomUserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class CustomUser(AbstractBaseUser, PermissionsMixin):
+class CustomUser(OutboxMixin, AbstractBaseUser, PermissionsMixin):
     """
     Custom user model.
     """
 
+    outbox_fields = ("status",)
+    outbox_owner_field = "id"
+
     email = models.EmailField(unique=True)
     name = models.CharField(
         max_length=100
@@ -57,6 +62,9 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     profile_picture = models.ImageField(
         upload_to="profile_pictures/", null=True, blank=True
     )
+    profile_picture_variants = models.JSONField(
+        default=dict, blank=True, editable=False
+    )
     # Common fields
     phone_number = models.CharField(max_length=15)
     address = models.CharField(max_length=255)
@@ -80,6 +88,12 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = "Custom User"
         verbose_name_plural = "Custom Users"
+        indexes = [
+            # Users are listed and moderated by account type and status.
+            models.Index(
+                fields=["user_type", "status"], name="customuser_type_status_idx"
+            ),
+        ]
 
     def __str__(self):
         """
@@ -139,3 +153,64 @@ class CompanyProfile(models.Model):
         :return:
         """
         return self.user.name
+
+
+class SignupDailyStat(models.Model):
+    """
+    Number of users who joined on a day, by account type and country.
+
+    Filled by ``useraccounts.analytics.rollup``, never written by requests.
+    """
+
+    day = models.DateField()
+    user_type = models.CharField(max_length=20)
+    country = models.CharField(max_length=50)
+    signups = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Signup Daily Stat"
+        verbose_name_plural = "Signup Daily Stats"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "user_type", "country"], name="signupdailystat_unique"
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Return the day, account type and country of the row.
+        :return:
+        """
+        return f"{self.day} {self.user_type} {self.country}"
+
+
+class RegionStatusStat(models.Model):
+    """
+    Current number of users in a state, by account type and status.
+
+    Replaced as a whole by ``useraccounts.analytics.rollup``.
+    """
+
+    country = models.CharField(max_length=50)
+    state = models.CharField(max_length=50)
+    user_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=10)
+    users = models.PositiveIntegerField(default=0)
+    date_computed = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Region Status Stat"
+        verbose_name_plural = "Region Status Stats"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["country", "state", "user_type", "status"],
+                name="regionstatusstat_unique",
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Return the region, account type and status of the row.
+        :return:
+        """
+        return f"{self.country}/{self.state} {self.user_type} {self.status}"
@@ -0,0 +1,24 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsAdmin(BasePermission):
+    """
+    Custom permission class to only allow users with a user type of 'admin'.
+    """
+
+    def has_permission(self, request, view):
+        """
+        Check if the user making the request is authenticated and is an admin.
+
+        Parameters:
+            request (HttpRequest): The HTTP request object.
+            view (View): The view object.
+
+        Returns:
+            bool: True if the user is authenticated and has a user type of 'admin', False otherwise.
+        """
+        return bool(
+            request.user
+            and request.user.is_authenticated
+            and request.user.user_type == "admin"
+        )
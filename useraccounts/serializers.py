@@ -1,4 +1,9 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
+from core.moderation import MAX_ITEMS
+from core.serializers import BulkStatusSerializer, ImageVariantsField
 from .models import CustomUser, IndividualProfile, CompanyProfile
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
@@ -29,6 +34,12 @@ class IndividualProfileSerializer(serializers.ModelSerializer):
     user_id = serializers.IntegerField(source="user.id", read_only=True)
     state = serializers.CharField(source="user.state", required=False, allow_blank=True)
     city = serializers.CharField(source="user.city", required=False, allow_blank=True)
+    profile_picture = serializers.ImageField(
+        source="user.profile_picture", read_only=True
+    )
+    profile_picture_variants = ImageVariantsField(
+        source="user.profile_picture_variants"
+    )
 
     def create(self, validated_data):
         user = CustomUser.objects.create_user(**validated_data)
@@ -54,6 +65,8 @@ class IndividualProfileSerializer(serializers.ModelSerializer):
             "user_id",
             "state",
             "city",
+            "profile_picture",
+            "profile_picture_variants",
         ]
 
 
@@ -77,6 +90,12 @@ class CompanyProfileSerializer(serializers.ModelSerializer):
     )
     state = serializers.CharField(source="user.state", required=False, allow_blank=True)
     city = serializers.CharField(source="user.city", required=False, allow_blank=True)
+    profile_picture = serializers.ImageField(
+        source="user.profile_picture", read_only=True
+    )
+    profile_picture_variants = ImageVariantsField(
+        source="user.profile_picture_variants"
+    )
 
     class Meta:
         model = CompanyProfile
@@ -92,6 +111,8 @@ class CompanyProfileSerializer(serializers.ModelSerializer):
             "company_registration_number",
             "state",
             "city",
+            "profile_picture",
+            "profile_picture_variants",
         ]
 
     def update(self, instance, validated_data):
@@ -216,3 +237,78 @@ class CustomUserTokenObtainPairSerializer(TokenObtainPairSerializer):
         )
 
         return data
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the filters shared by the analytics endpoints.
+    """
+
+    user_type = serializers.ChoiceField(
+        choices=CustomUser._meta.get_field("user_type").choices, required=False
+    )
+    country = serializers.CharField(max_length=50, required=False)
+
+
+class SignupAnalyticsQuerySerializer(AnalyticsQuerySerializer):
+    """
+    Serializer for the query parameters of the signups per day.
+    """
+
+    MAX_DAYS = 366
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        """
+        Default to the last 30 days and bound the range.
+        """
+        end = data.get("end") or timezone.localdate()
+        start = data.get("start") or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError("start must not be after end.")
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                f"The range cannot exceed {self.MAX_DAYS} days."
+            )
+        return {**data, "start": start, "end": end}
+
+
+class RegionAnalyticsQuerySerializer(AnalyticsQuerySerializer):
+    """
+    Serializer for the query parameters of the users by region.
+    """
+
+    level = serializers.ChoiceField(choices=["country", "state"], default="country")
+
+
+class UserBulkFilterSerializer(serializers.Serializer):
+    """
+    Serializer for the filter of bulk user status changes.
+    """
+
+    user_type = serializers.ChoiceField(
+        choices=CustomUser._meta.get_field("user_type").choices, required=False
+    )
+    country = serializers.CharField(max_length=50, required=False)
+    state = serializers.CharField(max_length=50, required=False)
+    joined_before = serializers.DateField(required=False)
+
+
+class UserBulkStatusSerializer(BulkStatusSerializer):
+    """
+    Serializer for bulk user status changes.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_ITEMS,
+        required=False,
+    )
+    filter = UserBulkFilterSerializer(required=False)
+    status = serializers.ChoiceField(choices=CustomUser.STATUS_CHOICES)
+    from_status = serializers.ChoiceField(
+        choices=CustomUser.STATUS_CHOICES, required=False
+    )
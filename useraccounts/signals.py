@@ -0,0 +1,9 @@
+from core.cache import register_scope
+from core.images import track_image_field
+
+from .models import CompanyProfile, CustomUser
+
+track_image_field(CustomUser, "profile_picture")
+register_scope(CompanyProfile, "user_id")
+# Company profiles embed the fields of their user.
+register_scope(CustomUser, "pk", scope=CompanyProfile)
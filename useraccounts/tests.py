@@ -1,3 +1,191 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import IdempotencyRecord, OutboxEvent
+
+from .models import CustomUser, SignupDailyStat
+
+
+def create_user(email, user_type="individual", **kwargs):
+    return CustomUser.objects.create_user(
+        email=email, password="password", name=email, user_type=user_type, **kwargs
+    )
+
+
+class AnalyticsTests(TestCase):
+    """
+    Tests of the rollup tables and the admin analytics endpoints.
+    """
+
+    def setUp(self):
+        for i in range(6):
+            create_user(
+                f"user{i}@example.com",
+                user_type="company" if i % 2 else "individual",
+                country="Kenya" if i < 4 else "Uganda",
+                state="Nairobi" if i < 2 else "Mombasa",
+                status="active" if i % 3 == 0 else "pending",
+            )
+        # Admins with the "staff" role are not Django staff.
+        self.admin = create_user("admin@example.com", user_type="admin")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        call_command("rollup_user_analytics", stdout=StringIO())
+
+    def test_signups_per_day(self):
+        response = self.client.get("/api/v1/accounts/analytics/signups/")
+        self.assertEqual(response.status_code, 200)
+        days = response.json()["results"]
+        self.assertEqual(len(days), 30)
+        self.assertEqual(days[-1]["total"], 7)
+        self.assertEqual(days[-1]["by_user_type"]["company"], 3)
+        self.assertEqual(days[0]["total"], 0)
+
+    def test_users_by_region(self):
+        response = self.client.get(
+            "/api/v1/accounts/analytics/regions/", {"level": "state"}
+        )
+        self.assertEqual(response.status_code, 200)
+        regions = {
+            (row["country"], row["state"]): row for row in response.json()["results"]
+        }
+        self.assertEqual(regions[("Kenya", "Nairobi")]["total"], 2)
+        self.assertEqual(regions[("Kenya", "Nairobi")]["active"], 1)
+        self.assertEqual(regions[("Uganda", "Mombasa")]["pending"], 2)
+        self.assertEqual(regions[("Kenya", "Mombasa")]["active"], 1)
+
+    def test_user_type_mix(self):
+        response = self.client.get(
+            "/api/v1/accounts/analytics/user-types/", {"country": "kenya"}
+        )
+        mix = {row["user_type"]: row["total"] for row in response.json()["results"]}
+        self.assertEqual(mix, {"company": 2, "individual": 2})
+
+    def test_rollup_recomputes_recent_days_only(self):
+        old = timezone.localdate() - timedelta(days=10)
+        CustomUser.objects.filter(email="user0@example.com").update(date_joined=old)
+        call_command("rollup_user_analytics", stdout=StringIO())
+        self.assertFalse(SignupDailyStat.objects.filter(day=old).exists())
+        call_command("rollup_user_analytics", full=True, stdout=StringIO())
+        self.assertEqual(SignupDailyStat.objects.get(day=old).signups, 1)
+
+    def test_only_admins(self):
+        self.client.force_authenticate(
+            CustomUser.objects.get(email="user1@example.com")
+        )
+        response = self.client.get("/api/v1/accounts/analytics/regions/")
+        self.assertEqual(response.status_code, 403)
+
+
+class BulkUserStatusTests(TestCase):
+    """
+    Tests of ``POST users/bulk-status/``.
+    """
+
+    url = "/api/v1/accounts/users/bulk-status/"
+
+    def setUp(self):
+        self.admin = create_user("admin@example.com", user_type="admin")
+        self.kenyans = [
+            create_user(f"kenya{i}@example.com", country="Kenya") for i in range(3)
+        ]
+        self.ugandan = create_user("uganda@example.com", country="Uganda")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        OutboxEvent.objects.all().delete()
+
+    def test_by_ids(self):
+        ids = [self.kenyans[0].pk, self.kenyans[0].pk, 999_999]
+        response = self.client.post(
+            self.url, {"ids": ids, "status": "active"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["result"] for row in response.json()["results"]],
+            ["updated", "not_found"],
+        )
+        self.assertEqual(CustomUser.objects.get(pk=ids[0]).status, "active")
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.event_type, "customuser.status_changed")
+        self.assertEqual(event.payload["by"], self.admin.pk)
+
+        response = self.client.post(
+            self.url, {"ids": ids[:1], "status": "active"}, format="json"
+        )
+        self.assertEqual(response.json()["results"][0]["result"], "unchanged")
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    def test_by_filter(self):
+        response = self.client.post(
+            self.url,
+            {"filter": {"country": "kenya"}, "status": "declined"},
+            format="json",
+        )
+        self.assertEqual(response.json()["updated"], 3)
+        self.assertEqual(
+            CustomUser.objects.filter(status="declined").count(), len(self.kenyans)
+        )
+        self.assertEqual(
+            CustomUser.objects.get(pk=self.ugandan.pk).status,
+            self.ugandan.status,
+        )
+
+    def test_only_admins(self):
+        self.client.force_authenticate(self.kenyans[0])
+        response = self.client.post(
+            self.url, {"ids": [self.kenyans[1].pk], "status": "active"}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(
+    RATE_LIMITS={"STORE": {"BACKEND": "core.ratelimit.LocalBucketStore"}, "RULES": []}
+)
+class SignupIdempotencyTests(TestCase):
+    """
+    Tests of signups retried with an ``Idempotency-Key``.
+    """
+
+    data = {
+        "email": "person@example.com",
+        "password": "password",
+        "name": "Person",
+        "user_type": "individual",
+        "gender": "female",
+    }
+
+    def signup(self, data):
+        return APIClient().post(
+            "/api/v1/accounts/signup/",
+            json.dumps(data),
+            content_type="application/json",
+            headers={"Idempotency-Key": "signup"},
+        )
+
+    def test_replay_issues_new_tokens(self):
+        first = self.signup(self.data)
+        self.assertEqual(first.status_code, 201)
+        retry = self.signup(dict(reversed(list(self.data.items()))))
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json()["user_id"], first.json()["user_id"])
+        self.assertTrue(retry.json()["access"])
+        self.assertEqual(CustomUser.objects.count(), 1)
+
+        record = IdempotencyRecord.objects.get()
+        stored = json.loads(record.response)
+        self.assertIsNone(stored["access"])
+        self.assertIsNone(stored["refresh"])
+        self.assertNotIn(first.json()["access"], record.response)
+
+    def test_replay_requires_the_same_password(self):
+        self.signup(self.data)
+        response = self.signup({**self.data, "password": "guessed"})
+        self.assertEqual(response.status_code, 422)
+        self.assertNotIn("access", response.json())
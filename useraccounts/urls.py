@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
+    AnalyticsViewSet,
+    BulkUserStatusView,
     IndividualProfileViewSet,
     CompanyProfileViewSet,
     CustomTokenObtainPairView,
@@ -13,10 +15,12 @@ from rest_framework_simplejwt.views import (
 router = DefaultRouter()
 router.register(r"individuals", IndividualProfileViewSet)
 router.register(r"companies", CompanyProfileViewSet, basename="companies")
+router.register(r"analytics", AnalyticsViewSet, basename="analytics")
 
 urlpatterns = [
     path("", include(router.urls)),
     path("token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("signup/", SignupView.as_view(), name="signup"),
+    path("users/bulk-status/", BulkUserStatusView.as_view(), name="users-bulk-status"),
 ]
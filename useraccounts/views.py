@@ -1,11 +1,24 @@
 from rest_framework import viewsets, generics, permissions
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .models import IndividualProfile, CompanyProfile
+from core import idempotency, moderation
+from core.mixins import (
+    CachedResponseMixin,
+    IdempotentCreateMixin,
+    ReplicaReadMixin,
+)
+from . import analytics
+from .models import CustomUser, IndividualProfile, CompanyProfile
+from .permissions import IsAdmin
 from .serializers import (
+    AnalyticsQuerySerializer,
+    RegionAnalyticsQuerySerializer,
+    SignupAnalyticsQuerySerializer,
+    UserBulkStatusSerializer,
     IndividualProfileSerializer,
     CompanyProfileSerializer,
     CustomUserTokenObtainPairSerializer,
@@ -13,7 +26,7 @@ from .serializers import (
 )
 
 
-class SignupView(generics.CreateAPIView):
+class SignupView(IdempotentCreateMixin, generics.CreateAPIView):
     """
     API endpoint that allows users to signup.
     """
@@ -21,8 +34,29 @@ class SignupView(generics.CreateAPIView):
     serializer_class = SignupSerializer
     authentication_classes = []
     permission_classes = [AllowAny]
+    # Tokens are issued again on replays rather than stored.
+    idempotency_private_fields = ("refresh", "access")
 
     def create(self, request, *args, **kwargs):
+        return self.idempotent_response(self.signup, request, *args, **kwargs)
+
+    def complete_replay(self, request, response):
+        """
+        Issues new tokens for a replayed signup, to a client that proves it
+        sent the original request by giving the same password.
+        """
+        if response.status_code != status.HTTP_201_CREATED:
+            return response
+        user = CustomUser.objects.filter(pk=response.data["user_id"]).first()
+        password = request.data.get("password")
+        if user is None or not password or not user.check_password(password):
+            raise idempotency.KeyReused()
+        refresh = RefreshToken.for_user(user)
+        response.data["refresh"] = str(refresh)
+        response.data["access"] = str(refresh.access_token)
+        return response
+
+    def signup(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
@@ -63,7 +97,7 @@ class SignupView(generics.CreateAPIView):
         return Response(response_data, status=status.HTTP_201_CREATED)
 
 
-class IndividualProfileViewSet(viewsets.ModelViewSet):
+class IndividualProfileViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows users to be viewed or edited.
     """
@@ -94,7 +128,9 @@ class IndividualProfileViewSet(viewsets.ModelViewSet):
         return Response(response_data, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class CompanyProfileViewSet(viewsets.ModelViewSet):
+class CompanyProfileViewSet(
+    CachedResponseMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     queryset = CompanyProfile.objects.all()
     serializer_class = CompanyProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -105,6 +141,12 @@ class CompanyProfileViewSet(viewsets.ModelViewSet):
             return CompanyProfile.objects.all()
         return CompanyProfile.objects.filter(user=user)
 
+    def get_cache_owner(self):
+        user = self.request.user
+        if user.user_type == "admin" or user.user_type == "company":
+            return None
+        return user.pk
+
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop("partial", False)
         instance = self.get_object()
@@ -122,9 +164,94 @@ class CompanyProfileViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
 
+class BulkUserStatusView(generics.GenericAPIView):
+    """
+    API endpoint that allows admins to approve or decline many users at once.
+    """
+
+    serializer_class = UserBulkStatusSerializer
+    permission_classes = [IsAdmin]
+
+    def post(self, request):
+        """
+        Sets the status of the users listed by ``ids`` or matching
+        ``filter`` with a single ``UPDATE``, and reports the outcome for
+        each of them.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        queryset = CustomUser.objects.all()
+        filters = data.get("filter", {})
+        for name in ("user_type", "state"):
+            if name in filters:
+                queryset = queryset.filter(**{name: filters[name]})
+        if "country" in filters:
+            queryset = queryset.filter(country__iexact=filters["country"])
+        if "joined_before" in filters:
+            queryset = queryset.filter(date_joined__lt=filters["joined_before"])
+        outcome = moderation.bulk_set_status(
+            queryset,
+            data["status"],
+            ids=data.get("ids"),
+            from_status=data.get("from_status"),
+            actor=request.user.pk,
+        )
+        return Response(
+            {
+                "status": data["status"],
+                "updated": len(outcome["changed"]),
+                "more": outcome["more"],
+                "results": outcome["results"],
+            }
+        )
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     """
     Custom TokenObtainPairView
     """
 
     serializer_class = CustomUserTokenObtainPairSerializer
+
+
+class AnalyticsViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """
+    API endpoint giving admins aggregated user statistics.
+
+    Figures are read from the summary tables maintained by the
+    ``rollup_user_analytics`` command, so they are as fresh as its last run,
+    returned as ``as_of``.
+    """
+
+    permission_classes = [IsAdmin]
+
+    @action(detail=False, methods=["get"])
+    def signups(self, request):
+        """
+        Lists the signups per day, by account type.
+        """
+        params = SignupAnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        days = analytics.signups_per_day(**params.validated_data)
+        return Response({"as_of": analytics.last_rollup(), "results": days})
+
+    @action(detail=False, methods=["get"])
+    def regions(self, request):
+        """
+        Lists the users of each status per country or state.
+        """
+        params = RegionAnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        regions = analytics.users_by_region(**params.validated_data)
+        return Response({"as_of": analytics.last_rollup(), "results": regions})
+
+    @action(detail=False, methods=["get"], url_path="user-types")
+    def user_types(self, request):
+        """
+        Lists the users of each status per account type.
+        """
+        params = AnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        user_types = analytics.users_by_type(**params.validated_data)
+        return Response({"as_of": analytics.last_rollup(), "results": user_types})